@@ -0,0 +1,97 @@
+"""
+Decode throughput of the JSON backends on podcastindex_records_v1 payloads.
+
+    $ python -m benchmarks.json_codec
+    $ python -m benchmarks.json_codec --records 50000 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import timeit
+import uuid
+
+from src import json_codec
+
+APPS = [
+    ("Fountain", "1.0.6"),
+    ("Breez", "0.16.1"),
+    ("Podverse", "4.12.1"),
+    ("CurioCaster", "1.0"),
+    ("Castamatic", "9.0.5"),
+    ("BoostCLI", "0.7.0"),
+]
+
+PODCASTS = [
+    ("No Agenda", "http://feed.nashownotes.com/rss.xml", 41504),
+    ("Podcasting 2.0", "http://mp3s.nashownotes.com/pc20rss.xml", 920666),
+    ("Bitcoin Audible", "https://feeds.fountain.fm/bitcoin-audible", 1234),
+    ("Mere Mortals", "https://feeds.fountain.fm/mere-mortals", 2345),
+]
+
+MESSAGES = [
+    None,
+    "Great show!",
+    "Boost from the road ⚡\U0001f680",
+    "Keep up the value for value, love the new feed features",
+    "¡Gracias por el episodio! Saludos desde México",
+    "x" * 300,
+]
+
+
+def record(rng: random.Random) -> dict:
+    app_name, app_version = rng.choice(APPS)
+    podcast, url, feed_id = rng.choice(PODCASTS)
+    boost = rng.random() < 0.2
+    value = {
+        "action": "boost" if boost else "stream",
+        "app_name": app_name,
+        "app_version": app_version,
+        "podcast": podcast,
+        "url": url,
+        "feedID": feed_id,
+        "itemID": rng.randrange(10**9),
+        "guid": str(uuid.UUID(int=rng.getrandbits(128))),
+        "episode": f"Episode {rng.randrange(1500)}",
+        "episode_guid": str(uuid.UUID(int=rng.getrandbits(128))),
+        "ts": rng.randrange(3 * 60 * 60),
+        "name": podcast,
+        "value_msat_total": rng.choice([1000, 10000, 21000, 100000, 1000000]),
+        "sender_name": rng.choice(["Anonymous", "Dude named Ben", "sir_sats"]),
+    }
+    if boost:
+        value["message"] = rng.choice(MESSAGES)
+    return {k: v for k, v in value.items() if v is not None}
+
+
+def corpus(size: int, seed: int = 21) -> list:
+    rng = random.Random(seed)
+    return [json.dumps(record(rng)).encode("utf8") for _ in range(size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = corpus(args.records)
+    size = sum(len(p) for p in payloads)
+    print(f"{len(payloads)} payloads, {size / len(payloads):.0f} bytes on average")
+
+    for name, backend in json_codec.BACKENDS.items():
+        seconds = min(
+            timeit.repeat(
+                lambda: [backend.loads(p) for p in payloads],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f"{name:>8}: {len(payloads) / seconds:>12,.0f} records/s "
+            f"{size / seconds / 1024 / 1024:>8,.1f} MiB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Bytes per record of ValueForValue compared to the same dataclass without
+__slots__, on synthetic streaming payments.
+
+    $ python -m benchmarks.models_memory
+    $ python -m benchmarks.models_memory --records 100000
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import datetime
+
+from src.models import ValueForValue
+
+# The dataclass as it was declared before it was slotted.
+PlainValueForValue = make_dataclass(
+    "PlainValueForValue",
+    [(f.name, f.type, f) for f in fields(ValueForValue)],
+)
+
+PODCASTS = [
+    ("Podcasting 2.0", "http://mp3s.nashownotes.com/pc20rss.xml", "Adam"),
+    ("No Agenda", "http://feed.nashownotes.com/rss.xml", "Dvorak"),
+    ("Bitcoin Audible", "https://feeds.fountain.fm/bitcoin-audible", "Guy"),
+]
+
+
+def records(size: int, seed: int = 21):
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1).timestamp()
+    for i in range(size):
+        podcast_title, podcast_url, receiver_name = rng.choice(PODCASTS)
+        yield dict(
+            amount_msats=rng.choice([1000, 2000, 10000]),
+            boost=False,
+            creation_date=datetime.fromtimestamp(start + i * 60),
+            receiver_name=receiver_name,
+            amount_msats_total=10000,
+            podcast_title=podcast_title,
+            podcast_url=podcast_url,
+            sender_app_name="Fountain",
+            timestamp=i % 7200,
+        )
+
+
+def measure(cls, size: int) -> float:
+    data = list(records(size))
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values = [cls(**kwargs) for kwargs in data]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(values) == size
+    return (after - before) / size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    plain = measure(PlainValueForValue, args.records)
+    slotted = measure(ValueForValue, args.records)
+
+    print(f"{args.records:,} synthetic boosts, bytes per record (excluding values)")
+    print(f"  dataclass: {plain:>8,.0f}")
+    print(f"    slotted: {slotted:>8,.0f} ({slotted / plain:.0%})")
+
+
+if __name__ == "__main__":
+    main()
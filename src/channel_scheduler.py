@@ -0,0 +1,98 @@
+"""
+Assignment of the concurrent payments of a Boost to outgoing channels, so
+they don't all compete for the liquidity of the same channel.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+def spendable_msat(channel) -> int:
+    """What an lnrpc.Channel can still send, keeping its channel reserve."""
+    spendable = (
+        channel.local_balance - channel.local_constraints.chan_reserve_sat
+    ) * 1000
+    max_pending = channel.local_constraints.max_pending_amt_msat
+    if max_pending:
+        spendable = min(spendable, max_pending)
+    return max(spendable, 0)
+
+
+class ChannelScheduler:
+    """
+    Tracks the spendable balance of each outgoing channel while payments are
+    in flight. Each payment is assigned the channel with the most left, and
+    that amount is reserved until the payment fails and it is released.
+
+    Safe to use from the worker threads of LightningService.
+    """
+
+    __slots__ = ("spendable", "lock")
+
+    def __init__(self, spendable: Dict[int, int]):
+        # chan_id -> msats it can still send
+        self.spendable = dict(spendable)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_channels(cls, channels: Iterable) -> "ChannelScheduler":
+        return ChannelScheduler(
+            {
+                channel.chan_id: spendable_msat(channel)
+                for channel in channels
+                if channel.active
+            }
+        )
+
+    def total(self) -> int:
+        """The msats all the channels can still send together."""
+        with self.lock:
+            return sum(max(spendable, 0) for spendable in self.spendable.values())
+
+    def fits(self, amounts_msats: List[int], splittable: bool = False) -> bool:
+        """
+        Whether the payments of `amounts_msats` can all be sent at once, each
+        through a single channel unless they are `splittable` over several.
+        """
+        if splittable:
+            return sum(amounts_msats) <= self.total()
+
+        with self.lock:
+            remaining = list(self.spendable.values())
+        # Largest payments first, each in the channel with the most left.
+        for amount_msats in sorted(amounts_msats, reverse=True):
+            index = max(range(len(remaining)), key=remaining.__getitem__, default=None)
+            if index is None or remaining[index] < amount_msats:
+                return False
+            remaining[index] -= amount_msats
+        return True
+
+    def assign(self, amount_msats: int, exclude: Iterable[int] = ()) -> Optional[int]:
+        """
+        Reserve `amount_msats` on the channel with the most spendable balance
+        and return its chan_id, None if no channel has enough.
+        """
+        exclude = set(exclude)
+        with self.lock:
+            candidates = [
+                (spendable, chan_id)
+                for chan_id, spendable in self.spendable.items()
+                if chan_id not in exclude and spendable >= amount_msats
+            ]
+            if not candidates:
+                return None
+            _, chan_id = max(candidates)
+            self.spendable[chan_id] -= amount_msats
+            return chan_id
+
+    def reserve(self, chan_id: int, amount_msats: int):
+        """Reserve `amount_msats` on a channel picked by someone else."""
+        with self.lock:
+            if chan_id in self.spendable:
+                self.spendable[chan_id] -= amount_msats
+
+    def release(self, chan_id: int, amount_msats: int):
+        """Give back an amount reserved for a payment that did not use it."""
+        with self.lock:
+            if chan_id in self.spendable:
+                self.spendable[chan_id] += amount_msats
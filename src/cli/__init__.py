@@ -1,12 +1,20 @@
 from .cli import cli
 from .commands.boost import boost
+from .commands.boost_batch import boost_batch
 from .commands.received_boosts import received_boosts
 from .commands.incoming_boosts import incoming_boosts
 from .commands.sent_boosts import sent_boosts
+from .commands.stream import stream
+from .commands.sync import sync
+from .commands.worker import worker
 
 
 # Add Commands to CLI
 cli.add_command(boost)
+cli.add_command(boost_batch)
 cli.add_command(received_boosts)
 cli.add_command(incoming_boosts)
 cli.add_command(sent_boosts)
+cli.add_command(stream)
+cli.add_command(sync)
+cli.add_command(worker)
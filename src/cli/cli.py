@@ -3,6 +3,11 @@ import os
 import click
 from rich.console import Console
 
+from src.fee_policy import (
+    DEFAULT_FEE_CEILING_RATIO,
+    DEFAULT_FEE_FLOOR_MSAT,
+    fee_policy_from,
+)
 from src.services.feed_service import FeedService
 
 from src.providers.podcast_index_provider import PodcastIndexProvider
@@ -41,6 +46,44 @@ CONTEXT_SETTINGS = dict(
     help="Path of the TLS Certificate for connection to the LND server",
     default="tls.cert",
 )
+@click.option(
+    "--ledger-file",
+    type=click.Path(dir_okay=False),
+    help="Path of the local ledger of Boosts used by `sync`",
+    default=os.path.join(click.get_app_dir("BoostCLI"), "ledger.sqlite3"),
+)
+@click.option(
+    "--route-cache-file",
+    type=click.Path(dir_okay=False),
+    help="Path of the cache of routes and fees to recipients used by `boost`",
+    default=os.path.join(click.get_app_dir("BoostCLI"), "routes.sqlite3"),
+)
+@click.option(
+    "--dust-file",
+    type=click.Path(dir_okay=False),
+    help="Path of the streamed shares held back until they are worth sending",
+    default=os.path.join(click.get_app_dir("BoostCLI"), "dust.sqlite3"),
+)
+@click.option(
+    "--job-queue-file",
+    type=click.Path(dir_okay=False),
+    help="Path of the payments queued by `boost-batch --enqueue` for `worker`",
+    default=os.path.join(click.get_app_dir("BoostCLI"), "jobs.sqlite3"),
+)
+@click.option(
+    "--fee-floor",
+    type=click.IntRange(0),
+    default=DEFAULT_FEE_FLOOR_MSAT // 1000,
+    metavar="SATS",
+    help="Always allow paying this much in routing fees, even on tiny payments",
+)
+@click.option(
+    "--fee-ceiling",
+    type=click.FloatRange(0, 100),
+    default=DEFAULT_FEE_CEILING_RATIO * 100,
+    metavar="PERCENT",
+    help="Never pay more than this share of a payment in routing fees, unless below the floor",
+)
 @click.pass_context
 def cli(ctx, **kwargs):
     """
@@ -73,6 +116,11 @@ def cli(ctx, **kwargs):
         port=kwargs["port"],
         cert_filepath=kwargs["tlscert"],
         macaroon_filepath=kwargs["macaroon"],
+        fee_policy=fee_policy_from(
+            kwargs["route_cache_file"],
+            floor_msat=kwargs["fee_floor"] * 1000,
+            ceiling_ratio=kwargs["fee_ceiling"] / 100,
+        ),
     )
 
     ctx.obj["podcast_index_service"] = PodcastIndexService(
@@ -85,6 +133,14 @@ def cli(ctx, **kwargs):
 
     ctx.obj["feed_service"] = FeedService()
 
+    ctx.obj["ledger_file"] = kwargs["ledger_file"]
+
+    ctx.obj["route_cache_file"] = kwargs["route_cache_file"]
+
+    ctx.obj["dust_file"] = kwargs["dust_file"]
+
+    ctx.obj["job_queue_file"] = kwargs["job_queue_file"]
+
     with console.status("Connecting to LND"):
         info = lightning_service.get_info()
 
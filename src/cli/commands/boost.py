@@ -1,5 +1,6 @@
 import itertools
-from typing import Optional
+from concurrent.futures import wait
+from typing import Any, Callable, List, Optional
 
 import click
 from rich.columns import Columns
@@ -10,14 +11,26 @@ from rich.prompt import Confirm, IntPrompt, Prompt
 from rich.table import Table
 from rich.text import Text
 
+from src.channel_scheduler import ChannelScheduler
 from src.models import (
     BoostInvoice,
     PodcastValue,
     PodcastValueDestination,
 )
 from src.services.feed_service import FeedService
-from src.services.lightning_service import LightningService
+from src.services.lightning_service import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    DEFAULT_PAYMENT_TIMEOUT,
+    DEFAULT_TIME_BUDGET,
+    LightningService,
+    PaymentResult,
+    payment_error,
+    payment_route,
+    route_key,
+)
 from src.services.podcast_index_service import PodcastIndexService, SearchType
+from src.services.route_cache_service import DEFAULT_ROUTE_CACHE_TTL, route_cache_from
 
 
 APP_PUBKEY = "03d55f4d4c870577e98ac56605a54c5ed20c8897e41197a068fd61bdb580efaa67"
@@ -72,10 +85,64 @@ ASCII = "\n".join(
     default=True,
     help="Pay 1% Fee to Support BoostCLI",
 )
+@click.option(
+    "--max-concurrent-payments",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    help="The number of recipients paid at the same time",
+)
+@click.option(
+    "--timeout",
+    type=click.IntRange(1),
+    default=DEFAULT_PAYMENT_TIMEOUT,
+    metavar="SECONDS",
+    help="Give up on an attempt to pay a recipient after this many seconds",
+)
+@click.option(
+    "--max-parts",
+    type=click.IntRange(1),
+    default=1,
+    help="Split payments into up to this many parts, sent as AMP which recipients must accept",
+)
+@click.option(
+    "--max-attempts",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_ATTEMPTS,
+    help="Send a recipient's payment up to this many times, raising the fee limit each time",
+)
+@click.option(
+    "--time-budget",
+    type=click.IntRange(1),
+    default=DEFAULT_TIME_BUDGET,
+    metavar="SECONDS",
+    help="Stop retrying failed payments after this many seconds",
+)
+@click.option(
+    "--route-cache-ttl",
+    type=click.IntRange(0),
+    default=DEFAULT_ROUTE_CACHE_TTL,
+    metavar="SECONDS",
+    help="Reuse the route that last paid a recipient for this long, 0 disables the cache",
+)
 @click.option(
     "-y", "--yes", is_flag=True, help="Bypasses message and confirmation prompts"
 )
-def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_app, yes):
+def boost(
+    ctx,
+    search_term,
+    amount,
+    message,
+    sender_name,
+    send_pubkey,
+    support_app,
+    max_concurrent_payments,
+    timeout,
+    max_parts,
+    max_attempts,
+    time_budget,
+    route_cache_ttl,
+    yes,
+):
     """
     BoostCLI will try to find the Podcast by the given SEARCH_TERM which
     can one of many different things: Feed URL, Podcast Index Feed ID,
@@ -94,6 +161,12 @@ def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_a
     pi_service: Optional[PodcastIndexService] = ctx.obj.get("podcast_index_service")
     lightning_service: LightningService = ctx.obj["lightning_service"]
 
+    route_cache = None
+    if route_cache_ttl:
+        route_cache = route_cache_from(
+            ctx.obj["route_cache_file"], ttl_seconds=route_cache_ttl
+        )
+
     pv = find_podcast_value(console, feed_service, pi_service, search_term)
     if pv is None:
         console_error.print(
@@ -172,6 +245,33 @@ def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_a
     if amount is None:
         amount = IntPrompt.ask(Text("amount (sats)", style="bold yellow"))
 
+    # Fail before anything else is entered if the channels can not send it.
+    with console.status("Checking liquidity"):
+        channels = lightning_service.channel_scheduler()
+        affordable = affordable_amount(
+            lightning_service, channels, pv, amount, splittable=max_parts > 1
+        )
+    if affordable < amount:
+        console_error.print(
+            f":broken_heart: Not enough outbound liquidity to Boost {amount:,} "
+            f"sats, at most {affordable:,} sats"
+        )
+        if (
+            yes
+            or not affordable
+            or not Confirm.ask(f"Boost {affordable:,} sats instead?")
+        ):
+            exit(1)
+        amount = affordable
+
+    # The split only depends on the amount, so routes to the recipients are
+    # looked for while the rest of the Boost is entered.
+    routes = lightning_service.probe_boost_invoice(
+        boost_split(pv, amount),
+        max_concurrent_payments=max_concurrent_payments,
+        route_cache=route_cache,
+    )
+
     if sender_name is None:
         sender_name = Prompt.ask(
             Text("Sender name", "bold cyan"), default=0, show_default=False
@@ -201,6 +301,12 @@ def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_a
     table.add_column("Recipient")
     table.add_column("Address", justify="center")
     table.add_column("sats", justify="right")
+    table.add_column("fee", justify="right")
+    table.add_column("hops", justify="right")
+
+    with console.status("Finding routes"):
+        wait(routes.values())
+
     for value in itertools.chain(boost_invoice.payments, boost_invoice.fees):
         address = shorten(value.receiver_address)
 
@@ -215,7 +321,22 @@ def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_a
             if value.custom_key in [696969, 112111100, 818818]:
                 address = f"{address} {value.custom_value.decode('utf8')}"
 
-        table.add_row(value.receiver_name, address, format_msats(value.amount_msats))
+        route = None
+        if route_key(value) in routes:
+            route = routes[route_key(value)].result()
+
+        if route is None:
+            fee, hops = Text("no route", style="red"), ""
+        else:
+            fee, hops = format_msats(route.total_fees_msat), str(len(route.hops))
+
+        table.add_row(
+            value.receiver_name,
+            address,
+            format_msats(value.amount_msats),
+            fee,
+            hops,
+        )
 
     invoice_panel = Panel(table, title="Invoice", style="yellow")
 
@@ -251,35 +372,132 @@ def boost(ctx, search_term, amount, message, sender_name, send_pubkey, support_a
         "[progress.percentage]{task.percentage:>3.0f}%",
         TimeElapsedColumn(),
     )
+    values = list(itertools.chain(boost_invoice.payments, boost_invoice.fees))
     master_task = progress.add_task(
-        pv.destinations[0].name, total=len(pv.destinations), width=MAX_WIDTH
+        f"Paying {len(values)} recipients", total=len(values), width=MAX_WIDTH
     )
 
+    results = []
     with progress:
-        payments = lightning_service.pay_boost_invoice(boost_invoice)
-        for i, payment in enumerate(payments):
-            dest = pv.destinations[i]
-
+        payments = lightning_service.pay_boost_invoice(
+            boost_invoice,
+            max_concurrent_payments=max_concurrent_payments,
+            timeout_seconds=timeout,
+            max_parts=max_parts,
+            routes=routes,
+            route_cache=route_cache,
+            max_attempts=max_attempts,
+            time_budget_seconds=time_budget,
+            channels=channels if max_parts <= 1 else None,
+        )
+        for result in payments:
             progress.refresh()
-
-            hash = payment.payment_hash.hex()
-            short_hash = shorten(hash)
-            fee = format_msats(payment.payment_route.total_fees_msat)
-            total = format_msats(payment.payment_route.total_amt_msat)
-            hops = len(payment.payment_route.hops)
-
-            if payment.payment_error:
-                status = f" :x: [bold yellow]{dest.name}[/bold yellow] {short_hash} [bold red]{payment.payment_error}[/bold red]"
+            results.append(result)
+            value, payment, attempts = result
+
+            if payment is None:
+                status = f" :x: [bold yellow]{value.receiver_name}[/bold yellow] [bold red]OUT_OF_TIME[/bold red]"
+                progress.console.print(status)
+                progress.advance(master_task, 1)
+                continue
+
+            short_hash = shorten(payment.payment_hash)
+            fee = format_msats(payment.fee_msat)
+            total = format_msats(payment.value_msat + payment.fee_msat)
+            route = payment_route(payment)
+            hops = len(route.hops) if route else 0
+
+            error = payment_error(payment)
+            if error:
+                status = f" :x: [bold yellow]{value.receiver_name}[/bold yellow] {short_hash} [bold red]{error}[/bold red] attempts={attempts}"
             else:
-                status = f" :white_check_mark: [bold yellow]{dest.name}[/bold yellow] {short_hash} fee={fee} total={total} hops={hops}"
+                status = f" :white_check_mark: [bold yellow]{value.receiver_name}[/bold yellow] {short_hash} fee={fee} total={total} hops={hops} attempts={attempts}"
 
             progress.console.print(status)
 
             progress.advance(master_task, 1)
 
-            if i < len(pv.destinations) - 1:
-                next_dest = pv.destinations[i + 1]
-                progress.update(master_task, description=next_dest.name)
+    console.print(summary_panel(results), width=MAX_WIDTH)
+
+
+def boost_split(pv: PodcastValue, amount: int) -> BoostInvoice:
+    """The splits of a Boost of `amount` sats, without its message."""
+    return BoostInvoice.create(
+        amount=amount * 1000,
+        podcast_value=pv,
+        message=None,
+        sender_name=None,
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+
+def affordable_amount(
+    lightning_service: LightningService,
+    channels: ChannelScheduler,
+    pv: PodcastValue,
+    amount: int,
+    splittable: bool = False,
+) -> int:
+    """
+    The largest Boost, up to `amount` sats, `channels` can send with the
+    fee limit of each split, which is never more than the split itself.
+    """
+
+    def fits(sats):
+        needed = lightning_service.liquidity_needed(boost_split(pv, sats))
+        return channels.fits(needed, splittable=splittable)
+
+    if fits(amount):
+        return amount
+
+    low, high = 0, amount - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def summary_panel(results: List[PaymentResult]) -> Panel:
+    table = Table(expand=True, box=None)
+    table.add_column("Recipient")
+    table.add_column("sats", justify="right")
+    table.add_column("fee", justify="right")
+    table.add_column("attempts", justify="right")
+    table.add_column("Status")
+
+    paid = 0
+    for value, payment, attempts in results:
+        if payment is None:
+            error = "OUT_OF_TIME"
+        else:
+            error = payment_error(payment)
+        if error:
+            fee, status = "", Text(error, style="bold red")
+        else:
+            paid += 1
+            fee, status = format_msats(payment.fee_msat), Text("PAID", style="green")
+        table.add_row(
+            value.receiver_name,
+            format_msats(value.amount_msats),
+            fee,
+            str(attempts),
+            status,
+        )
+
+    style = "green" if paid == len(results) else "red"
+    return Panel(table, title=f"Paid {paid} of {len(results)}", style=style)
+
+
+PI_SEARCH_SETTINGS = [
+    (SearchType.FEED_URL, "Podcast Index By Feed URL"),
+    (SearchType.FEED_ID, "Podcast Index By Feed ID"),
+    (SearchType.GUID, "Podcast Index By GUID"),
+    (SearchType.ITUNES_ID, "Podcast Index By Itunes ID"),
+]
 
 
 def find_podcast_value(
@@ -289,24 +507,33 @@ def find_podcast_value(
     search_term: str,
 ) -> Optional[PodcastValue]:
 
-    pi_search_settings = [
-        (SearchType.FEED_URL, "Podcast Index By Feed URL"),
-        (SearchType.FEED_ID, "Podcast Index By Feed ID"),
-        (SearchType.GUID, "Podcast Index By GUID"),
-        (SearchType.ITUNES_ID, "Podcast Index By Itunes ID"),
-    ]
-
     with console.status("By Feed URL") as status:
-        pv = feed_service.podcast_value(search_term)
-        if pv:
-            return pv
-
-        if pi_service is not None:
-            for search_type, message in pi_search_settings:
-                status.update(message)
-                pv = pi_service.podcast_value(search_type, search_term)
-                if pv:
-                    return pv
+        return resolve_podcast_value(
+            feed_service, pi_service, search_term, on_search=status.update
+        )
+
+
+def resolve_podcast_value(
+    feed_service: FeedService,
+    pi_service: Optional[PodcastIndexService],
+    search_term: str,
+    on_search: Optional[Callable[[str], Any]] = None,
+) -> Optional[PodcastValue]:
+    """
+    Look for the value block of the Podcast found by `search_term` in its
+    Feed, then the Podcast Index, calling `on_search` before each search.
+    """
+    pv = feed_service.podcast_value(search_term)
+    if pv:
+        return pv
+
+    if pi_service is not None:
+        for search_type, message in PI_SEARCH_SETTINGS:
+            if on_search is not None:
+                on_search(message)
+            pv = pi_service.podcast_value(search_type, search_term)
+            if pv:
+                return pv
 
 
 def shorten(pubkey: str, segment_length=8, seperator=" ... ") -> str:
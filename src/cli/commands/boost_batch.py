@@ -0,0 +1,335 @@
+import csv
+import dataclasses
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional
+
+import click
+from rich.console import Console
+from rich.progress import BarColumn, Progress, SpinnerColumn, TimeElapsedColumn
+from rich.prompt import Confirm
+from rich.table import Table
+from rich.text import Text
+
+from src import json_codec
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.services.feed_service import FeedService
+from src.services.job_queue_service import job_queue_from
+from src.services.lightning_service import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    DEFAULT_PAYMENT_TIMEOUT,
+    LightningService,
+    PaymentResult,
+    payment_error,
+)
+from src.services.podcast_index_service import PodcastIndexService
+
+from .boost import APP_PUBKEY, MAX_WIDTH, format_msats, resolve_podcast_value
+
+# Number of Podcasts looked up in their Feed or the Podcast Index at once.
+DEFAULT_MAX_CONCURRENT_LOOKUPS = 8
+
+# Seconds all the payments of a batch may take together.
+DEFAULT_BATCH_TIME_BUDGET = 600
+
+
+class BatchRow(NamedTuple):
+    search_term: str
+    amount: int
+    message: Optional[str] = None
+    sender_name: Optional[str] = None
+
+
+def read_rows(lines: Iterable[str], format_: str) -> List[BatchRow]:
+    """
+    Read the Boosts of a batch file, either a CSV with a header or one JSON
+    object per line, with the fields of BatchRow. Amounts are in sats.
+    """
+    if format_ == "jsonl":
+        records = [json_codec.loads(line) for line in lines if line.strip()]
+    else:
+        records = list(csv.DictReader(lines))
+
+    rows = []
+    for number, record in enumerate(records, 1):
+        search_term = str(record.get("search_term") or "").strip()
+        if not search_term:
+            raise click.BadParameter(f"row {number} has no search_term")
+        try:
+            amount = int(record.get("amount"))
+        except (TypeError, ValueError):
+            raise click.BadParameter(f"row {number} has no amount in sats") from None
+        if amount < 1:
+            raise click.BadParameter(f"row {number} has an amount below 1 sat")
+        rows.append(
+            BatchRow(
+                search_term=search_term,
+                amount=amount,
+                message=record.get("message") or None,
+                sender_name=record.get("sender_name") or None,
+            )
+        )
+    return rows
+
+
+def format_from(filename: str) -> str:
+    _, extension = os.path.splitext(filename)
+    return "jsonl" if extension.lower() in (".jsonl", ".ndjson") else "csv"
+
+
+@click.command("boost-batch")
+@click.pass_context
+@click.argument("batch_file", type=click.File("r"))
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Format of BATCH_FILE, by default from its extension",
+)
+@click.option(
+    "--sender-name",
+    default="Anonymous",
+    help="The name indicating who sent the Boosts without one of their own",
+)
+@click.option(
+    "--send-pubkey/--no-send-pubkey",
+    default=False,
+    help="Include your pubkey to allow recipients to boost back",
+)
+@click.option(
+    "--support-app/--no-support-app",
+    default=True,
+    help="Pay 1% Fee to Support BoostCLI",
+)
+@click.option(
+    "--max-concurrent-lookups",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_CONCURRENT_LOOKUPS,
+    help="The number of Podcasts looked up at the same time",
+)
+@click.option(
+    "--max-concurrent-payments",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    help="The number of recipients paid at the same time, across all Boosts",
+)
+@click.option(
+    "--timeout",
+    type=click.IntRange(1),
+    default=DEFAULT_PAYMENT_TIMEOUT,
+    metavar="SECONDS",
+    help="Give up on an attempt to pay a recipient after this many seconds",
+)
+@click.option(
+    "--max-attempts",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_ATTEMPTS,
+    help="Send a recipient's payment up to this many times, raising the fee limit each time",
+)
+@click.option(
+    "--time-budget",
+    type=click.IntRange(1),
+    default=DEFAULT_BATCH_TIME_BUDGET,
+    metavar="SECONDS",
+    help="Stop retrying failed payments after this many seconds",
+)
+@click.option(
+    "--enqueue",
+    is_flag=True,
+    help="Queue the payments to be sent by `worker` instead of sending them now",
+)
+@click.option("-y", "--yes", is_flag=True, help="Bypasses the confirmation prompt")
+def boost_batch(
+    ctx,
+    batch_file,
+    format_,
+    sender_name,
+    send_pubkey,
+    support_app,
+    max_concurrent_lookups,
+    max_concurrent_payments,
+    timeout,
+    max_attempts,
+    time_budget,
+    enqueue,
+    yes,
+):
+    """
+    Boost many Podcasts at once. BATCH_FILE is a CSV with a header, or a
+    JSONL file, with the columns `search_term` and `amount` (sats), and
+    optionally `message` and `sender_name`. The search terms are the same as
+    the ones of `boost`.
+
+    \b
+    $ boostcli boost-batch weekly.csv
+    $ boostcli boost-batch weekly.jsonl --sender-name "Dude named Ben" -y
+    $ boostcli boost-batch weekly.csv --enqueue && boostcli worker
+    """
+    console: Console = ctx.obj["console"]
+    console_error: Console = ctx.obj["console_error"]
+    feed_service: FeedService = ctx.obj["feed_service"]
+    pi_service: Optional[PodcastIndexService] = ctx.obj.get("podcast_index_service")
+    lightning_service: LightningService = ctx.obj["lightning_service"]
+
+    rows = read_rows(batch_file, format_ or format_from(batch_file.name))
+    if not rows:
+        console_error.print(":broken_heart: No Boosts in the batch file")
+        exit(1)
+
+    search_terms = list(dict.fromkeys(row.search_term for row in rows))
+    with console.status(f"Looking up {len(search_terms)} Podcasts"):
+        with ThreadPoolExecutor(max_workers=max_concurrent_lookups) as executor:
+            podcast_values = dict(
+                zip(
+                    search_terms,
+                    executor.map(
+                        lambda search_term: resolve_podcast_value(
+                            feed_service, pi_service, search_term
+                        ),
+                        search_terms,
+                    ),
+                )
+            )
+
+    pubkey = None
+    if send_pubkey:
+        pubkey = lightning_service.get_info().identity_pubkey
+
+    invoices: List[Optional[BoostInvoice]] = []
+    for row in rows:
+        pv = podcast_values[row.search_term]
+        if pv is None:
+            invoices.append(None)
+            continue
+        if support_app:
+            pv = with_app_fee(pv)
+        invoices.append(
+            BoostInvoice.create(
+                amount=row.amount * 1000,
+                podcast_value=pv,
+                message=row.message,
+                sender_name=row.sender_name or sender_name,
+                sender_app_name="BoostCLI",
+                pubkey=pubkey,
+            )
+        )
+
+    table = Table(expand=True, box=None)
+    table.add_column("#", justify="right")
+    table.add_column("Podcast")
+    table.add_column("sats", justify="right")
+    table.add_column("Message")
+    for number, (row, invoice) in enumerate(zip(rows, invoices), 1):
+        if invoice is None:
+            podcast = Text(f"not found: {row.search_term}", style="red")
+        else:
+            podcast = invoice.podcast_value.podcast_title or row.search_term
+        table.add_row(str(number), podcast, f"{row.amount:,}", row.message or "")
+    console.print(table, width=MAX_WIDTH)
+
+    found = [invoice for invoice in invoices if invoice is not None]
+    total = sum(invoice.amount for invoice in found)
+
+    if enqueue:
+        if not yes:
+            if not Confirm.ask(
+                f"Queue {len(found)} Boosts, {format_msats(total)} sats?"
+            ):
+                return
+        ids = job_queue_from(ctx.obj["job_queue_file"]).enqueue(found)
+        console.print(
+            f"Queued {len(ids)} payments of {len(found)} Boosts, "
+            "send them with `boostcli worker`"
+        )
+        return
+
+    channels = lightning_service.channel_scheduler()
+    needed = [
+        amount
+        for invoice in found
+        for amount in lightning_service.liquidity_needed(invoice)
+    ]
+    if not channels.fits(needed):
+        console_error.print(
+            f":broken_heart: Not enough outbound liquidity to send {format_msats(total)} sats"
+        )
+        exit(1)
+
+    if not yes:
+        if not Confirm.ask(f"Send {len(found)} Boosts, {format_msats(total)} sats?"):
+            return
+
+    results: List[List[PaymentResult]] = [[] for _ in found]
+    progress = Progress(
+        SpinnerColumn(),
+        "[progress.description]{task.description}",
+        BarColumn(bar_width=MAX_WIDTH),
+        "[progress.percentage]{task.percentage:>3.0f}%",
+        TimeElapsedColumn(),
+    )
+    splits = sum(len(invoice.payments) + len(invoice.fees) for invoice in found)
+    task = progress.add_task(f"Paying {len(found)} Boosts", total=splits)
+    with progress:
+        payments = lightning_service.pay_boost_invoices(
+            found,
+            max_concurrent_payments=max_concurrent_payments,
+            timeout_seconds=timeout,
+            max_attempts=max_attempts,
+            time_budget_seconds=time_budget,
+            channels=channels,
+        )
+        for index, result in payments:
+            results[index].append(result)
+            progress.advance(task, 1)
+
+    report = Table(title="Report", expand=True, box=None)
+    report.add_column("#", justify="right")
+    report.add_column("Search Term")
+    report.add_column("sats", justify="right")
+    report.add_column("fee", justify="right")
+    report.add_column("Recipients", justify="right")
+    report.add_column("Status")
+    found_results = iter(results)
+    for number, (row, invoice) in enumerate(zip(rows, invoices), 1):
+        if invoice is None:
+            report.add_row(
+                str(number),
+                row.search_term,
+                f"{row.amount:,}",
+                "",
+                "",
+                Text("NOT FOUND", style="bold red"),
+            )
+            continue
+        row_results = next(found_results)
+        paid = [r for r in row_results if r.payment and not payment_error(r.payment)]
+        fee = sum(r.payment.fee_msat for r in paid)
+        if len(paid) == len(row_results):
+            status = Text("PAID", style="green")
+        elif paid:
+            status = Text("PARTIAL", style="yellow")
+        else:
+            status = Text("FAILED", style="bold red")
+        report.add_row(
+            str(number),
+            row.search_term,
+            f"{row.amount:,}",
+            format_msats(fee),
+            f"{len(paid)}/{len(row_results)}",
+            status,
+        )
+    console.print(report, width=MAX_WIDTH)
+
+
+def with_app_fee(pv: PodcastValue) -> PodcastValue:
+    """A copy of `pv` that also pays the 1% fee supporting BoostCLI."""
+    return dataclasses.replace(
+        pv,
+        destinations=pv.destinations
+        + [
+            PodcastValueDestination(
+                split=1, address=APP_PUBKEY, name="BoostCLI", fee=True
+            )
+        ],
+    )
@@ -1,23 +1,47 @@
 import click
 from rich.console import Console
 
+from src.services.ledger_service import ledger_from
 from src.services.lightning_service import LightningService
 
 from ..print_value import print_value
 
 
 @click.command()
+@click.option(
+    "--follow",
+    is_flag=True,
+    help="Display every Boost received so far first, then the new ones",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Display the Boosts received since the last one displayed first",
+)
 @click.pass_context
 def incoming_boosts(ctx, **kwargs):
-    """Display Boosts as they are received."""
+    """
+    Display Boosts as they are received. The subscription to LND is renewed
+    whenever the connection drops, without missing any Boost.
+    """
 
     console: Console = ctx.obj["console"]
     console_error: Console = ctx.obj["console_error"]
     lighting_service: LightningService = ctx.obj["lightning_service"]
 
+    ledger_service = ledger_from(ctx.obj["ledger_file"], lighting_service)
+
+    settle_index = 0
+    if kwargs["resume"]:
+        settle_index = ledger_service.watched_settle_index()
+
     with console.status("Listening..."):
         try:
-            for invoice in lighting_service.watch_value_received():
+            for invoice in lighting_service.watch_value_received(
+                settle_index=settle_index,
+                history=kwargs["follow"],
+                checkpoint=ledger_service.set_watched_settle_index,
+            ):
                 print_value(invoice, console)
         except Exception as e:
             console_error.log(e)
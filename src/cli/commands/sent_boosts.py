@@ -1,6 +1,7 @@
 import click
 from rich.console import Console
 
+from src.services.ledger_service import ledger_from
 from src.services.lightning_service import LightningService
 
 from ..print_value import print_value
@@ -8,8 +9,24 @@ from ..print_value import print_value
 
 @click.command()
 @click.option("--accending/--decending", default=False)
-@click.option("--max-number-of-payments", type=click.IntRange(0), default=10000)
+@click.option(
+    "--max-number-of-payments",
+    type=click.IntRange(0),
+    default=None,
+    help="Stop after this many payments, all payments are scanned by default",
+)
 @click.option("--index-offset", type=click.IntRange(0), default=0)
+@click.option(
+    "--partitions",
+    type=click.IntRange(1),
+    default=1,
+    help="Number of index ranges fetched concurrently from LND",
+)
+@click.option(
+    "--from-ledger",
+    is_flag=True,
+    help="Read from the local ledger updated by `sync` instead of LND",
+)
 @click.pass_context
 def sent_boosts(ctx, **kwargs):
     """Display Boosts that have been sent."""
@@ -18,11 +35,20 @@ def sent_boosts(ctx, **kwargs):
     lighting_service: LightningService = ctx.obj["lightning_service"]
 
     try:
-        value_received = lighting_service.value_sent(
-            index_offset=kwargs["index_offset"],
-            accending=not kwargs["accending"],
-            max_payments=kwargs["max_number_of_payments"],
-        )
+        if kwargs["from_ledger"]:
+            ledger_service = ledger_from(ctx.obj["ledger_file"], lighting_service)
+            value_received = ledger_service.value_sent(
+                index_offset=kwargs["index_offset"],
+                accending=kwargs["accending"],
+                max_payments=kwargs["max_number_of_payments"],
+            )
+        else:
+            value_received = lighting_service.value_sent(
+                index_offset=kwargs["index_offset"],
+                accending=kwargs["accending"],
+                max_payments=kwargs["max_number_of_payments"],
+                partitions=kwargs["partitions"],
+            )
 
         for value in value_received:
             print_value(value, console)
@@ -0,0 +1,371 @@
+import copy
+import dataclasses
+import itertools
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence
+
+import click
+from rich.console import Console
+from rich.prompt import Confirm
+from rich.table import Table
+
+from src.models import BoostInvoice, ValueForValue
+from src.services.dust_service import DEFAULT_DUST_THRESHOLD, dust_from
+from src.services.feed_service import FeedService
+from src.services.lightning_service import (
+    DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    LightningService,
+    PaymentResult,
+    payment_error,
+)
+from src.services.podcast_index_service import PodcastIndexService
+from src.stream_scheduler import StreamScheduler
+
+from .boost import MAX_WIDTH, find_podcast_value, format_msats
+from .boost_batch import with_app_fee
+
+# Seconds of listening paid by each streaming payment.
+DEFAULT_INTERVAL = 60
+
+# Intervals of a stream whose payments may still be in flight when the next
+# one is due, later ones are skipped until they complete.
+MAX_TICKS_IN_FLIGHT = 2
+
+
+class StreamAccount:
+    """
+    What has been streamed to one Podcast, updated from the worker threads
+    as the payments of its intervals complete.
+    """
+
+    __slots__ = (
+        "title",
+        "plan",
+        "in_flight",
+        "ticks",
+        "skipped",
+        "amount_msats",
+        "fee_msats",
+        "failures",
+        "lock",
+    )
+
+    def __init__(self, title: str, plan: BoostInvoice):
+        self.title = title
+        # The Boost of the amount streamed each interval.
+        self.plan = plan
+        self.in_flight = 0
+        self.ticks = 0
+        self.skipped = 0
+        self.amount_msats = 0
+        self.fee_msats = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Whether the payments of another interval may be sent now."""
+        with self.lock:
+            if self.in_flight >= MAX_TICKS_IN_FLIGHT:
+                self.skipped += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def record(self, results: Sequence[PaymentResult]) -> List[PaymentResult]:
+        """Account for the payments of an interval, returning the paid ones."""
+        paid = [r for r in results if r.payment and not payment_error(r.payment)]
+        with self.lock:
+            self.in_flight -= 1
+            self.ticks += 1
+            self.amount_msats += sum(r.value.amount_msats for r in paid)
+            self.fee_msats += sum(r.payment.fee_msat for r in paid)
+            self.failures += len(results) - len(paid)
+        return paid
+
+
+def pay_tick(
+    executor: Executor,
+    pay_value: Callable[[ValueForValue], PaymentResult],
+    values: Sequence[ValueForValue],
+    on_done: Callable[[List[PaymentResult]], None],
+):
+    """
+    Pay each of `values` on `executor`, shared by all the streams, and call
+    `on_done` with their results from the thread completing the last one.
+    A payment that raised is a failed PaymentResult without a payment.
+    """
+    if not values:
+        on_done([])
+        return
+
+    results: List[PaymentResult] = []
+    lock = threading.Lock()
+
+    def done(value, future):
+        if future.exception() is not None:
+            result = PaymentResult(value=value, payment=None, attempts=1)
+        else:
+            result = future.result()
+        with lock:
+            results.append(result)
+            complete = len(results) == len(values)
+        if complete:
+            on_done(results)
+
+    for value in values:
+        executor.submit(pay_value, value).add_done_callback(partial(done, value))
+
+
+def streamed(plan: BoostInvoice, timestamp: int) -> BoostInvoice:
+    """
+    The streaming payments of `plan`, a Boost of the amount streamed each
+    interval, for the playback position `timestamp` in seconds.
+    """
+
+    def stream_values(values):
+        return [
+            dataclasses.replace(value, boost=False, timestamp=timestamp)
+            for value in values
+            # Splits too small to be paid at all.
+            if value.amount_msats > 0
+        ]
+
+    invoice = copy.copy(plan)
+    invoice.payments = stream_values(plan.payments)
+    invoice.fees = stream_values(plan.fees)
+    return invoice
+
+
+def parse_position(value: str) -> int:
+    """Seconds from a playback position of [[HH:]MM:]SS."""
+    seconds = 0
+    for part in value.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_position(seconds: int) -> str:
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+@click.command()
+@click.pass_context
+@click.argument("search_terms", nargs=-1, required=True)
+@click.option(
+    "--amount",
+    type=click.IntRange(1),
+    metavar="SATS",
+    help="The number of Satoshis to stream to each Podcast per interval, per minute by default",
+)
+@click.option(
+    "--interval",
+    type=click.IntRange(1),
+    default=DEFAULT_INTERVAL,
+    metavar="SECONDS",
+    help="The seconds of listening paid by each payment",
+)
+@click.option(
+    "--start",
+    default="0",
+    metavar="[[HH:]MM:]SS",
+    help="The playback position to start streaming from",
+)
+@click.option(
+    "--duration",
+    type=click.IntRange(1),
+    metavar="MINUTES",
+    help="Stop after this many minutes, by default stream until interrupted",
+)
+@click.option("--sender-name", help="The name indicating who streamed")
+@click.option(
+    "--support-app/--no-support-app",
+    default=True,
+    help="Pay 1% Fee to Support BoostCLI",
+)
+@click.option(
+    "--max-concurrent-payments",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    help="The number of recipients paid at the same time, across all Podcasts",
+)
+@click.option(
+    "--dust-threshold",
+    type=click.IntRange(0),
+    default=DEFAULT_DUST_THRESHOLD // 1000,
+    metavar="SATS",
+    help="Hold back smaller shares until they add up to this much, 0 sends every share",
+)
+@click.option("-y", "--yes", is_flag=True, help="Bypasses the confirmation prompt")
+def stream(
+    ctx,
+    search_terms,
+    amount,
+    interval,
+    start,
+    duration,
+    sender_name,
+    support_app,
+    max_concurrent_payments,
+    dust_threshold,
+    yes,
+):
+    """
+    Stream sats to the Podcasts found by SEARCH_TERMS while listening to
+    them, paying each value block every interval, with the playback position
+    in each payment. The search terms are the same as the one of `boost`.
+
+    The payments of all the Podcasts share --max-concurrent-payments and are
+    spread over the interval instead of all going out at once.
+
+    \b
+    $ boostcli stream 920666 --amount 100
+    $ boostcli stream 920666 --amount 100 --start 12:30 --duration 60
+    $ boostcli stream 920666 "Bitcoin Audible" --amount 50
+    """
+    console: Console = ctx.obj["console"]
+    console_error: Console = ctx.obj["console_error"]
+    feed_service: FeedService = ctx.obj["feed_service"]
+    pi_service: Optional[PodcastIndexService] = ctx.obj.get("podcast_index_service")
+    lightning_service: LightningService = ctx.obj["lightning_service"]
+
+    try:
+        position = parse_position(start)
+    except ValueError:
+        raise click.BadParameter(f"invalid position {start!r}", param_hint="--start")
+
+    podcast_values = {}
+    for search_term in dict.fromkeys(search_terms):
+        pv = find_podcast_value(console, feed_service, pi_service, search_term)
+        if pv is None:
+            console_error.print(
+                f':broken_heart: Failed to locate value by search_term="{search_term}"'
+            )
+            exit(1)
+        podcast_values[search_term] = with_app_fee(pv) if support_app else pv
+
+    if amount is None:
+        amount = click.prompt("sats per interval", type=click.IntRange(1))
+
+    # The split is the same for every interval, only the position changes.
+    accounts: Dict[str, StreamAccount] = {
+        search_term: StreamAccount(
+            title=pv.podcast_title or search_term,
+            plan=BoostInvoice.create(
+                amount=amount * 1000,
+                podcast_value=pv,
+                message=None,
+                sender_name=sender_name,
+                sender_app_name="BoostCLI",
+                pubkey=None,
+            ),
+        )
+        for search_term, pv in podcast_values.items()
+    }
+
+    dust = None
+    if dust_threshold:
+        dust = dust_from(ctx.obj["dust_file"], threshold_msats=dust_threshold * 1000)
+
+    titles = ", ".join(account.title for account in accounts.values())
+    if not yes:
+        if not Confirm.ask(f"Stream {amount:,} sats every {interval}s to {titles}?"):
+            return
+
+    def pay(account: StreamAccount, timestamp: int):
+        invoice = streamed(account.plan, timestamp)
+        taken = {}
+        if dust is not None:
+            invoice, taken = dust.aggregate(invoice)
+        deadline = time.monotonic() + interval
+
+        def pay_value(value: ValueForValue) -> PaymentResult:
+            return lightning_service.pay_value_with_retries(
+                value,
+                deadline=deadline,
+                timeout_seconds=interval,
+                max_attempts=1,
+            )
+
+        def done(results: List[PaymentResult]):
+            paid = account.record(results)
+            if dust is not None:
+                dust.restore([r.value for r in results if r not in paid], taken)
+
+            amount_paid = sum(r.value.amount_msats for r in paid)
+            fee = sum(r.payment.fee_msat for r in paid)
+            errors = ", ".join(
+                f"{r.value.receiver_name} {result_error(r)}"
+                for r in results
+                if r not in paid
+            )
+            held = ""
+            if dust is not None:
+                values = itertools.chain(account.plan.payments, account.plan.fees)
+                held = f"held={format_msats(dust.held_msats(values))} "
+            status = ":white_check_mark:" if len(paid) == len(results) else ":x:"
+            console.print(
+                f" {status} {account.title} {format_position(timestamp)} "
+                f"paid {len(paid)}/{len(results)} "
+                f"{format_msats(amount_paid)} sats fee={format_msats(fee)} {held}"
+                f"[bold red]{errors}[/bold red]"
+            )
+
+        pay_tick(
+            executor,
+            pay_value,
+            list(itertools.chain(invoice.payments, invoice.fees)),
+            done,
+        )
+
+    scheduler = StreamScheduler()
+    for search_term in accounts:
+        scheduler.add(search_term, interval)
+
+    console.print(f"Streaming to {titles}, press Ctrl+C to stop")
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrent_payments)
+    try:
+        for due in scheduler.run():
+            for search_term, tick in due:
+                account = accounts[search_term]
+                if duration is not None and tick * interval >= duration * 60:
+                    scheduler.remove(search_term)
+                if not account.start():
+                    console_error.print(
+                        f" :hourglass: {account.title} {format_position(position + tick * interval)} "
+                        "skipped, the previous payments are still in flight"
+                    )
+                    continue
+                # Each payment is for the interval that was just listened to.
+                pay(account, position + tick * interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(wait=True)
+
+    report = Table(title="Streamed", expand=True, box=None)
+    report.add_column("Podcast")
+    report.add_column("intervals", justify="right")
+    report.add_column("sats", justify="right")
+    report.add_column("fee", justify="right")
+    report.add_column("failed", justify="right")
+    report.add_column("skipped", justify="right")
+    for account in accounts.values():
+        report.add_row(
+            account.title,
+            str(account.ticks),
+            format_msats(account.amount_msats),
+            format_msats(account.fee_msats),
+            str(account.failures),
+            str(account.skipped),
+        )
+    console.print(report, width=MAX_WIDTH)
+
+
+def result_error(result: PaymentResult) -> str:
+    if result.payment is not None:
+        return payment_error(result.payment)
+    return "OUT_OF_TIME" if result.attempts == 0 else "ERROR"
@@ -0,0 +1,33 @@
+import click
+from rich.console import Console
+
+from src.services.ledger_service import ledger_from
+from src.services.lightning_service import LightningService
+
+
+@click.command()
+@click.pass_context
+def sync(ctx, **kwargs):
+    """
+    Save the Boosts received and sent since the last sync to the local ledger,
+    then display them quickly with `received-boosts --from-ledger` and
+    `sent-boosts --from-ledger`.
+    """
+    console: Console = ctx.obj["console"]
+    console_error: Console = ctx.obj["console_error"]
+    lighting_service: LightningService = ctx.obj["lightning_service"]
+
+    try:
+        ledger_service = ledger_from(ctx.obj["ledger_file"], lighting_service)
+
+        with console.status("Syncing received Boosts"):
+            received = ledger_service.sync_received()
+
+        with console.status("Syncing sent Boosts"):
+            sent = ledger_service.sync_sent()
+
+    except Exception as e:
+        console_error.log(e)
+
+    else:
+        console.print(f"Synced {received} received and {sent} sent Boosts")
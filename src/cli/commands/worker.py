@@ -0,0 +1,191 @@
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+import click
+import grpc
+from rich.console import Console
+
+from src.lnd import lightning_pb2 as ln
+from src.services.job_queue_service import (
+    JOB_PAID,
+    JOB_QUEUED,
+    Job,
+    JobQueueService,
+    job_queue_from,
+)
+from src.services.lightning_service import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    DEFAULT_PAYMENT_TIMEOUT,
+    DEFAULT_TIME_BUDGET,
+    LightningService,
+    PaymentResult,
+)
+
+from .boost import format_msats
+
+# Seconds between two looks at an empty queue with --watch.
+DEFAULT_POLL_INTERVAL = 5
+
+
+def send_job(
+    lightning_service: LightningService,
+    queue: JobQueueService,
+    job: Job,
+    timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+    max_attempts=DEFAULT_MAX_ATTEMPTS,
+    time_budget_seconds=DEFAULT_TIME_BUDGET,
+) -> str:
+    """Send the payment of `job` with its preimage, returning its new state."""
+    try:
+        result = lightning_service.pay_value_with_retries(
+            job.value,
+            deadline=time.monotonic() + time_budget_seconds,
+            timeout_seconds=timeout_seconds,
+            max_attempts=max_attempts,
+            preimage=job.preimage,
+        )
+    except grpc.RpcError as error:
+        # LND refuses a payment hash it already paid or is still paying.
+        payment = lightning_service.track_payment(job.payment_hash)
+        if payment is None:
+            return queue.fail(job, error.code().name)
+        result = PaymentResult(value=job.value, payment=payment, attempts=1)
+    return queue.finish(job, result)
+
+
+def recover_job(
+    lightning_service: LightningService, queue: JobQueueService, job: Job
+) -> str:
+    """
+    Settle a job that was being sent when a worker stopped: paid if LND sent
+    it successfully, otherwise queued again to be sent with the same preimage.
+    """
+    payment = lightning_service.track_payment(job.payment_hash)
+    if payment is not None and payment.status == ln.Payment.SUCCEEDED:
+        return queue.finish(
+            job, PaymentResult(value=job.value, payment=payment, attempts=0)
+        )
+    queue.requeue(job)
+    return JOB_QUEUED
+
+
+@click.command()
+@click.pass_context
+@click.option(
+    "--max-concurrent-payments",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    help="The number of queued payments sent at the same time",
+)
+@click.option(
+    "--timeout",
+    type=click.IntRange(1),
+    default=DEFAULT_PAYMENT_TIMEOUT,
+    metavar="SECONDS",
+    help="Give up on an attempt to pay a recipient after this many seconds",
+)
+@click.option(
+    "--max-attempts",
+    type=click.IntRange(1),
+    default=DEFAULT_MAX_ATTEMPTS,
+    help="Send a recipient's payment up to this many times, raising the fee limit each time",
+)
+@click.option(
+    "--time-budget",
+    type=click.IntRange(1),
+    default=DEFAULT_TIME_BUDGET,
+    metavar="SECONDS",
+    help="Stop retrying a failed payment after this many seconds",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep waiting for payments to be queued once the queue is empty",
+)
+@click.option(
+    "--poll-interval",
+    type=click.IntRange(1),
+    default=DEFAULT_POLL_INTERVAL,
+    metavar="SECONDS",
+    help="How often an empty queue is checked with --watch",
+)
+def worker(
+    ctx,
+    max_concurrent_payments,
+    timeout,
+    max_attempts,
+    time_budget,
+    watch,
+    poll_interval,
+):
+    """
+    Send the payments queued by `boost-batch --enqueue` until the queue is
+    empty, at most --max-concurrent-payments at a time.
+
+    Each payment is sent with the keysend preimage it was queued with, and
+    payments that were being sent when a worker stopped are checked with LND
+    first, so running it again after a crash pays no one twice.
+
+    \b
+    $ boostcli worker
+    $ boostcli worker --max-concurrent-payments 8 --watch
+    """
+    console: Console = ctx.obj["console"]
+    console_error: Console = ctx.obj["console_error"]
+    lightning_service: LightningService = ctx.obj["lightning_service"]
+
+    queue = job_queue_from(ctx.obj["job_queue_file"])
+
+    interrupted = queue.interrupted()
+    if interrupted:
+        with console.status(f"Checking {len(interrupted)} interrupted payments"):
+            for job in interrupted:
+                recover_job(lightning_service, queue, job)
+
+    stop = threading.Event()
+
+    def send():
+        while not stop.is_set():
+            job = queue.claim()
+            if job is None:
+                if not watch:
+                    return
+                stop.wait(poll_interval)
+                continue
+
+            state = send_job(
+                lightning_service,
+                queue,
+                job,
+                timeout_seconds=timeout,
+                max_attempts=max_attempts,
+                time_budget_seconds=time_budget,
+            )
+            value = job.value
+            status = ":white_check_mark:" if state == JOB_PAID else ":x:"
+            console.print(
+                f" {status} #{job.id} {value.podcast_title or ''} "
+                f"{value.receiver_name or value.receiver_address} "
+                f"{format_msats(value.amount_msats)} sats {state}"
+            )
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrent_payments)
+    futures = [executor.submit(send) for _ in range(max_concurrent_payments)]
+    try:
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            future.result()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Payments already being sent are completed and recorded, also when
+        # another sending thread failed.
+        stop.set()
+        executor.shutdown(wait=True)
+
+    count = queue.count()
+    console.print(", ".join(f"{n} {state}" for state, n in sorted(count.items())))
+    if count.get(JOB_QUEUED):
+        console_error.print(f":hourglass: {count[JOB_QUEUED]} payments still queued")
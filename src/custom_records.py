@@ -0,0 +1,95 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from src import json_codec
+
+KEYSEND_PREIMAGE = 5482373484
+PODCASTINDEX_RECORDS_V1 = 7629169
+
+
+def decode_json(value: bytes) -> Any:
+    return json_codec.loads(value)
+
+
+def decode_utf8(value: bytes) -> str:
+    return value.decode("utf8")
+
+
+def decode_hex(value: bytes) -> str:
+    return value.hex()
+
+
+def decode_integer(value: bytes) -> int:
+    return int.from_bytes(value, "big")
+
+
+# TLV type -> (name, decoder). Decoders raise ValueError for malformed values.
+DECODERS: Dict[int, Tuple[str, Callable[[bytes], Any]]] = {
+    KEYSEND_PREIMAGE: ("keysend_preimage", decode_hex),
+    PODCASTINDEX_RECORDS_V1: ("podcastindex_records_v1", decode_json),
+    7629173: ("podcastindex_records_v2", decode_json),  # WIP
+    7629175: ("podcastindex_id", decode_utf8),
+    34349334: ("whatsat_message", decode_utf8),
+    34349337: ("whatsat_signature", decode_hex),
+    34349339: ("whatsat_sender_pubkey", decode_hex),
+    34349343: ("whatsat_timestamp", decode_integer),
+    133773310: ("sphinx_records", decode_json),
+}
+
+TYPES: Dict[str, int] = {name: type_ for type_, (name, _) in DECODERS.items()}
+
+
+def register(type_: int, name: str, decoder: Callable[[bytes], Any]):
+    DECODERS[type_] = (name, decoder)
+    TYPES[name] = type_
+
+
+class CustomRecords(Mapping):
+    """
+    Read-only view of the `custom_records` map of an HTLC or hop, keyed by
+    record name. A record is only decoded the first time it is read and
+    records that fail to decode are treated as missing, by `in`, `get` and
+    iteration alike.
+    """
+
+    __slots__ = ("raw", "_decoded")
+
+    def __init__(self, raw: Mapping):
+        self.raw = raw
+        self._decoded: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, name: str) -> Any:
+        if self._decoded is not None and name in self._decoded:
+            value = self._decoded[name]
+        else:
+            type_ = TYPES.get(name)
+            if type_ is None or type_ not in self.raw:
+                raise KeyError(name)
+            try:
+                value = DECODERS[type_][1](self.raw[type_])
+            except ValueError:
+                value = None
+            if self._decoded is None:
+                self._decoded = {}
+            self._decoded[name] = value
+
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        """Whether the record is present and decodes."""
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        for type_ in self.raw:
+            decoder = DECODERS.get(type_)
+            if decoder is not None and decoder[0] in self:
+                yield decoder[0]
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
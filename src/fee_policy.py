@@ -0,0 +1,128 @@
+"""
+Fee limits of the payments sent by BoostCLI, estimated from the fees of the
+routes found to each recipient and recently paid to them.
+"""
+
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from src.providers.fee_history_provider import FeeHistoryProvider
+
+# Routing fees paid to each recipient that are remembered.
+HISTORY_SIZE = 10
+
+# Fee limit without a route or history, as a fraction of the amount.
+DEFAULT_FEE_RATIO = 0.05
+
+# Fee limit never lower than this, enough to reach most nodes, unless the
+# amount is lower still.
+DEFAULT_FEE_FLOOR_MSAT = 3000
+
+# Fee limit never higher than this, as a fraction of the amount.
+DEFAULT_FEE_CEILING_RATIO = 0.25
+
+# Fee limit headroom over the known fees, which change between attempts.
+FEE_HEADROOM = 2
+
+# Multiplier of the fee limit of each attempt of a payment, the last one
+# applies to any further attempts.
+FEE_ESCALATION = (1, 2, 4)
+
+
+def fee_policy_from(filepath: str, **kwargs) -> "FeePolicy":
+    """A FeePolicy remembering the fees it records in `filepath`."""
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return FeePolicy(provider=FeeHistoryProvider.from_path(filepath), **kwargs)
+
+
+class FeePolicy:
+    """
+    Picks the fee limit of a payment from the fee of its probed route or the
+    fees recently paid to its recipient, falling back to a fraction of the
+    amount, then clamps it between a floor and a ceiling for that amount.
+
+    Shared by every payment sent by a LightningService, and safe to use from
+    its worker threads. Without a `provider` the fees paid are only known
+    until the process exits, with one they are loaded by the next run.
+    """
+
+    __slots__ = (
+        "ratio",
+        "floor_msat",
+        "ceiling_ratio",
+        "provider",
+        "history",
+        "lock",
+    )
+
+    def __init__(
+        self,
+        ratio: float = DEFAULT_FEE_RATIO,
+        floor_msat: int = DEFAULT_FEE_FLOOR_MSAT,
+        ceiling_ratio: float = DEFAULT_FEE_CEILING_RATIO,
+        provider: Optional[FeeHistoryProvider] = None,
+    ):
+        self.ratio = ratio
+        self.floor_msat = floor_msat
+        self.ceiling_ratio = ceiling_ratio
+        # pub_key -> (amount_msats, fee_msat) of recent payments
+        self.history: Dict[str, Deque[Tuple[int, int]]] = defaultdict(
+            lambda: deque(maxlen=HISTORY_SIZE)
+        )
+        self.lock = threading.Lock()
+        self.provider = provider
+        if provider is not None:
+            for pub_key, amount_msats, fee_msat in provider.select():
+                self.history[pub_key].append((amount_msats, fee_msat))
+
+    def floor(self, amount_msats: int) -> int:
+        """
+        The fee limit allowed to send `amount_msats` whatever its estimate,
+        never more than the amount itself.
+        """
+        return min(self.floor_msat, amount_msats)
+
+    def ceiling(self, amount_msats: int) -> int:
+        """The most ever paid in fees to send `amount_msats`."""
+        return max(int(amount_msats * self.ceiling_ratio), self.floor(amount_msats))
+
+    def fee_limit(
+        self,
+        pub_key: str,
+        amount_msats: int,
+        attempt: int = 0,
+        route_fee_msat: Optional[int] = None,
+    ) -> int:
+        """The fee limit of the `attempt`-th payment of `amount_msats`."""
+        with self.lock:
+            history = list(self.history.get(pub_key, ()))
+        # Fees grow with the amount, scale up the ones paid for less.
+        known = [
+            fee_msat * max(amount_msats / paid_msats, 1)
+            for paid_msats, fee_msat in history
+            if paid_msats
+        ]
+        if route_fee_msat is not None:
+            known.append(route_fee_msat)
+
+        if known:
+            estimate = max(known) * FEE_HEADROOM
+        else:
+            estimate = amount_msats * self.ratio
+
+        estimate *= FEE_ESCALATION[min(attempt, len(FEE_ESCALATION) - 1)]
+        return max(
+            min(int(estimate), self.ceiling(amount_msats)), self.floor(amount_msats)
+        )
+
+    def record(self, pub_key: str, amount_msats: int, fee_msat: int):
+        """Remember the fee of a successful payment to `pub_key`."""
+        with self.lock:
+            self.history[pub_key].append((amount_msats, fee_msat))
+        if self.provider is not None:
+            self.provider.insert(pub_key, amount_msats, fee_msat, keep=HISTORY_SIZE)
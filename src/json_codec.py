@@ -0,0 +1,49 @@
+"""
+JSON encoding and decoding of Boostagrams, backed by orjson when it is
+installed (`pip install BoostCLI[fast]`) and the standard library otherwise.
+"""
+
+import json
+from typing import Any, Callable, Dict, NamedTuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class Backend(NamedTuple):
+    name: str
+    loads: Callable[[Union[bytes, str]], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def stdlib_dumps(value: Any) -> bytes:
+    # Matches the compact, UTF-8 output of orjson.
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+
+
+BACKENDS: Dict[str, Backend] = {
+    "json": Backend(name="json", loads=json.loads, dumps=stdlib_dumps),
+}
+
+if orjson is not None:
+    BACKENDS["orjson"] = Backend(name="orjson", loads=orjson.loads, dumps=orjson.dumps)
+
+backend: Backend = BACKENDS.get("orjson", BACKENDS["json"])
+
+
+def use(name: str):
+    """Select the backend used by `loads` and `dumps`."""
+    global backend
+    backend = BACKENDS[name]
+
+
+def loads(value: Union[bytes, str]) -> Any:
+    """Decode JSON, raising ValueError if `value` is not valid JSON."""
+    return backend.loads(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode `value` as compact UTF-8 JSON."""
+    return backend.dumps(value)
@@ -1,9 +1,23 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
 
+def slotted(cls):
+    """
+    Rebuild a dataclass with `__slots__` instead of a per-instance `__dict__`,
+    like `dataclass(slots=True)` on Python 3.10+.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {k: v for k, v in cls.__dict__.items() if k not in names}
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
 @dataclass
 class PodcastValueDestination:
     split: int
@@ -14,6 +28,7 @@ class PodcastValueDestination:
     custom_value: Optional[bytes] = None
 
 
+@slotted
 @dataclass
 class PodcastValue:
     destinations: List[PodcastValueDestination]
@@ -28,6 +43,7 @@ class PodcastValue:
     episode_guid: Optional[str] = None
 
 
+@slotted
 @dataclass
 class ValueForValue:
     amount_msats: int
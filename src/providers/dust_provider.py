@@ -0,0 +1,54 @@
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dust (
+    recipient TEXT PRIMARY KEY,
+    amount_msats INTEGER NOT NULL,
+    amount_msats_total INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class DustProvider:
+    # Shared by the threads paying streams, every access holds `lock`.
+    connection: sqlite3.Connection
+    lock: threading.Lock = field(default_factory=threading.Lock, compare=False)
+
+    @classmethod
+    def from_path(cls, path: str) -> "DustProvider":
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.executescript(SCHEMA)
+        return DustProvider(connection=connection)
+
+    def add(self, recipient: str, amount_msats: int, amount_msats_total: int):
+        with self.lock, self.connection:
+            held, held_total = self.select(recipient)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO dust "
+                "(recipient, amount_msats, amount_msats_total) VALUES (?, ?, ?)",
+                (recipient, held + amount_msats, held_total + amount_msats_total),
+            )
+
+    def take(self, recipient: str) -> Tuple[int, int]:
+        """Remove and return the amounts held for `recipient`."""
+        with self.lock, self.connection:
+            held = self.select(recipient)
+            self.connection.execute(
+                "DELETE FROM dust WHERE recipient = ?", (recipient,)
+            )
+        return held
+
+    def get(self, recipient: str) -> Tuple[int, int]:
+        with self.lock:
+            return self.select(recipient)
+
+    def select(self, recipient: str) -> Tuple[int, int]:
+        row = self.connection.execute(
+            "SELECT amount_msats, amount_msats_total FROM dust WHERE recipient = ?",
+            (recipient,),
+        ).fetchone()
+        return row if row is not None else (0, 0)
@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fee (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pub_key TEXT NOT NULL,
+    amount_msats INTEGER NOT NULL,
+    fee_msat INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fee_pub_key ON fee (pub_key, id);
+"""
+
+
+@dataclass(frozen=True)
+class FeeHistoryProvider:
+    # Shared by the threads sending payments, every access holds `lock`.
+    connection: sqlite3.Connection
+    lock: threading.Lock = field(default_factory=threading.Lock, compare=False)
+
+    @classmethod
+    def from_path(cls, path: str) -> "FeeHistoryProvider":
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.executescript(SCHEMA)
+        return FeeHistoryProvider(connection=connection)
+
+    def insert(self, pub_key: str, amount_msats: int, fee_msat: int, keep: int):
+        """Add a fee paid to `pub_key`, keeping only its `keep` latest ones."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO fee (pub_key, amount_msats, fee_msat) VALUES (?, ?, ?)",
+                (pub_key, amount_msats, fee_msat),
+            )
+            self.connection.execute(
+                "DELETE FROM fee WHERE pub_key = ? AND id NOT IN "
+                "(SELECT id FROM fee WHERE pub_key = ? ORDER BY id DESC LIMIT ?)",
+                (pub_key, pub_key, keep),
+            )
+
+    def select(self) -> List[Tuple[str, int, int]]:
+        """Every `(pub_key, amount_msats, fee_msat)`, oldest first."""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT pub_key, amount_msats, fee_msat FROM fee ORDER BY id"
+            ).fetchall()
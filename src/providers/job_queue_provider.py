@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.models import ValueForValue
+from src.providers.ledger_provider import VALUE_FIELDS, row_to_value, value_to_row
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS job (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    state TEXT NOT NULL,
+    preimage BLOB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    fee_msat INTEGER,
+    error TEXT,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL,
+    {columns}
+);
+CREATE INDEX IF NOT EXISTS job_state ON job (state, id);
+""".format(columns=",\n    ".join(VALUE_FIELDS))
+
+JOB_COLUMNS = "id, state, preimage, attempts, fee_msat, error, " + ", ".join(
+    VALUE_FIELDS
+)
+
+# id, state, preimage, attempts, fee_msat, error, value
+JobRow = Tuple[int, str, bytes, int, Optional[int], Optional[str], ValueForValue]
+
+
+def row_to_job(row: tuple) -> JobRow:
+    return row[:6] + (row_to_value(row[6:]),)
+
+
+@dataclass(frozen=True)
+class JobQueueProvider:
+    # Shared by the sending threads of `worker`, every access holds `lock`.
+    connection: sqlite3.Connection
+    lock: threading.Lock = field(default_factory=threading.Lock, compare=False)
+
+    @classmethod
+    def from_path(cls, path: str) -> "JobQueueProvider":
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.executescript(SCHEMA)
+        return JobQueueProvider(connection=connection)
+
+    def insert(
+        self, jobs: Sequence[Tuple[ValueForValue, bytes]], created_at: int
+    ) -> List[int]:
+        """Queue the values of `jobs` with their preimages in one transaction."""
+        ids = []
+        with self.lock, self.connection:
+            for value, preimage in jobs:
+                cursor = self.connection.execute(
+                    "INSERT INTO job (state, preimage, created_at, updated_at, {}) "
+                    "VALUES ('queued', ?, ?, ?, {})".format(
+                        ", ".join(VALUE_FIELDS), ", ".join("?" for _ in VALUE_FIELDS)
+                    ),
+                    (preimage, created_at, created_at) + value_to_row(value),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, updated_at: int) -> Optional[JobRow]:
+        """Move the oldest queued job to `sending` and return it."""
+        with self.lock:
+            while True:
+                row = self.connection.execute(
+                    f"SELECT {JOB_COLUMNS} FROM job WHERE state = 'queued' "
+                    "ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return
+                with self.connection:
+                    # Another worker on the same file may have claimed it.
+                    claimed = self.connection.execute(
+                        "UPDATE job SET state = 'sending', updated_at = ? "
+                        "WHERE id = ? AND state = 'queued'",
+                        (updated_at, row[0]),
+                    ).rowcount
+                if claimed:
+                    return row_to_job(row[:1] + ("sending",) + row[2:])
+
+    def update(
+        self,
+        id_: int,
+        state: str,
+        attempts: int,
+        fee_msat: Optional[int],
+        error: Optional[str],
+        updated_at: int,
+    ):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE job SET state = ?, attempts = ?, fee_msat = ?, error = ?, "
+                "updated_at = ? WHERE id = ?",
+                (state, attempts, fee_msat, error, updated_at, id_),
+            )
+
+    def select(self, state: str) -> List[JobRow]:
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {JOB_COLUMNS} FROM job WHERE state = ? ORDER BY id", (state,)
+            ).fetchall()
+        return [row_to_job(row) for row in rows]
+
+    def count(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT state, COUNT(*) FROM job GROUP BY state"
+            ).fetchall()
+        return dict(rows)
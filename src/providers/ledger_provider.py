@@ -0,0 +1,101 @@
+import sqlite3
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Generator, Optional
+from uuid import UUID
+
+from src.models import ValueForValue
+
+VALUE_FIELDS = [f.name for f in fields(ValueForValue)]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS value_for_value (
+    direction TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    {columns},
+    PRIMARY KEY (direction, idx)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+""".format(columns=",\n    ".join(VALUE_FIELDS))
+
+
+def value_to_row(value: ValueForValue) -> tuple:
+    row = []
+    for name in VALUE_FIELDS:
+        item = getattr(value, name)
+        if isinstance(item, datetime):
+            item = int(item.timestamp())
+        elif isinstance(item, UUID):
+            item = str(item)
+        row.append(item)
+    return tuple(row)
+
+
+def row_to_value(row: tuple) -> ValueForValue:
+    value = dict(zip(VALUE_FIELDS, row))
+    value["boost"] = bool(value["boost"])
+    if value["creation_date"] is not None:
+        value["creation_date"] = datetime.fromtimestamp(value["creation_date"])
+    if value["uuid"] is not None:
+        value["uuid"] = UUID(value["uuid"])
+    return ValueForValue(**value)
+
+
+@dataclass(frozen=True)
+class LedgerProvider:
+    connection: sqlite3.Connection
+
+    @classmethod
+    def from_path(cls, path: str) -> "LedgerProvider":
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        return LedgerProvider(connection=connection)
+
+    def get_state(self, name: str, default: int = 0) -> int:
+        row = self.connection.execute(
+            "SELECT value FROM sync_state WHERE name = ?", (name,)
+        ).fetchone()
+        return default if row is None else row[0]
+
+    def set_state(self, name: str, value: int):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)",
+            (name, value),
+        )
+
+    def insert(self, direction: str, index: int, value: ValueForValue):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO value_for_value (direction, idx, {}) "
+            "VALUES (?, ?, {})".format(
+                ", ".join(VALUE_FIELDS), ", ".join("?" for _ in VALUE_FIELDS)
+            ),
+            (direction, index) + value_to_row(value),
+        )
+
+    def select(
+        self,
+        direction: str,
+        index_offset: int = 0,
+        limit: Optional[int] = None,
+        accending: bool = True,
+    ) -> Generator:
+        query = "SELECT {} FROM value_for_value WHERE direction = ?".format(
+            ", ".join(VALUE_FIELDS)
+        )
+        params = [direction]
+
+        if index_offset:
+            query += " AND idx > ?" if accending else " AND idx < ?"
+            params.append(index_offset)
+
+        query += " ORDER BY idx" if accending else " ORDER BY idx DESC"
+
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        for row in self.connection.execute(query, params):
+            yield row_to_value(row)
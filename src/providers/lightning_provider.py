@@ -1,8 +1,12 @@
+import asyncio
 from dataclasses import dataclass
+from typing import Optional
 
+import aiogrpc
 import grpc
 
 from src.lnd import lightning_pb2_grpc as lnrpc
+from src.lnd import router_pb2_grpc as routerrpc
 
 
 def channel_from(host: str, port: str, cert: bytes, macaroon: bytes) -> grpc.Channel:
@@ -19,18 +23,43 @@ def channel_from(host: str, port: str, cert: bytes, macaroon: bytes) -> grpc.Cha
         options=[
             ("grpc.max_receive_message_length", 1024 * 1024 * 50),
             ("grpc.max_connection_idle_ms", 30000),
+            # Give every channel its own connection rather than sharing one
+            # with other channels to the same server.
+            ("grpc.use_local_subchannel_pool", 1),
         ],
     )
 
     return channel
 
 
+def async_channel_from(
+    host: str, port: str, cert: bytes, macaroon: bytes
+) -> aiogrpc.Channel:
+    """
+    A channel whose stub calls return awaitables and async iterators, bound
+    to the running event loop so it must be opened from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    return aiogrpc.Channel(
+        channel_from(host=host, port=port, cert=cert, macaroon=macaroon), loop=loop
+    )
+
+
 @dataclass(frozen=True)
 class LightningProvider:
     lightning_stub: lnrpc.LightningStub
+    router_stub: Optional[routerrpc.RouterStub] = None
+    channel: Optional[grpc.Channel] = None
 
     @classmethod
     def from_channel(cls, channel: grpc.Channel) -> "LightningProvider":
         return LightningProvider(
             lightning_stub=lnrpc.LightningStub(channel),
+            router_stub=routerrpc.RouterStub(channel),
+            channel=channel,
         )
+
+    def close(self):
+        if self.channel is not None:
+            # The future of an aiogrpc channel closing.
+            return self.channel.close()
@@ -0,0 +1,41 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS route (
+    pub_key TEXT PRIMARY KEY,
+    hop_pubkeys TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class RouteCacheProvider:
+    connection: sqlite3.Connection
+
+    @classmethod
+    def from_path(cls, path: str) -> "RouteCacheProvider":
+        connection = sqlite3.connect(path)
+        connection.executescript(SCHEMA)
+        return RouteCacheProvider(connection=connection)
+
+    def get(self, pub_key: str) -> Optional[Tuple[List[str], int]]:
+        row = self.connection.execute(
+            "SELECT hop_pubkeys, updated_at FROM route WHERE pub_key = ?", (pub_key,)
+        ).fetchone()
+        if row is not None:
+            return row[0].split(","), row[1]
+
+    def put(self, pub_key: str, hop_pubkeys: List[str], updated_at: int):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO route (pub_key, hop_pubkeys, updated_at) "
+                "VALUES (?, ?, ?)",
+                (pub_key, ",".join(hop_pubkeys), updated_at),
+            )
+
+    def delete(self, pub_key: str):
+        with self.connection:
+            self.connection.execute("DELETE FROM route WHERE pub_key = ?", (pub_key,))
@@ -0,0 +1,297 @@
+import asyncio
+import itertools
+import os
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable, Optional
+
+from src.fee_policy import FeePolicy
+from src.lnd import lightning_pb2 as ln
+from src.models import BoostInvoice, ValueForValue
+from src.providers.lightning_provider import LightningProvider, async_channel_from
+from src.value_view import InternTable
+
+from .lightning_service import (
+    DEFAULT_MAX_CONCURRENT_PAYMENTS,
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_PAYMENT_TIMEOUT,
+    PAYMENT_FINAL_STATUSES,
+    PaymentResult,
+    error_result,
+    invoice_record,
+    next_index_offset,
+    payment_record,
+    read_macaroon,
+    read_tlscert,
+    record_to_value,
+    send_payment_request,
+)
+
+
+async def async_client_from(
+    host: str,
+    port: str,
+    cert_filepath: str,
+    macaroon_filepath: str,
+    fee_policy: Optional[FeePolicy] = None,
+) -> "AsyncLightningService":
+    """See client_from, the service runs its calls on the running event loop."""
+    # See client_from
+    os.environ["GRPC_SSL_CIPHER_SUITES"] = "HIGH+ECDSA"
+
+    return AsyncLightningService(
+        provider=LightningProvider.from_channel(
+            async_channel_from(
+                host=host,
+                port=port,
+                cert=read_tlscert(filename=cert_filepath),
+                macaroon=read_macaroon(filename=macaroon_filepath),
+            )
+        ),
+        fee_policy=fee_policy or FeePolicy(),
+    )
+
+
+@dataclass(frozen=True)
+class AsyncLightningService:
+    """
+    LightningService for asyncio, its provider must be built on an aiogrpc
+    channel (see async_client_from) so that watching Boosts, reading the
+    history and sending payments can share one event loop.
+    """
+
+    provider: LightningProvider
+    intern_table: InternTable = field(default_factory=InternTable, compare=False)
+    # Shared with a LightningService of the same process, if any.
+    fee_policy: FeePolicy = field(default_factory=FeePolicy, compare=False)
+
+    async def close(self):
+        if self.provider.channel is not None:
+            await self.provider.close()
+
+    async def get_info(self):
+        return await self.provider.lightning_stub.GetInfo(ln.GetInfoRequest())
+
+    async def invoices(
+        self,
+        index_offset=0,
+        max_number_of_invoices=None,
+        accending=True,
+        pending_only=False,
+        page_size=DEFAULT_PAGE_SIZE,
+    ) -> AsyncGenerator:
+        """See LightningService.invoices"""
+
+        async def list_invoices(index_offset, num_max, reversed_):
+            return await self.provider.lightning_stub.ListInvoices(
+                ln.ListInvoiceRequest(
+                    index_offset=index_offset,
+                    num_max_invoices=num_max,
+                    reversed=reversed_,
+                    pending_only=pending_only,
+                )
+            )
+
+        async for invoice in paginate(
+            list_invoices,
+            "invoices",
+            index_offset=index_offset,
+            accending=accending,
+            page_size=page_size,
+            limit=max_number_of_invoices,
+        ):
+            yield invoice
+
+    async def payments(
+        self,
+        index_offset=0,
+        max_payments=None,
+        accending=True,
+        include_incomplete=False,
+        page_size=DEFAULT_PAGE_SIZE,
+    ) -> AsyncGenerator:
+        """See LightningService.payments"""
+
+        async def list_payments(index_offset, num_max, reversed_):
+            return await self.provider.lightning_stub.ListPayments(
+                ln.ListPaymentsRequest(
+                    index_offset=index_offset,
+                    max_payments=num_max,
+                    reversed=reversed_,
+                    include_incomplete=include_incomplete,
+                )
+            )
+
+        async for payment in paginate(
+            list_payments,
+            "payments",
+            index_offset=index_offset,
+            accending=accending,
+            page_size=page_size,
+            limit=max_payments,
+        ):
+            yield payment
+
+    async def watch_value_received(self, settle_index=0) -> AsyncGenerator:
+        """
+        Yield the Boosts of invoices as they settle, after replaying the ones
+        settled after `settle_index`.
+        """
+        async for invoice in self.provider.lightning_stub.SubscribeInvoices(
+            ln.InvoiceSubscription(settle_index=settle_index)
+        ):
+            try:
+                value = self.invoice_to_value(invoice)
+            except Exception:
+                continue
+            if value is not None:
+                yield value
+
+    async def value_received(
+        self,
+        index_offset=0,
+        max_number_of_invoices=None,
+        accending=True,
+    ) -> AsyncGenerator:
+        async for invoice in self.invoices(
+            index_offset=index_offset,
+            max_number_of_invoices=max_number_of_invoices,
+            accending=accending,
+            pending_only=False,
+        ):
+            value = self.invoice_to_value(invoice)
+            if value is not None:
+                yield value
+
+    async def value_sent(
+        self,
+        index_offset=0,
+        max_payments=None,
+        accending=True,
+    ) -> AsyncGenerator:
+        async for payment in self.payments(
+            index_offset=index_offset,
+            max_payments=max_payments,
+            accending=accending,
+        ):
+            value = self.payment_to_value(payment)
+            if value is not None:
+                yield value
+
+    def invoice_to_value(self, invoice) -> Optional[ValueForValue]:
+        record = invoice_record(invoice)
+        if record is not None:
+            return record_to_value(invoice, record, self.intern_table)
+
+    def payment_to_value(self, payment) -> Optional[ValueForValue]:
+        record = payment_record(payment)
+        if record is not None:
+            return record_to_value(payment, record, self.intern_table)
+
+    async def send_value(
+        self,
+        value: ValueForValue,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        fee_limit: Optional[int] = None,
+    ) -> AsyncGenerator:
+        """See LightningService.send_value"""
+        if fee_limit is None:
+            fee_limit = self.fee_policy.fee_limit(
+                value.receiver_address, value.amount_msats
+            )
+        async for payment in self.provider.router_stub.SendPaymentV2(
+            send_payment_request(
+                value,
+                fee_limit=fee_limit,
+                timeout_seconds=timeout_seconds,
+                max_parts=max_parts,
+            )
+        ):
+            yield payment
+
+    async def pay_value(
+        self,
+        value: ValueForValue,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+    ) -> Optional[ln.Payment]:
+        """Send `value` to its receiver and return the final payment status."""
+        payment = None
+        async for payment in self.send_value(
+            value, timeout_seconds=timeout_seconds, max_parts=max_parts
+        ):
+            if payment.status in PAYMENT_FINAL_STATUSES:
+                break
+        if payment is not None and payment.status == ln.Payment.SUCCEEDED:
+            self.fee_policy.record(
+                value.receiver_address, value.amount_msats, payment.fee_msat
+            )
+        return payment
+
+    async def pay_boost_invoice(
+        self,
+        invoice: BoostInvoice,
+        max_concurrent_payments=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+    ) -> AsyncGenerator[PaymentResult, None]:
+        """
+        Pay every split of `invoice`, at most `max_concurrent_payments` at a
+        time, yielding a PaymentResult for each in the order they complete.
+        A split whose payment raises is yielded as failed.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent_payments)
+
+        async def pay(value):
+            async with semaphore:
+                try:
+                    payment = await self.pay_value(
+                        value, timeout_seconds=timeout_seconds, max_parts=max_parts
+                    )
+                except Exception:
+                    return error_result(value)
+                return PaymentResult(value=value, payment=payment, attempts=1)
+
+        tasks = [
+            asyncio.ensure_future(pay(value))
+            for value in itertools.chain(invoice.payments, invoice.fees)
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def paginate(
+    request: Callable,
+    field: str,
+    index_offset: int = 0,
+    accending: bool = True,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+) -> AsyncGenerator:
+    """Like lightning_service.paginate with `request` being a coroutine."""
+    remaining = limit or None
+
+    while remaining is None or remaining > 0:
+        num_max = page_size if remaining is None else min(page_size, remaining)
+
+        response = await request(index_offset, num_max, not accending)
+        if not response:
+            return
+
+        page = getattr(response, field)
+        if not page:
+            return
+
+        for item in page if accending else reversed(page):
+            yield item
+
+        if remaining is not None:
+            remaining -= len(page)
+
+        index_offset = next_index_offset(response, page, num_max, accending)
+        if index_offset is None:
+            return
@@ -0,0 +1,93 @@
+import copy
+import dataclasses
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+from src.models import BoostInvoice, ValueForValue
+from src.providers.dust_provider import DustProvider
+
+# Shares of a streaming payment below this many msats are held back.
+DEFAULT_DUST_THRESHOLD = 10_000
+
+
+def dust_from(
+    filepath: str, threshold_msats: int = DEFAULT_DUST_THRESHOLD
+) -> "DustService":
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return DustService(
+        provider=DustProvider.from_path(filepath), threshold_msats=threshold_msats
+    )
+
+
+def recipient_key(value: ValueForValue) -> str:
+    """Identifies a recipient, including a wallet behind a shared node."""
+    custom_value = value.custom_value.hex() if value.custom_value else ""
+    return f"{value.receiver_address}:{value.custom_key or ''}:{custom_value}"
+
+
+@dataclass(frozen=True)
+class DustService:
+    """
+    Holds back the shares of streaming payments too small to be worth an
+    HTLC, and adds them to the next share to the same recipient once they
+    reach `threshold_msats` together. The amounts held survive restarts.
+    """
+
+    provider: DustProvider
+    threshold_msats: int = DEFAULT_DUST_THRESHOLD
+
+    def aggregate(
+        self, invoice: BoostInvoice
+    ) -> Tuple[BoostInvoice, Dict[str, Tuple[int, int]]]:
+        """
+        The payments of `invoice` worth sending, with what was held for their
+        recipients added, and the amounts taken from the buffer to do so by
+        recipient_key. The other shares are held.
+        """
+        taken = {}
+
+        def aggregate_values(values):
+            aggregated = []
+            for value in values:
+                key = recipient_key(value)
+                value_total = value.amount_msats_total or value.amount_msats
+                # Taken rather than read so concurrent streams never send the
+                # same amounts twice.
+                held, held_total = self.provider.take(key)
+                if held + value.amount_msats < self.threshold_msats:
+                    self.provider.add(
+                        key, held + value.amount_msats, held_total + value_total
+                    )
+                    continue
+                if held:
+                    taken[key] = (held, held_total)
+                aggregated.append(
+                    dataclasses.replace(
+                        value,
+                        amount_msats=held + value.amount_msats,
+                        amount_msats_total=held_total + value_total,
+                    )
+                )
+            return aggregated
+
+        aggregated = copy.copy(invoice)
+        aggregated.payments = aggregate_values(invoice.payments)
+        aggregated.fees = aggregate_values(invoice.fees)
+        return aggregated, taken
+
+    def restore(
+        self, failed: Iterable[ValueForValue], taken: Dict[str, Tuple[int, int]]
+    ):
+        """Hold again what was taken for the `failed` payments."""
+        for value in failed:
+            key = recipient_key(value)
+            if key in taken:
+                self.provider.add(key, *taken.pop(key))
+
+    def held_msats(self, values: Iterable[ValueForValue]) -> int:
+        """The msats held for the recipients of `values`."""
+        return sum(self.provider.get(recipient_key(value))[0] for value in values)
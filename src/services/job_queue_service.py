@@ -0,0 +1,116 @@
+import hashlib
+import itertools
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from src.lnd import lightning_pb2 as ln
+from src.models import BoostInvoice, ValueForValue
+from src.providers.job_queue_provider import JobQueueProvider
+from src.services.lightning_service import PaymentResult, payment_error
+
+JOB_QUEUED = "queued"
+JOB_SENDING = "sending"
+JOB_PAID = "paid"
+JOB_FAILED = "failed"
+
+
+def job_queue_from(filepath: str) -> "JobQueueService":
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return JobQueueService(provider=JobQueueProvider.from_path(filepath))
+
+
+class Job(NamedTuple):
+    id: int
+    state: str
+    # Keysend preimage of every attempt to pay the job.
+    preimage: bytes
+    attempts: int
+    fee_msat: Optional[int]
+    error: Optional[str]
+    value: ValueForValue
+
+    @property
+    def payment_hash(self) -> bytes:
+        return hashlib.sha256(self.preimage).digest()
+
+
+@dataclass(frozen=True)
+class JobQueueService:
+    """
+    Payments planned by `boost-batch --enqueue` and sent by `worker`.
+
+    Each job keeps the keysend preimage it is sent with. LND never pays the
+    same payment hash twice, so a job interrupted by a crash is sent again
+    with the same preimage, or found to be paid already, without paying its
+    receiver a second time.
+    """
+
+    provider: JobQueueProvider
+    clock: Callable[[], float] = time.time
+
+    def enqueue(self, invoices: Iterable[BoostInvoice]) -> List[int]:
+        """Queue a job for every split of `invoices`, returning their ids."""
+        return self.provider.insert(
+            [
+                (value, secrets.token_bytes(32))
+                for invoice in invoices
+                for value in itertools.chain(invoice.payments, invoice.fees)
+            ],
+            created_at=int(self.clock()),
+        )
+
+    def claim(self) -> Optional[Job]:
+        """The oldest queued job, now marked as being sent."""
+        row = self.provider.claim(updated_at=int(self.clock()))
+        if row is not None:
+            return Job(*row)
+
+    def interrupted(self) -> List[Job]:
+        """Jobs that were being sent when a worker stopped."""
+        return [Job(*row) for row in self.provider.select(JOB_SENDING)]
+
+    def finish(self, job: Job, result: PaymentResult) -> str:
+        """
+        Record how sending `job` ended, returning its new state. A job the
+        time budget ran out for before it was sent is queued again.
+        """
+        attempts = job.attempts + result.attempts
+        payment = result.payment
+        if payment is None:
+            state, fee_msat, error = JOB_QUEUED, None, None
+        elif payment.status == ln.Payment.SUCCEEDED:
+            state, fee_msat, error = JOB_PAID, payment.fee_msat, None
+        else:
+            state, fee_msat, error = JOB_FAILED, None, payment_error(payment)
+        self.provider.update(
+            job.id, state, attempts, fee_msat, error, updated_at=int(self.clock())
+        )
+        return state
+
+    def fail(self, job: Job, error: str, attempts: int = 1) -> str:
+        """Record that `job` could not be sent at all, because of `error`."""
+        self.provider.update(
+            job.id,
+            JOB_FAILED,
+            job.attempts + attempts,
+            None,
+            error,
+            updated_at=int(self.clock()),
+        )
+        return JOB_FAILED
+
+    def requeue(self, job: Job):
+        """Queue `job` to be sent again, with the same preimage."""
+        self.provider.update(
+            job.id, JOB_QUEUED, job.attempts, None, None, updated_at=int(self.clock())
+        )
+
+    def count(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        return self.provider.count()
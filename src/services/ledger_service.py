@@ -0,0 +1,161 @@
+import os
+from dataclasses import dataclass
+from typing import Generator, Optional
+
+from src.lnd import lightning_pb2 as ln
+from src.providers.ledger_provider import LedgerProvider
+
+from .lightning_service import LightningService
+
+RECEIVED = "received"
+SENT = "sent"
+
+PENDING_INVOICE_STATES = (ln.Invoice.OPEN, ln.Invoice.ACCEPTED)
+
+PENDING_PAYMENT_STATUSES = (ln.Payment.INITIATED, ln.Payment.IN_FLIGHT)
+
+
+def ledger_from(filepath: str, lightning_service: LightningService) -> "LedgerService":
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return LedgerService(
+        provider=LedgerProvider.from_path(filepath),
+        lightning_service=lightning_service,
+    )
+
+
+@dataclass(frozen=True)
+class LedgerService:
+    """
+    Keeps a local copy of the decoded Boosts so they can be listed without
+    walking the whole invoice and payment history on the LND server.
+    """
+
+    provider: LedgerProvider
+    lightning_service: LightningService
+
+    def sync_received(self) -> int:
+        """
+        Store the Boosts of the invoices added since the last sync. Invoices
+        that were still open are revisited until they settle or are canceled.
+        """
+        add_index = self.provider.get_state("add_index")
+        settle_index = self.provider.get_state("settle_index")
+        pending_add_index = self.provider.get_state("pending_add_index")
+
+        index_offset = add_index
+        if pending_add_index:
+            index_offset = min(index_offset, pending_add_index - 1)
+
+        count = 0
+        pending_add_index = 0
+
+        with self.provider.connection:
+            for invoice in self.lightning_service.invoices(
+                index_offset=index_offset, accending=True
+            ):
+                add_index = max(add_index, invoice.add_index)
+                settle_index = max(settle_index, invoice.settle_index)
+
+                if invoice.state in PENDING_INVOICE_STATES:
+                    if not pending_add_index:
+                        pending_add_index = invoice.add_index
+                    continue
+
+                try:
+                    value = self.lightning_service.invoice_to_value(invoice)
+                except Exception:
+                    # A malformed Boost must not hold back every later one.
+                    value = None
+                if value is None:
+                    continue
+
+                self.provider.insert(RECEIVED, invoice.add_index, value)
+                count += 1
+
+            self.provider.set_state("add_index", add_index)
+            self.provider.set_state("settle_index", settle_index)
+            self.provider.set_state("pending_add_index", pending_add_index)
+
+        return count
+
+    def sync_sent(self) -> int:
+        """
+        Store the Boosts of the payments completed since the last sync.
+        Payments that were still in flight are revisited until they succeed
+        or fail.
+        """
+        payment_index = self.provider.get_state("payment_index")
+        pending_payment_index = self.provider.get_state("pending_payment_index")
+
+        index_offset = payment_index
+        if pending_payment_index:
+            index_offset = min(index_offset, pending_payment_index - 1)
+
+        count = 0
+        pending_payment_index = 0
+
+        with self.provider.connection:
+            for payment in self.lightning_service.payments(
+                index_offset=index_offset, accending=True, include_incomplete=True
+            ):
+                payment_index = max(payment_index, payment.payment_index)
+
+                if payment.status in PENDING_PAYMENT_STATUSES:
+                    if not pending_payment_index:
+                        pending_payment_index = payment.payment_index
+                    continue
+
+                if payment.status != ln.Payment.SUCCEEDED:
+                    continue
+
+                try:
+                    value = self.lightning_service.payment_to_value(payment)
+                except Exception:
+                    value = None
+                if value is None:
+                    continue
+
+                self.provider.insert(SENT, payment.payment_index, value)
+                count += 1
+
+            self.provider.set_state("payment_index", payment_index)
+            self.provider.set_state("pending_payment_index", pending_payment_index)
+
+        return count
+
+    def watched_settle_index(self) -> int:
+        """The settle index of the last Boost shown by `incoming-boosts`."""
+        return self.provider.get_state("watched_settle_index")
+
+    def set_watched_settle_index(self, settle_index: int):
+        with self.provider.connection:
+            self.provider.set_state("watched_settle_index", settle_index)
+
+    def value_received(
+        self,
+        index_offset=0,
+        max_number_of_invoices: Optional[int] = None,
+        accending=True,
+    ) -> Generator:
+        return self.provider.select(
+            RECEIVED,
+            index_offset=index_offset,
+            limit=max_number_of_invoices,
+            accending=accending,
+        )
+
+    def value_sent(
+        self,
+        index_offset=0,
+        max_payments: Optional[int] = None,
+        accending=True,
+    ) -> Generator:
+        return self.provider.select(
+            SENT,
+            index_offset=index_offset,
+            limit=max_payments,
+            accending=accending,
+        )
@@ -1,17 +1,98 @@
 import codecs
 import hashlib
 import itertools
-import json
+import queue
 import secrets
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Generator, Optional
+from functools import partial
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 import os
 
+import grpc
+
+from src import json_codec
+from src.channel_scheduler import ChannelScheduler
+from src.fee_policy import FeePolicy
+from src.custom_records import (
+    KEYSEND_PREIMAGE,
+    PODCASTINDEX_RECORDS_V1,
+    CustomRecords,
+)
 from src.models import BoostInvoice, ValueForValue
+from src.value_view import (
+    INTERNED_FIELDS,
+    RECORD_V1_KEYS,
+    InternTable,
+    ValueForValueView,
+    record_to_amount_msats_total,
+    record_to_timestamp,
+)
 from src.providers.lightning_provider import LightningProvider, channel_from
+from src.services.route_cache_service import RouteCacheService
 from src.lnd import lightning_pb2 as ln
+from src.lnd import router_pb2 as router
+
+# Number of invoices/payments requested from LND per round trip when walking
+# the history, small enough to keep each response well below the gRPC limit.
+DEFAULT_PAGE_SIZE = 1000
+
+# Number of splits of a Boost that are sent at the same time.
+DEFAULT_MAX_CONCURRENT_PAYMENTS = 4
+
+# Seconds LND keeps trying to route a payment before giving up on it.
+DEFAULT_PAYMENT_TIMEOUT = 60
+
+PAYMENT_FINAL_STATUSES = (ln.Payment.SUCCEEDED, ln.Payment.FAILED)
+
+# Number of times a split of a Boost is sent before giving up on it.
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds waited before the second attempt of a split, doubled after each.
+DEFAULT_RETRY_BACKOFF = 1
+
+# Seconds all the attempts of all the splits of a Boost may take together.
+DEFAULT_TIME_BUDGET = 180
+
+# Failures that may not happen again on another attempt, any other failure
+# such as the receiver rejecting the payment is final.
+RETRYABLE_FAILURE_REASONS = (
+    ln.FAILURE_REASON_NONE,
+    ln.FAILURE_REASON_TIMEOUT,
+    ln.FAILURE_REASON_NO_ROUTE,
+    ln.FAILURE_REASON_ERROR,
+)
+
+# Number of pages each partition fetches ahead of the page being decoded.
+DEFAULT_PREFETCH = 2
+
+# Seconds waited before subscribing to invoices again after the
+# subscription dropped, doubled after each failure up to the maximum.
+DEFAULT_RESUBSCRIBE_BACKOFF = 1
+MAX_RESUBSCRIBE_BACKOFF = 60
+
+# Errors of a dropped connection or of LND restarting, any other error
+# such as an invalid macaroon ends the subscription.
+RESUBSCRIBE_STATUS_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.UNKNOWN,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.CANCELLED,
+)
 
 
 def read_macaroon(filename):
@@ -25,7 +106,11 @@ def read_tlscert(filename):
 
 
 def client_from(
-    host: str, port: str, cert_filepath: str, macaroon_filepath: str
+    host: str,
+    port: str,
+    cert_filepath: str,
+    macaroon_filepath: str,
+    fee_policy: Optional[FeePolicy] = None,
 ) -> "LightningService":
     # from: https://github.com/lightningnetwork/lnd/blob/master/docs/grpc/python.md
     # Due to updated ECDSA generated tls.cert we need to let gprc know that
@@ -33,15 +118,16 @@ def client_from(
     # error when we communicate with the lnd rpc server.
     os.environ["GRPC_SSL_CIPHER_SUITES"] = "HIGH+ECDSA"
 
-    return LightningService(
-        provider=LightningProvider.from_channel(
-            channel_from(
-                host=host,
-                port=port,
-                cert=read_tlscert(filename=cert_filepath),
-                macaroon=read_macaroon(filename=macaroon_filepath),
-            )
+    cert = read_tlscert(filename=cert_filepath)
+    macaroon = read_macaroon(filename=macaroon_filepath)
+
+    def connect() -> LightningProvider:
+        return LightningProvider.from_channel(
+            channel_from(host=host, port=port, cert=cert, macaroon=macaroon)
         )
+
+    return LightningService(
+        provider=connect(), connect=connect, fee_policy=fee_policy or FeePolicy()
     )
 
 
@@ -49,6 +135,14 @@ def client_from(
 class LightningService:
 
     provider: LightningProvider
+    # Opens additional channels to the same server, used by partitioned
+    # history scans; without it partitions share `provider`.
+    connect: Optional[Callable[[], LightningProvider]] = None
+    # Shared by every decoded Boost so repeated podcast and app metadata is
+    # stored once.
+    intern_table: InternTable = field(default_factory=InternTable, compare=False)
+    # Sets the fee limit of every payment sent, learning from their fees.
+    fee_policy: FeePolicy = field(default_factory=FeePolicy, compare=False)
 
     @classmethod
     def from_client(cls, provider: LightningProvider) -> "LightningService":
@@ -57,85 +151,297 @@ class LightningService:
     def get_info(self):
         return self.provider.lightning_stub.GetInfo(ln.GetInfoRequest())
 
+    def channel_scheduler(self) -> ChannelScheduler:
+        """Schedule payments over the active channels listed by ListChannels."""
+        response = self.provider.lightning_stub.ListChannels(
+            ln.ListChannelsRequest(active_only=True)
+        )
+        return ChannelScheduler.from_channels(response.channels)
+
+    def liquidity_needed(self, invoice: BoostInvoice) -> List[int]:
+        """The msats each split of `invoice` needs with its fee limit."""
+        return [
+            value.amount_msats
+            + self.fee_policy.fee_limit(value.receiver_address, value.amount_msats)
+            for value in itertools.chain(invoice.payments, invoice.fees)
+        ]
+
     def invoices(
         self,
         index_offset=0,
         max_number_of_invoices=None,
         accending=True,
         pending_only=False,
+        page_size=DEFAULT_PAGE_SIZE,
+        provider: Optional[LightningProvider] = None,
     ) -> Generator:
+        """
+        Yield invoices one page at a time starting after (accending) or
+        before (decending) `index_offset`; an `index_offset` of 0 starts from
+        the oldest or newest invoice respectively.
+        """
+        provider = provider or self.provider
 
-        response = self.provider.lightning_stub.ListInvoices(
-            ln.ListInvoiceRequest(
-                index_offset=index_offset,
-                num_max_invoices=max_number_of_invoices,
-                reversed=accending,
-                pending_only=pending_only,
+        def list_invoices(index_offset, num_max, reversed_):
+            return provider.lightning_stub.ListInvoices(
+                ln.ListInvoiceRequest(
+                    index_offset=index_offset,
+                    num_max_invoices=num_max,
+                    reversed=reversed_,
+                    pending_only=pending_only,
+                )
             )
-        )
-
-        if not response:
-            return
-
-        invoices = response.invoices
 
-        if not accending:
-            invoices = reversed(invoices)
-
-        yield from invoices
+        yield from paginate(
+            list_invoices,
+            "invoices",
+            index_offset=index_offset,
+            accending=accending,
+            page_size=page_size,
+            limit=max_number_of_invoices,
+        )
 
     def payments(
         self,
         index_offset=0,
         max_payments=None,
         accending=True,
+        include_incomplete=False,
+        page_size=DEFAULT_PAGE_SIZE,
+        provider: Optional[LightningProvider] = None,
     ) -> Generator:
+        """
+        Yield payments one page at a time starting after (accending) or
+        before (decending) `index_offset`. Failed and in-flight payments are
+        filtered out by LND unless `include_incomplete` is set.
+        """
+        provider = provider or self.provider
 
-        response = self.provider.lightning_stub.ListPayments(
-            ln.ListPaymentsRequest(
-                index_offset=index_offset,
-                max_payments=max_payments,
-                reversed=accending,
+        def list_payments(index_offset, num_max, reversed_):
+            return provider.lightning_stub.ListPayments(
+                ln.ListPaymentsRequest(
+                    index_offset=index_offset,
+                    max_payments=num_max,
+                    reversed=reversed_,
+                    include_incomplete=include_incomplete,
+                )
             )
+
+        yield from paginate(
+            list_payments,
+            "payments",
+            index_offset=index_offset,
+            accending=accending,
+            page_size=page_size,
+            limit=max_payments,
         )
 
-        if not response:
-            return
+    def settled_invoices(
+        self,
+        settle_index=0,
+        retry_backoff=DEFAULT_RESUBSCRIBE_BACKOFF,
+        max_retry_backoff=MAX_RESUBSCRIBE_BACKOFF,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Generator:
+        """
+        Yield invoices as they settle with SubscribeInvoices, first replaying
+        the ones settled after `settle_index` unless it is 0.
 
-        payments = response.payments
+        When the subscription drops, because of the connection or LND
+        restarting, it is renewed from the last settle index yielded with an
+        exponential backoff, so no settlement is missed or yielded twice.
+        """
+        failures = 0
+        while True:
+            try:
+                for invoice in self.provider.lightning_stub.SubscribeInvoices(
+                    ln.InvoiceSubscription(settle_index=settle_index)
+                ):
+                    failures = 0
+                    # Invoices being added, or replayed by LND a second time.
+                    if invoice.settle_index <= settle_index:
+                        continue
+                    settle_index = invoice.settle_index
+                    yield invoice
+            except grpc.RpcError as error:
+                if error.code() not in RESUBSCRIBE_STATUS_CODES:
+                    raise
+            sleep(min(retry_backoff * 2**failures, max_retry_backoff))
+            failures += 1
 
-        if accending:
-            payments = reversed(payments)
+    def last_settle_index(self) -> int:
+        """
+        The highest settle index of the newest invoices, at most the one of
+        the last invoice settled.
+        """
+        response = self.provider.lightning_stub.ListInvoices(
+            ln.ListInvoiceRequest(num_max_invoices=DEFAULT_PAGE_SIZE, reversed=True)
+        )
+        return max((invoice.settle_index for invoice in response.invoices), default=0)
 
-        yield from payments
+    def watch_value_received(
+        self,
+        settle_index=0,
+        history=False,
+        checkpoint: Optional[Callable[[int], None]] = None,
+        retry_backoff=DEFAULT_RESUBSCRIBE_BACKOFF,
+        max_retry_backoff=MAX_RESUBSCRIBE_BACKOFF,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Generator:
+        """
+        Yield the Boosts of invoices as they settle, after replaying the
+        ones settled after `settle_index`, see `settled_invoices`.
 
-    def watch_value_received(self):
-        for invoice in self.provider.lightning_stub.SubscribeInvoices(
-            ln.InvoiceSubscription()
-        ):
-            try:
+        With `history` every Boost received is yielded first instead, then
+        the ones settled since the history was read. Without either, it
+        starts from `last_settle_index` so that the Boosts settled while the
+        subscription is renewed are not lost. `checkpoint` is called with the
+        settle index of each invoice once its Boost is consumed.
+        """
+        # Settle indices of the history that the subscription replays again.
+        replayed = set()
+        if history:
+            settle_index = self.last_settle_index()
+            for invoice in self.invoices(accending=True):
+                if invoice.settle_index > settle_index:
+                    replayed.add(invoice.settle_index)
                 value = self.invoice_to_value(invoice)
-            except:
-                continue
-            if value is not None:
-                yield value
+                if value is not None:
+                    yield value
+        elif not settle_index:
+            settle_index = self.last_settle_index()
+
+        for invoice in self.settled_invoices(
+            settle_index,
+            retry_backoff=retry_backoff,
+            max_retry_backoff=max_retry_backoff,
+            sleep=sleep,
+        ):
+            if invoice.settle_index in replayed:
+                replayed.discard(invoice.settle_index)
+            else:
+                try:
+                    value = self.invoice_to_value(invoice)
+                except Exception:
+                    value = None
+                if value is not None:
+                    yield value
+            if checkpoint is not None:
+                checkpoint(invoice.settle_index)
+
+    def last_invoice_index(self) -> int:
+        response = self.provider.lightning_stub.ListInvoices(
+            ln.ListInvoiceRequest(num_max_invoices=1, reversed=True)
+        )
+        return response.last_index_offset if response else 0
+
+    def last_payment_index(self) -> int:
+        response = self.provider.lightning_stub.ListPayments(
+            ln.ListPaymentsRequest(max_payments=1, reversed=True)
+        )
+        return response.last_index_offset if response else 0
+
+    def partitioned(
+        self,
+        list_: Callable,
+        index_field: str,
+        last_index: int,
+        index_offset=0,
+        accending=True,
+        partitions=1,
+        page_size=DEFAULT_PAGE_SIZE,
+    ) -> Generator:
+        """
+        Split the index range after (accending) or before (decending)
+        `index_offset` into `partitions` contiguous ranges that are fetched
+        concurrently, each over its own channel when `connect` is set, and
+        yield the items back in index order.
+
+        `list_` is `invoices` or `payments` bound to everything but the
+        `provider`, `index_offset`, `accending` and limit of a partition.
+        """
+        if accending:
+            ranges = partition_range(index_offset, last_index, partitions)
+        else:
+            upper = index_offset - 1 if index_offset else last_index
+            ranges = list(reversed(partition_range(0, upper, partitions)))
+
+        providers = [self.provider]
+        try:
+            for _ in ranges[1:]:
+                providers.append(
+                    self.connect() if self.connect is not None else self.provider
+                )
+
+            def fetch(provider, lower, upper):
+                if accending:
+                    items = list_(
+                        provider=provider,
+                        index_offset=lower,
+                        accending=True,
+                        limit=upper - lower,
+                    )
+                    return itertools.takewhile(
+                        lambda item: getattr(item, index_field) <= upper, items
+                    )
+                items = list_(
+                    provider=provider,
+                    index_offset=upper + 1,
+                    accending=False,
+                    limit=upper - lower,
+                )
+                return itertools.takewhile(
+                    lambda item: getattr(item, index_field) > lower, items
+                )
+
+            yield from merge_partitions(
+                [
+                    partial(fetch, provider, lower, upper)
+                    for provider, (lower, upper) in zip(providers, ranges)
+                ],
+                chunk_size=page_size,
+            )
+        finally:
+            for provider in providers[1:]:
+                if provider is not self.provider:
+                    provider.close()
 
     def value_received(
         self,
         index_offset=0,
         max_number_of_invoices=None,
         accending=True,
+        partitions=1,
+        lazy=False,
     ) -> Generator:
+        """
+        Yield the Boosts of settled invoices, as ValueForValueView instead of
+        ValueForValue when `lazy` is set.
+        """
+        to_value = self.invoice_to_view if lazy else self.invoice_to_value
 
-        invoices = self.invoices(
-            index_offset=index_offset,
-            max_number_of_invoices=max_number_of_invoices,
-            accending=accending,
-            pending_only=False,
-        )
+        if partitions > 1:
+            invoices = self.partitioned(
+                lambda limit, **kwargs: self.invoices(
+                    max_number_of_invoices=limit, pending_only=False, **kwargs
+                ),
+                "add_index",
+                self.last_invoice_index(),
+                index_offset=index_offset,
+                accending=accending,
+                partitions=partitions,
+            )
+            invoices = itertools.islice(invoices, max_number_of_invoices or None)
+        else:
+            invoices = self.invoices(
+                index_offset=index_offset,
+                max_number_of_invoices=max_number_of_invoices,
+                accending=accending,
+                pending_only=False,
+            )
 
         for invoice in invoices:
-            value = self.invoice_to_value(invoice)
+            value = to_value(invoice)
             if value is not None:
                 yield value
 
@@ -144,198 +450,770 @@ class LightningService:
         index_offset=0,
         max_payments=None,
         accending=True,
+        partitions=1,
+        lazy=False,
     ) -> Generator:
+        """
+        Yield the Boosts of completed payments, as ValueForValueView instead of
+        ValueForValue when `lazy` is set.
+        """
+        to_value = self.payment_to_view if lazy else self.payment_to_value
 
-        payments = self.payments(
-            index_offset=index_offset,
-            max_payments=max_payments,
-            accending=accending,
-        )
+        if partitions > 1:
+            payments = self.partitioned(
+                lambda limit, **kwargs: self.payments(max_payments=limit, **kwargs),
+                "payment_index",
+                self.last_payment_index(),
+                index_offset=index_offset,
+                accending=accending,
+                partitions=partitions,
+            )
+            payments = itertools.islice(payments, max_payments or None)
+        else:
+            payments = self.payments(
+                index_offset=index_offset,
+                max_payments=max_payments,
+                accending=accending,
+            )
 
         for payment in payments:
-            value = self.payment_to_value(payment)
+            value = to_value(payment)
             if value is not None:
                 yield value
 
     def record_to_timestamp(self, record):
-        timestamp = None
-        try:
-            if "ts" in record:
-                timestamp = int(record["ts"])
-            elif "time" in record:
-                struct_time = time.strptime(record["time"], "%H:%M:%S")
-                timestamp = (
-                    struct_time.tm_hour * 60 * 60
-                    + struct_time.tm_min * 60
-                    + struct_time.tm_sec
-                )
-        except TypeError:
-            pass
-        return timestamp
+        return record_to_timestamp(record)
 
-    def podcastindex_record_v1_to_value(
-        self,
-        record,
-        creation_date: datetime,
-        amount_msats: int,
-    ):
-        timestamp = self.record_to_timestamp(record)
-
-        amount_msats_total = None
-        if "value_msat_total" in record:
-            amount_msats_total = int(record["value_msat_total"])
-
-        return ValueForValue(
-            creation_date=creation_date,
-            amount_msats=amount_msats,
-            amount_msats_total=amount_msats_total,
-            boost=record.get("action") == "boost",
-            sender_name=record.get("sender_name"),
-            sender_id=record.get("sender_id"),
-            sender_key=record.get("sender_key"),
-            sender_app_name=record.get("app_name"),
-            sender_app_version=record.get("app_version"),
-            receiver_name=record.get("name"),
-            message=record.get("message"),
-            podcast_title=record.get("podcast"),
-            podcast_url=record.get("url"),
-            podcast_guid=record.get("guid"),
-            episode_title=record.get("episode"),
-            episode_guid=record.get("episode_guid"),
-            podcast_index_feed_id=record.get("feedID"),
-            podcast_index_item_id=record.get("itemID"),
-            timestamp=timestamp,
-        )
+    def payment_to_view(self, payment) -> Optional[ValueForValueView]:
+        return payment_to_view(payment, self.intern_table)
 
     def payment_to_value(self, payment) -> Optional[ValueForValue]:
-        custom_records = parse_custom_records(
-            payment.htlcs[0].route.hops[-1].custom_records
-        )
+        record = payment_record(payment)
+        if record is not None:
+            return record_to_value(payment, record, self.intern_table)
 
-        if "podcastindex_records_v2" in custom_records:
-            record = custom_records["posdcastindex_records_v2"]
+    def invoice_to_view(self, invoice) -> Optional[ValueForValueView]:
+        return invoice_to_view(invoice, self.intern_table)
 
-        elif "podcastindex_records_v1" in custom_records:
-            record = custom_records["podcastindex_records_v1"]
+    def invoice_to_value(self, invoice) -> Optional[ValueForValue]:
+        record = invoice_record(invoice)
+        if record is not None:
+            return record_to_value(invoice, record, self.intern_table)
 
-            return self.podcastindex_record_v1_to_value(
-                record,
-                creation_date=datetime.fromtimestamp(int(payment.creation_date)),
-                amount_msats=int(payment.value_msat),
+    def send_value(
+        self,
+        value: ValueForValue,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        fee_limit: Optional[int] = None,
+        outgoing_chan_id: Optional[int] = None,
+        preimage: Optional[bytes] = None,
+    ) -> Generator:
+        """
+        Send `value` to its receiver with Router.SendPaymentV2, yielding the
+        status updates of the payment until it succeeds or fails. The fee
+        limit defaults to the one of `fee_policy`.
+        """
+        if fee_limit is None:
+            fee_limit = self.fee_policy.fee_limit(
+                value.receiver_address, value.amount_msats
             )
+        yield from self.provider.router_stub.SendPaymentV2(
+            send_payment_request(
+                value,
+                timeout_seconds=timeout_seconds,
+                max_parts=max_parts,
+                fee_limit=fee_limit,
+                outgoing_chan_id=outgoing_chan_id,
+                preimage=preimage,
+            )
+        )
 
-    def invoice_to_value(self, invoice) -> Optional[ValueForValue]:
-        if not invoice.settled:
-            return
+    def pay_value(
+        self,
+        value: ValueForValue,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        route: Optional[ln.Route] = None,
+        fee_limit: Optional[int] = None,
+        outgoing_chan_id: Optional[int] = None,
+        preimage: Optional[bytes] = None,
+    ) -> Optional[ln.Payment]:
+        """
+        Send `value` to its receiver and return the final payment status.
+
+        A keysend payment is first tried along `route` when one is given,
+        and only falls back to pathfinding if that route no longer works.
+        Pathfinding is limited to `outgoing_chan_id` when set. Every attempt
+        uses `preimage` when given, so the receiver is paid at most once.
+        """
+        if route is not None and max_parts <= 1:
+            # The fallback reuses the preimage of the route, LND never pays
+            # the same payment hash twice.
+            preimage = preimage or secrets.token_bytes(32)
+            try:
+                payment = self.send_to_route(value, route, preimage=preimage)
+            except grpc.RpcError:
+                # The HTLC may have gone out before the call failed.
+                payment = self.track_payment(hashlib.sha256(preimage).digest())
+            if payment is not None and payment.status == ln.Payment.SUCCEEDED:
+                return payment
 
-        tlv = invoice.htlcs[0]
-        custom_records = parse_custom_records(tlv.custom_records)
+        payment = None
+        for payment in self.send_value(
+            value,
+            timeout_seconds=timeout_seconds,
+            max_parts=max_parts,
+            fee_limit=fee_limit,
+            outgoing_chan_id=outgoing_chan_id,
+            preimage=preimage,
+        ):
+            if payment.status in PAYMENT_FINAL_STATUSES:
+                break
+        return payment
 
-        if "podcastindex_records_v2" in custom_records:
-            record = custom_records["posdcastindex_records_v2"]
+    def pay_value_with_retries(
+        self,
+        value: ValueForValue,
+        deadline: float,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        route: Optional[ln.Route] = None,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+        channels: Optional[ChannelScheduler] = None,
+        preimage: Optional[bytes] = None,
+    ) -> "PaymentResult":
+        """
+        Pay `value` like `pay_value`, sending it again after a retryable
+        failure with an exponential backoff and an escalated fee limit, until
+        `max_attempts` or the `time.monotonic()` `deadline` is reached.
 
-        elif "podcastindex_records_v1" in custom_records:
-            record = custom_records["podcastindex_records_v1"]
+        Each keysend attempt goes out through the channel `channels` assigns
+        it, a channel that failed is not assigned to it again.
 
-            return self.podcastindex_record_v1_to_value(
-                record,
-                creation_date=datetime.fromtimestamp(int(invoice.creation_date)),
-                amount_msats=int(invoice.value_msat),
+        All the keysend attempts share `preimage`, or a random one, and a
+        payment still in flight when its updates stop is tracked until it
+        completes instead of being sent again.
+        """
+        payment_hash = None
+        if max_parts <= 1:
+            preimage = preimage or secrets.token_bytes(32)
+            payment_hash = hashlib.sha256(preimage).digest()
+
+        route_fee_msat = route.total_fees_msat if route is not None else None
+        failed_channels = set()
+        payment = None
+        attempts = 0
+        while attempts < max_attempts:
+            remaining = int(deadline - time.monotonic())
+            if remaining < 1:
+                break
+
+            fee_limit = self.fee_policy.fee_limit(
+                value.receiver_address,
+                value.amount_msats,
+                attempt=attempts,
+                route_fee_msat=route_fee_msat,
             )
+            # The probed route is only worth trying the first time.
+            route_ = route if attempts == 0 else None
 
-    def pay_boost_invoice(self, invoice: BoostInvoice):
-        def value_to_record(value: ValueForValue):
-            value = {
-                "action": "boost" if value.boost else None,
-                "app_name": value.sender_app_name,
-                "sender_name": value.sender_name,
-                "sender_id": value.sender_id,
-                "sender_key": value.sender_key,
-                "app_version": value.sender_app_version,
-                "name": value.receiver_name,
-                "message": value.message,
-                "podcast": value.podcast_title,
-                "guid": value.podcast_guid,
-                "url": value.podcast_url,
-                "episode": value.episode_title,
-                "episode_guid": value.episode_guid,
-                "feedID": value.podcast_index_feed_id,
-                "itemID": value.podcast_index_item_id,
-                "ts": value.timestamp,
-                "value_msat_total": value.amount_msats_total,
-                "pubkey": value.pubkey,
-            }
-            value = json.dumps({k: v for k, v in value.items() if v is not None})
-            value = value.encode("utf8")
-            return value
-
-        for destination in itertools.chain(invoice.payments, invoice.fees):
-            secret = secrets.token_bytes(32)
-            hashed_secret = hashlib.sha256(secret).hexdigest()
-            custom_records = [
-                (5482373484, secret),
-                (7629169, value_to_record(destination)),
-            ]
-            if destination.custom_key and destination.custom_value:
-                custom_records.append(
-                    (destination.custom_key, destination.custom_value)
+            chan_id = None
+            reserved = value.amount_msats + fee_limit
+            if channels is not None and max_parts <= 1:
+                if route_ is not None and route_.hops:
+                    chan_id = route_.hops[0].chan_id
+                    channels.reserve(chan_id, reserved)
+                else:
+                    chan_id = channels.assign(reserved, exclude=failed_channels)
+
+            succeeded = False
+            try:
+                payment = self.pay_value(
+                    value,
+                    timeout_seconds=min(timeout_seconds, remaining),
+                    max_parts=max_parts,
+                    route=route_,
+                    fee_limit=fee_limit,
+                    # Falling back from the route keeps to its reserved channel.
+                    outgoing_chan_id=chan_id,
+                    preimage=preimage,
                 )
+                attempts += 1
 
-            dest = codecs.decode(destination.receiver_address, "hex")
+                if payment is None or payment.status not in PAYMENT_FINAL_STATUSES:
+                    tracked_hash = payment_hash
+                    if tracked_hash is None and payment is not None:
+                        tracked_hash = bytes.fromhex(payment.payment_hash)
+                    if tracked_hash:
+                        # None if LND never sent it, safe to send again.
+                        payment = self.track_payment(tracked_hash) or payment
 
-            fee_limit = ln.FeeLimit(fixed_msat=int(destination.amount_msats * 0.10))
-            response = self.provider.lightning_stub.SendPaymentSync(
-                ln.SendRequest(
-                    payment_request=None,
-                    fee_limit=fee_limit,
-                    dest=dest,
-                    amt_msat=destination.amount_msats,
-                    dest_custom_records=custom_records,
-                    payment_hash=bytes.fromhex(hashed_secret),
-                    allow_self_payment=True,
+                succeeded = (
+                    payment is not None and payment.status == ln.Payment.SUCCEEDED
                 )
-            )
-            if not response:
+            finally:
+                if chan_id is not None:
+                    if succeeded:
+                        channels.release(chan_id, fee_limit - payment.fee_msat)
+                    else:
+                        channels.release(chan_id, reserved)
+                        failed_channels.add(chan_id)
+
+            if succeeded:
+                self.fee_policy.record(
+                    value.receiver_address, value.amount_msats, payment.fee_msat
+                )
+
+            if not is_retryable(payment):
+                break
+
+            delay = retry_backoff * 2 ** (attempts - 1)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+
+        return PaymentResult(value=value, payment=payment, attempts=attempts)
+
+    def query_route(self, value: ValueForValue) -> Optional[ln.Route]:
+        """
+        Ask LND for a route paying `value` to its receiver without sending
+        anything, None if there is no route within the fee limit.
+        """
+        custom_records = value_custom_records(value)
+        # Reserve room for the preimage added when the payment is sent.
+        custom_records[KEYSEND_PREIMAGE] = bytes(32)
+        request = ln.QueryRoutesRequest(
+            pub_key=value.receiver_address,
+            amt_msat=value.amount_msats,
+            fee_limit=ln.FeeLimit(
+                fixed_msat=self.fee_policy.ceiling(value.amount_msats)
+            ),
+            dest_custom_records=custom_records,
+            use_mission_control=True,
+        )
+        try:
+            response = self.provider.lightning_stub.QueryRoutes(request)
+        except grpc.RpcError:
+            return None
+        if response.routes:
+            return response.routes[0]
+
+    def build_route(
+        self, value: ValueForValue, hop_pubkeys: Sequence[str]
+    ) -> Optional[ln.Route]:
+        """
+        Rebuild a route paying `value` through `hop_pubkeys` with
+        Router.BuildRoute, None if it no longer exists or costs more than the
+        fee limit.
+        """
+        request = router.BuildRouteRequest(
+            amt_msat=value.amount_msats,
+            hop_pubkeys=[codecs.decode(pub_key, "hex") for pub_key in hop_pubkeys],
+        )
+        try:
+            route = self.provider.router_stub.BuildRoute(request).route
+        except grpc.RpcError:
+            return None
+        if route.total_fees_msat <= self.fee_policy.ceiling(value.amount_msats):
+            return route
+
+    def probe_boost_invoice(
+        self,
+        invoice: BoostInvoice,
+        max_concurrent_payments=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+        route_cache: Optional[RouteCacheService] = None,
+    ) -> Dict[Tuple[str, int], "Future[Optional[ln.Route]]"]:
+        """
+        Start looking for a route to every split of `invoice` in the
+        background, returning the future route of each keyed by `route_key`.
+
+        Recipients with a route in `route_cache` have it rebuilt for the new
+        amount, and only fall back to QueryRoutes if that fails.
+        """
+
+        def probe(value, hop_pubkeys):
+            route = None
+            if hop_pubkeys:
+                route = self.build_route(value, hop_pubkeys)
+            if route is None:
+                route = self.query_route(value)
+            return route
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrent_payments)
+        routes = {}
+        for value in itertools.chain(invoice.payments, invoice.fees):
+            key = route_key(value)
+            if key in routes:
                 continue
-            yield response
+            hop_pubkeys = None
+            if route_cache is not None:
+                hop_pubkeys = route_cache.get(value.receiver_address)
+            routes[key] = executor.submit(probe, value, hop_pubkeys)
+        # The probes already submitted still run, the threads exit after.
+        executor.shutdown(wait=False)
+        return routes
 
+    def send_to_route(
+        self, value: ValueForValue, route: ln.Route, preimage: Optional[bytes] = None
+    ) -> ln.Payment:
+        """
+        Send `value` as a keysend payment along `route` with
+        Router.SendToRouteV2, which skips LND's pathfinding.
+        """
+        secret = preimage or secrets.token_bytes(32)
+        payment_hash = hashlib.sha256(secret).digest()
 
-def try_to_json_decode(value: str) -> Any:
-    try:
-        return json.loads(value)
-    except json.decoder.JSONDecodeError:
-        return None
+        route_ = ln.Route()
+        route_.CopyFrom(route)
+        final_hop = route_.hops[-1]
+        final_hop.custom_records.clear()
+        final_hop.custom_records.update(value_custom_records(value))
+        final_hop.custom_records[KEYSEND_PREIMAGE] = secret
+
+        attempt = self.provider.router_stub.SendToRouteV2(
+            router.SendToRouteRequest(payment_hash=payment_hash, route=route_)
+        )
 
+        succeeded = attempt.status == ln.HTLCAttempt.SUCCEEDED
+        return ln.Payment(
+            payment_hash=payment_hash.hex(),
+            payment_preimage=secret.hex() if succeeded else "",
+            value_msat=value.amount_msats,
+            fee_msat=route_.total_fees_msat,
+            status=ln.Payment.SUCCEEDED if succeeded else ln.Payment.FAILED,
+            htlcs=[attempt],
+        )
 
-def parse_custom_records(custom_records):
-    parsed = {}
+    def track_payment(self, payment_hash: bytes) -> Optional[ln.Payment]:
+        """
+        The final status of the payment of `payment_hash` sent earlier,
+        waiting for it if still in flight, None if LND never sent it.
+        """
+        payment = None
+        try:
+            for payment in self.provider.router_stub.TrackPaymentV2(
+                router.TrackPaymentRequest(payment_hash=payment_hash)
+            ):
+                if payment.status in PAYMENT_FINAL_STATUSES:
+                    break
+        except grpc.RpcError as error:
+            if error.code() == grpc.StatusCode.NOT_FOUND:
+                return None
+            raise
+        return payment
 
-    for key, value in custom_records.items():
-        if key in (7629169, 133773310):
-            try:
-                parsed[key] = json.loads(value.decode("utf8"))
-            except json.decoder.JSONDecodeError:
-                pass
-
-    whatsat_records = dict(
-        message=parsed.get(34349334),
-        signature=parsed.get(34349337),
-        sender_pubkey=parsed.get(34349339),
-        timestamp=parsed.get(34349343),
+    def pay_boost_invoice(
+        self,
+        invoice: BoostInvoice,
+        max_concurrent_payments=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        routes: Optional[Mapping[Tuple[str, int], Future]] = None,
+        route_cache: Optional[RouteCacheService] = None,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+        time_budget_seconds=DEFAULT_TIME_BUDGET,
+        channels: Optional[ChannelScheduler] = None,
+    ) -> Generator["PaymentResult", None, None]:
+        """
+        Pay every split of `invoice`, at most `max_concurrent_payments` at a
+        time, yielding a PaymentResult for each in the order they complete.
+
+        Failed splits are retried concurrently, see `pay_value_with_retries`,
+        all within `time_budget_seconds`. With `channels`, from
+        `channel_scheduler`, the splits are spread over the outgoing channels.
+
+        `routes` are the future routes from `probe_boost_invoice`, tried
+        before falling back to pathfinding. The route of each successful
+        payment is saved to `route_cache`, a failure forgets it.
+        """
+        for _, result in self.pay_boost_invoices(
+            [invoice],
+            max_concurrent_payments=max_concurrent_payments,
+            timeout_seconds=timeout_seconds,
+            max_parts=max_parts,
+            routes=routes,
+            route_cache=route_cache,
+            max_attempts=max_attempts,
+            retry_backoff=retry_backoff,
+            time_budget_seconds=time_budget_seconds,
+            channels=channels,
+        ):
+            yield result
+
+    def pay_boost_invoices(
+        self,
+        invoices: Sequence[BoostInvoice],
+        max_concurrent_payments=DEFAULT_MAX_CONCURRENT_PAYMENTS,
+        timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+        max_parts=1,
+        routes: Optional[Mapping[Tuple[str, int], Future]] = None,
+        route_cache: Optional[RouteCacheService] = None,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        retry_backoff=DEFAULT_RETRY_BACKOFF,
+        time_budget_seconds=DEFAULT_TIME_BUDGET,
+        channels: Optional[ChannelScheduler] = None,
+    ) -> Generator[Tuple[int, "PaymentResult"], None, None]:
+        """
+        Like `pay_boost_invoice` for the splits of all of `invoices` in one
+        pool, yielding the index of the invoice with each PaymentResult. A
+        split that raised has a failed payment, the others are still paid.
+        """
+        deadline = time.monotonic() + time_budget_seconds
+
+        def pay_value(value):
+            route = None
+            if routes and route_key(value) in routes:
+                route = routes[route_key(value)].result()
+            return self.pay_value_with_retries(
+                value,
+                deadline=deadline,
+                timeout_seconds=timeout_seconds,
+                max_parts=max_parts,
+                route=route,
+                max_attempts=max_attempts,
+                retry_backoff=retry_backoff,
+                channels=channels,
+            )
+
+        with ThreadPoolExecutor(max_workers=max_concurrent_payments) as executor:
+            futures = {
+                executor.submit(pay_value, value): (index, value)
+                for index, invoice in enumerate(invoices)
+                for value in itertools.chain(invoice.payments, invoice.fees)
+            }
+            for future in as_completed(futures):
+                index, value = futures[future]
+                if future.exception() is not None:
+                    yield index, error_result(value)
+                    continue
+                result = future.result()
+                if route_cache is not None and result.payment is not None:
+                    route = payment_route(result.payment)
+                    if route is not None:
+                        route_cache.put(result.value.receiver_address, route)
+                    else:
+                        route_cache.invalidate(result.value.receiver_address)
+                yield index, result
+
+
+class PaymentResult(NamedTuple):
+    """
+    The final payment of a split of a Boost after `attempts` sends, None if
+    the time budget ran out before it was sent.
+    """
+
+    value: ValueForValue
+    payment: Optional[ln.Payment]
+    attempts: int
+
+
+def error_result(value: ValueForValue) -> PaymentResult:
+    """The result of a split of a Boost whose payment raised an error."""
+    return PaymentResult(
+        value=value,
+        payment=ln.Payment(
+            value_msat=value.amount_msats,
+            status=ln.Payment.FAILED,
+            failure_reason=ln.FAILURE_REASON_ERROR,
+        ),
+        attempts=1,
+    )
+
+
+def value_to_record(value: ValueForValue) -> bytes:
+    """Encode `value` as a podcastindex_records_v1 record."""
+    record = {
+        "action": "boost" if value.boost else "stream",
+        "app_name": value.sender_app_name,
+        "sender_name": value.sender_name,
+        "sender_id": value.sender_id,
+        "sender_key": value.sender_key,
+        "app_version": value.sender_app_version,
+        "name": value.receiver_name,
+        "message": value.message,
+        "podcast": value.podcast_title,
+        "guid": value.podcast_guid,
+        "url": value.podcast_url,
+        "episode": value.episode_title,
+        "episode_guid": value.episode_guid,
+        "feedID": value.podcast_index_feed_id,
+        "itemID": value.podcast_index_item_id,
+        "ts": value.timestamp,
+        "value_msat_total": value.amount_msats_total,
+        "pubkey": value.pubkey,
+    }
+    return json_codec.dumps({k: v for k, v in record.items() if v is not None})
+
+
+def payment_record(payment) -> Optional[dict]:
+    """The podcastindex_records_v1 record of a Boost sent by `payment`."""
+    htlc = next(
+        (htlc for htlc in payment.htlcs if htlc.status == ln.HTLCAttempt.SUCCEEDED),
+        None,
+    )
+    if htlc is None or not htlc.route.hops:
+        return
+
+    # Skip the JSON decoding of payments that are not Boosts.
+    if PODCASTINDEX_RECORDS_V1 not in htlc.route.hops[-1].custom_records:
+        return
+
+    custom_records = CustomRecords(htlc.route.hops[-1].custom_records)
+
+    record = custom_records.get("podcastindex_records_v1")
+    if isinstance(record, dict):
+        return record
+
+
+def invoice_record(invoice) -> Optional[dict]:
+    """The podcastindex_records_v1 record of a Boost received by `invoice`."""
+    if not invoice.settled:
+        return
+
+    # Boosts arrive as spontaneous payments, reject regular invoices and
+    # ones without a boostagram record before any JSON decoding.
+    if not (invoice.is_keysend or invoice.is_amp) or not invoice.htlcs:
+        return
+
+    tlv = invoice.htlcs[0]
+    if PODCASTINDEX_RECORDS_V1 not in tlv.custom_records:
+        return
+
+    custom_records = CustomRecords(tlv.custom_records)
+
+    record = custom_records.get("podcastindex_records_v1")
+    if isinstance(record, dict):
+        return record
+
+
+def record_to_value(
+    raw, record: dict, intern_table: Optional[InternTable] = None
+) -> ValueForValue:
+    """
+    Decode every field of the Boost of the invoice or payment `raw` at once,
+    the eager counterpart of ValueForValueView.
+    """
+    value = {name: record.get(key) for name, key in RECORD_V1_KEYS.items()}
+    if intern_table is not None:
+        for name in INTERNED_FIELDS:
+            value[name] = intern_table.intern(value[name])
+
+    return ValueForValue(
+        creation_date=datetime.fromtimestamp(int(raw.creation_date)),
+        amount_msats=int(raw.value_msat),
+        amount_msats_total=record_to_amount_msats_total(record),
+        boost=record.get("action") == "boost",
+        timestamp=record_to_timestamp(record),
+        **value,
     )
-    whatsat_records = dict(
-        filter(lambda item: item[1] is not None, whatsat_records.items())
+
+
+def payment_to_view(
+    payment, intern_table: Optional[InternTable] = None
+) -> Optional[ValueForValueView]:
+    record = payment_record(payment)
+    if record is not None:
+        return ValueForValueView(payment, record, intern_table)
+
+
+def invoice_to_view(
+    invoice, intern_table: Optional[InternTable] = None
+) -> Optional[ValueForValueView]:
+    record = invoice_record(invoice)
+    if record is not None:
+        return ValueForValueView(invoice, record, intern_table)
+
+
+def value_custom_records(value: ValueForValue) -> Dict[int, bytes]:
+    """The custom records sent to the receiver of `value`."""
+    custom_records = {PODCASTINDEX_RECORDS_V1: value_to_record(value)}
+    if value.custom_key and value.custom_value:
+        custom_records[value.custom_key] = value.custom_value
+    return custom_records
+
+
+def route_key(value: ValueForValue) -> Tuple[str, int]:
+    """Splits paying the same amount to the same receiver share a route."""
+    return value.receiver_address, value.amount_msats
+
+
+def send_payment_request(
+    value: ValueForValue,
+    fee_limit: int,
+    timeout_seconds=DEFAULT_PAYMENT_TIMEOUT,
+    max_parts=1,
+    outgoing_chan_id: Optional[int] = None,
+    preimage: Optional[bytes] = None,
+) -> router.SendPaymentRequest:
+    """
+    Build the SendPaymentRequest paying `value` to its receiver as a keysend
+    payment, with `preimage` or a random one, paying at most `fee_limit`
+    msats in fees. Keysend can not be split, so
+    with `max_parts` above 1 it is sent as an AMP payment instead which the
+    receiver has to accept.
+    """
+    custom_records = value_custom_records(value)
+
+    payment_hash = None
+    if max_parts <= 1:
+        secret = preimage or secrets.token_bytes(32)
+        payment_hash = hashlib.sha256(secret).digest()
+        custom_records[KEYSEND_PREIMAGE] = secret
+
+    return router.SendPaymentRequest(
+        dest=codecs.decode(value.receiver_address, "hex"),
+        amt_msat=value.amount_msats,
+        payment_hash=payment_hash,
+        dest_custom_records=custom_records,
+        fee_limit_msat=fee_limit,
+        outgoing_chan_ids=[outgoing_chan_id] if outgoing_chan_id else [],
+        timeout_seconds=timeout_seconds,
+        max_parts=max(max_parts, 1),
+        amp=max_parts > 1,
+        allow_self_payment=True,
     )
-    if not whatsat_records:
-        whatsat_records = None
-
-    records = dict(
-        keysend_preimage=parsed.get(5482373484),
-        podcastindex_records_v1=parsed.get(7629169),
-        podcastindex_records_v2=parsed.get(7629173),  # WIP
-        podcastindex_id=parsed.get(7629175),
-        whatsat_records=whatsat_records,
-        sphinx_records=parsed.get(133773310),
+
+
+def payment_error(payment: ln.Payment) -> str:
+    """Describes why `payment` did not succeed, empty if it did."""
+    if payment.status == ln.Payment.SUCCEEDED:
+        return ""
+    if payment.failure_reason != ln.FAILURE_REASON_NONE:
+        return ln.PaymentFailureReason.Name(payment.failure_reason)
+    return ln.Payment.PaymentStatus.Name(payment.status)
+
+
+def is_retryable(payment: Optional[ln.Payment]) -> bool:
+    """
+    Whether sending the value of `payment` again could succeed, None for a
+    payment that was never sent. A payment still in flight may yet succeed
+    and must not be sent again.
+    """
+    if payment is None:
+        return True
+    return (
+        payment.status == ln.Payment.FAILED
+        and payment.failure_reason in RETRYABLE_FAILURE_REASONS
     )
 
-    return dict(filter(lambda item: item[1] is not None, records.items()))
+
+def payment_route(payment: ln.Payment) -> Optional[ln.Route]:
+    """The route of the first successful HTLC of `payment`."""
+    for htlc in payment.htlcs:
+        if htlc.status == ln.HTLCAttempt.SUCCEEDED:
+            return htlc.route
+
+
+def paginate(
+    request: Callable,
+    field: str,
+    index_offset: int = 0,
+    accending: bool = True,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    limit: Optional[int] = None,
+) -> Generator:
+    """
+    Walk a ListInvoices/ListPayments style RPC using the
+    `first_index_offset`/`last_index_offset` of each response as the cursor
+    for the next request, so only a single page is held in memory.
+
+    `request` is called as `request(index_offset, num_max, reversed_)` and
+    must return a response with the items in `field`.
+    """
+    remaining = limit or None
+
+    while remaining is None or remaining > 0:
+        num_max = page_size if remaining is None else min(page_size, remaining)
+
+        response = request(index_offset, num_max, not accending)
+        if not response:
+            return
+
+        page = getattr(response, field)
+        if not page:
+            return
+
+        yield from (page if accending else reversed(page))
+
+        if remaining is not None:
+            remaining -= len(page)
+
+        index_offset = next_index_offset(response, page, num_max, accending)
+        if index_offset is None:
+            return
+
+
+def next_index_offset(response, page, num_max: int, accending: bool) -> Optional[int]:
+    """The index_offset of the page after `response`, None if it was the last."""
+    if len(page) < num_max:
+        return
+    if accending:
+        return response.last_index_offset
+    # A reversed request with an index_offset of 0 starts again from the
+    # newest entry, so stop once the first index has been reached.
+    if response.first_index_offset <= 1:
+        return
+    return response.first_index_offset
+
+
+def partition_range(lower: int, upper: int, partitions: int) -> List[Tuple[int, int]]:
+    """Split the indexes in (lower, upper] into at most `partitions` ranges."""
+    size = upper - lower
+    partitions = min(partitions, size)
+    if partitions <= 0:
+        return []
+    bounds = [lower + size * i // partitions for i in range(partitions + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def merge_partitions(
+    partitions: Sequence[Callable],
+    chunk_size: int = DEFAULT_PAGE_SIZE,
+    prefetch: int = DEFAULT_PREFETCH,
+) -> Generator:
+    """
+    Run every partition in its own thread, each buffering up to `prefetch`
+    chunks of `chunk_size` items ahead, and yield the items partition after
+    partition. Errors raised by a partition are re-raised here.
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=prefetch) for _ in partitions]
+
+    def put(queue_, item):
+        while not stop.is_set():
+            try:
+                queue_.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return
+
+    def work(partition, queue_):
+        try:
+            items = iter(partition())
+            while not stop.is_set():
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                put(queue_, chunk)
+        except Exception as e:
+            put(queue_, e)
+        else:
+            put(queue_, None)
+
+    for partition, queue_ in zip(partitions, queues):
+        threading.Thread(target=work, args=(partition, queue_), daemon=True).start()
+
+    try:
+        for queue_ in queues:
+            while True:
+                chunk = queue_.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield from chunk
+    finally:
+        stop.set()
@@ -0,0 +1,55 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from src.lnd import lightning_pb2 as ln
+from src.providers.route_cache_provider import RouteCacheProvider
+
+# Seconds a route that paid a recipient is reused before pathfinding again.
+DEFAULT_ROUTE_CACHE_TTL = 60 * 60
+
+
+def route_cache_from(
+    filepath: str, ttl_seconds: int = DEFAULT_ROUTE_CACHE_TTL
+) -> "RouteCacheService":
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    return RouteCacheService(
+        provider=RouteCacheProvider.from_path(filepath), ttl_seconds=ttl_seconds
+    )
+
+
+@dataclass(frozen=True)
+class RouteCacheService:
+    """
+    Remembers the hops of the last route that paid each recipient, so repeat
+    Boosts to the same podcasts can rebuild it instead of pathfinding.
+    """
+
+    provider: RouteCacheProvider
+    ttl_seconds: int = DEFAULT_ROUTE_CACHE_TTL
+    clock: Callable[[], float] = time.time
+
+    def get(self, pub_key: str) -> Optional[List[str]]:
+        """The hop pubkeys of the cached route to `pub_key` unless expired."""
+        cached = self.provider.get(pub_key)
+        if cached is None:
+            return
+        hop_pubkeys, updated_at = cached
+        if self.clock() - updated_at > self.ttl_seconds:
+            self.provider.delete(pub_key)
+            return
+        return hop_pubkeys
+
+    def put(self, pub_key: str, route: ln.Route):
+        """Cache `route` after it successfully paid `pub_key`."""
+        hop_pubkeys = [hop.pub_key for hop in route.hops]
+        if hop_pubkeys and hop_pubkeys[-1] == pub_key:
+            self.provider.put(pub_key, hop_pubkeys, int(self.clock()))
+
+    def invalidate(self, pub_key: str):
+        """Forget the route to `pub_key` after a payment to it failed."""
+        self.provider.delete(pub_key)
@@ -0,0 +1,166 @@
+"""
+Payment ticks of many streams merged into one timing wheel, so streaming
+to several Podcasts at once spreads their payments over the interval
+instead of sending them all at the same moment.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Generator, Hashable, List, Tuple
+
+# Seconds between two slots of the wheel.
+DEFAULT_RESOLUTION = 1.0
+
+# Slots of the wheel, an hour at the default resolution. Longer intervals
+# go around the wheel more than once.
+DEFAULT_WHEEL_SIZE = 3600
+
+
+def ticks(
+    interval: float,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Generator[int, None, None]:
+    """
+    Yield 1, 2, 3... as each `interval` seconds elapses, on a fixed schedule
+    so the time spent by the caller between ticks does not delay the next.
+    """
+    start = clock()
+    tick = 0
+    while True:
+        tick += 1
+        delay = start + tick * interval - clock()
+        if delay > 0:
+            sleep(delay)
+        yield tick
+
+
+class Timer:
+    __slots__ = ("key", "interval", "slot", "rounds", "ticks")
+
+    def __init__(self, key: Hashable, interval: int):
+        self.key = key
+        # Slots between two ticks.
+        self.interval = interval
+        self.slot = 0
+        # Turns of the wheel left before it is due.
+        self.rounds = 0
+        self.ticks = 0
+
+
+class StreamScheduler:
+    """
+    A hashed timing wheel of the payment ticks of every active stream. Each
+    slot lists the streams that are due when the wheel reaches it, so a turn
+    costs the same however many streams are added.
+
+    A stream added to the wheel gets the middle of the longest run of free
+    slots in its first interval, so N streams with the same interval tick
+    about interval / N apart.
+
+    Safe to add and remove streams from other threads.
+    """
+
+    __slots__ = ("resolution", "slots", "timers", "now", "lock")
+
+    def __init__(
+        self,
+        resolution: float = DEFAULT_RESOLUTION,
+        wheel_size: int = DEFAULT_WHEEL_SIZE,
+    ):
+        self.resolution = resolution
+        self.slots: List[List[Timer]] = [[] for _ in range(wheel_size)]
+        self.timers: Dict[Hashable, Timer] = {}
+        # Slots the wheel has turned.
+        self.now = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.timers
+
+    def add(self, key: Hashable, interval_seconds: float) -> float:
+        """
+        Tick `key` every `interval_seconds`, returning the seconds until its
+        first tick, at most one interval.
+        """
+        interval = max(1, round(interval_seconds / self.resolution))
+        timer = Timer(key, interval)
+        with self.lock:
+            if key in self.timers:
+                raise ValueError(f"{key!r} is already scheduled")
+            delay = self._first_delay(interval)
+            self.timers[key] = timer
+            self._schedule(timer, delay)
+        return delay * self.resolution
+
+    def remove(self, key: Hashable):
+        with self.lock:
+            timer = self.timers.pop(key, None)
+            if timer is not None:
+                self.slots[timer.slot].remove(timer)
+
+    def advance(self) -> List[Tuple[Hashable, int]]:
+        """
+        Turn the wheel by one slot, returning the streams now due with the
+        number of times each has been, 1 the first time.
+        """
+        with self.lock:
+            self.now += 1
+            slot = self.now % len(self.slots)
+            waiting, due = [], []
+            for timer in self.slots[slot]:
+                if timer.rounds:
+                    timer.rounds -= 1
+                    waiting.append(timer)
+                else:
+                    due.append(timer)
+            self.slots[slot] = waiting
+            for timer in due:
+                timer.ticks += 1
+                self._schedule(timer, timer.interval)
+            return [(timer.key, timer.ticks) for timer in due]
+
+    def run(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Generator[List[Tuple[Hashable, int]], None, None]:
+        """
+        Turn the wheel in real time, yielding the streams due at each slot
+        that has any, until no stream is left.
+        """
+        for _ in ticks(self.resolution, clock=clock, sleep=sleep):
+            if not self.timers:
+                return
+            due = self.advance()
+            if due:
+                yield due
+
+    def _first_delay(self, interval: int) -> int:
+        """Slots until the first tick of a stream added with `interval`."""
+
+        def load(delay):
+            return len(self.slots[(self.now + delay) % len(self.slots)])
+
+        busy = [delay for delay in range(1, interval + 1) if load(delay)]
+        if not busy:
+            # A lone stream is first paid after a whole interval.
+            return interval
+        # Its ticks repeat every interval, so the last run of free slots
+        # wraps around to the first busy one.
+        start, end = max(
+            zip(busy, busy[1:] + [busy[0] + interval]),
+            key=lambda gap: gap[1] - gap[0],
+        )
+        if end - start < 2:
+            # No free slot, share the latest of the least busy ones.
+            return min(range(interval, 0, -1), key=load)
+        return (start + (end - start) // 2 - 1) % interval + 1
+
+    def _schedule(self, timer: Timer, delay: int):
+        timer.slot = (self.now + delay) % len(self.slots)
+        timer.rounds = (delay - 1) // len(self.slots)
+        self.slots[timer.slot].append(timer)
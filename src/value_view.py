@@ -0,0 +1,159 @@
+import time
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.models import ValueForValue
+
+# ValueForValue field -> podcastindex_records_v1 key
+RECORD_V1_KEYS: Dict[str, str] = {
+    "sender_name": "sender_name",
+    "sender_id": "sender_id",
+    "sender_key": "sender_key",
+    "sender_app_name": "app_name",
+    "sender_app_version": "app_version",
+    "receiver_name": "name",
+    "message": "message",
+    "podcast_title": "podcast",
+    "podcast_url": "url",
+    "podcast_guid": "guid",
+    "episode_title": "episode",
+    "episode_guid": "episode_guid",
+    "podcast_index_feed_id": "feedID",
+    "podcast_index_item_id": "itemID",
+}
+
+# Low cardinality fields that repeat across most of the Boosts in a history.
+INTERNED_FIELDS = (
+    "podcast_title",
+    "podcast_url",
+    "podcast_guid",
+    "sender_app_name",
+    "receiver_name",
+)
+
+
+class InternTable:
+    """
+    Dictionary encoding of repeated strings: every equal string is replaced
+    by one shared instance with a small integer code, which makes equality
+    checks and grouping cheap.
+    """
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        code = self.codes.get(value)
+        if code is None:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+            return value
+        return self.values[code]
+
+    def code(self, value: str) -> int:
+        self.intern(value)
+        return self.codes[value]
+
+
+def record_to_timestamp(record: dict) -> Optional[int]:
+    timestamp = None
+    try:
+        if "ts" in record:
+            timestamp = int(record["ts"])
+        elif "time" in record:
+            struct_time = time.strptime(record["time"], "%H:%M:%S")
+            timestamp = (
+                struct_time.tm_hour * 60 * 60
+                + struct_time.tm_min * 60
+                + struct_time.tm_sec
+            )
+    except (TypeError, ValueError):
+        pass
+    return timestamp
+
+
+def record_to_amount_msats_total(record: dict) -> Optional[int]:
+    try:
+        return int(record["value_msat_total"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+VALUE_FIELDS = tuple(f.name for f in fields(ValueForValue))
+
+# ValueForValue field -> function computing it from a ValueForValueView
+FIELDS: Dict[str, Callable[["ValueForValueView"], Any]] = {
+    name: (lambda view: None) for name in VALUE_FIELDS
+}
+FIELDS.update(
+    {
+        name: (lambda view, key=key: view.record.get(key))
+        for name, key in RECORD_V1_KEYS.items()
+    }
+)
+FIELDS.update(
+    {
+        name: (lambda view, key=key: view.intern(view.record.get(key)))
+        for name, key in RECORD_V1_KEYS.items()
+        if name in INTERNED_FIELDS
+    }
+)
+FIELDS.update(
+    amount_msats=lambda view: int(view.raw.value_msat),
+    creation_date=lambda view: datetime.fromtimestamp(int(view.raw.creation_date)),
+    boost=lambda view: view.record.get("action") == "boost",
+    amount_msats_total=lambda view: record_to_amount_msats_total(view.record),
+    timestamp=lambda view: record_to_timestamp(view.record),
+)
+
+
+class ValueForValueView:
+    """
+    Read-only stand-in for a ValueForValue that keeps the raw invoice or
+    payment and its decoded podcastindex_records_v1 record, and computes each
+    field the first time it is read. Use `materialize` for a ValueForValue.
+
+    Strings of the INTERNED_FIELDS are shared through `intern_table`.
+    """
+
+    __slots__ = ("raw", "record", "intern_table") + VALUE_FIELDS
+
+    def __init__(self, raw, record: dict, intern_table: Optional[InternTable] = None):
+        self.raw = raw
+        self.record = record
+        self.intern_table = intern_table
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for fields that have not been computed yet.
+        try:
+            compute = FIELDS[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        value = compute(self)
+        object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name: str, value: Any):
+        if name not in ("raw", "record", "intern_table"):
+            raise AttributeError(f"{type(self).__name__} is read-only")
+        object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.record!r})"
+
+    def intern(self, value: Any) -> Any:
+        if self.intern_table is None:
+            return value
+        return self.intern_table.intern(value)
+
+    def materialize(self) -> ValueForValue:
+        return ValueForValue(**{name: getattr(self, name) for name in VALUE_FIELDS})
@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+from test_lightning_service import boost_invoice, list_invoices_from, list_payments_from
+
+from src.fee_policy import FeePolicy
+from src.lnd import lightning_pb2 as ln
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.providers.lightning_provider import LightningProvider, async_channel_from
+from src.services.async_lightning_service import AsyncLightningService
+
+
+def collect(async_iterable):
+    async def collect_():
+        return [item async for item in async_iterable]
+
+    return asyncio.run(collect_())
+
+
+def awaitable(function):
+    async def call(request):
+        return function(request)
+
+    return call
+
+
+def boost_payment(payment_index):
+    record = f'{{"action": "boost", "message": "{payment_index}"}}'.encode("utf8")
+    hop = ln.Hop(custom_records={7629169: record})
+    return ln.Payment(
+        payment_index=payment_index,
+        value_msat=1000,
+        htlcs=[
+            ln.HTLCAttempt(status=ln.HTLCAttempt.SUCCEEDED, route=ln.Route(hops=[hop]))
+        ],
+    )
+
+
+@pytest.fixture
+def invoices():
+    return [boost_invoice(i) for i in range(1, 26)]
+
+
+@pytest.fixture
+def lightning_stub(invoices):
+    async def subscribe_invoices(request):
+        yield ln.Invoice(settled=False)
+        for invoice in invoices[request.settle_index : request.settle_index + 3]:
+            yield invoice
+
+    async def send_payment_v2(request):
+        yield ln.Payment(status=ln.Payment.IN_FLIGHT)
+        if request.dest[0] == 0xCC:
+            raise RuntimeError("connection lost")
+        await asyncio.sleep(0.01 if request.dest[0] == 0xAA else 0)
+        yield ln.Payment(status=ln.Payment.SUCCEEDED, fee_msat=1)
+
+    stub = Mock()
+    stub.ListInvoices.side_effect = awaitable(list_invoices_from(invoices))
+    stub.ListPayments.side_effect = awaitable(
+        list_payments_from([boost_payment(i) for i in range(1, 26)])
+    )
+    stub.SubscribeInvoices.side_effect = subscribe_invoices
+    stub.SendPaymentV2.side_effect = send_payment_v2
+    return stub
+
+
+@pytest.fixture
+def service(lightning_stub):
+    return AsyncLightningService(
+        provider=LightningProvider(
+            lightning_stub=lightning_stub, router_stub=lightning_stub
+        ),
+        fee_policy=FeePolicy(),
+    )
+
+
+def test_invoices(service, lightning_stub):
+    invoices = collect(service.invoices(accending=False, page_size=10))
+    assert [i.add_index for i in invoices] == list(range(25, 0, -1))
+    assert lightning_stub.ListInvoices.call_count == 3
+
+
+def test_value_received(service):
+    values = service.value_received(
+        index_offset=5, max_number_of_invoices=3, accending=True
+    )
+    assert [v.message for v in collect(values)] == ["6", "7", "8"]
+
+
+def test_value_sent(service):
+    values = collect(service.value_sent(accending=False, max_payments=2))
+    assert [v.message for v in values] == ["25", "24"]
+    assert values[0].amount_msats == 1000
+
+
+def test_watch_value_received(service):
+    values = collect(service.watch_value_received(settle_index=2))
+    assert [v.message for v in values] == ["3", "4", "5"]
+
+
+def test_pay_boost_invoice(service):
+    invoice = BoostInvoice.create(
+        podcast_value=PodcastValue(
+            destinations=[
+                PodcastValueDestination(split=40, address="aa" * 33, name="Adam"),
+                PodcastValueDestination(split=40, address="bb" * 33, name="Dave"),
+                PodcastValueDestination(split=20, address="cc" * 33, name="Guest"),
+            ]
+        ),
+        amount=10000,
+        message=None,
+        sender_name="Ben",
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+    results = collect(service.pay_boost_invoice(invoice))
+
+    # Adam's payment is slower so Dave's completes first.
+    assert [r.value.receiver_name for r in results] == ["Guest", "Dave", "Adam"]
+    assert results[0].payment.status == ln.Payment.FAILED
+    assert all(r.payment.status == ln.Payment.SUCCEEDED for r in results[1:])
+    # The fees paid feed the shared FeePolicy.
+    assert len(service.fee_policy.history["aa" * 33]) == 1
+
+
+def test_async_channel_from_needs_a_running_loop():
+    with pytest.raises(RuntimeError):
+        async_channel_from("localhost", "10009", b"", b"")
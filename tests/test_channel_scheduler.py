@@ -0,0 +1,68 @@
+from src.channel_scheduler import ChannelScheduler, spendable_msat
+from src.lnd import lightning_pb2 as ln
+
+
+def channel(chan_id, local_balance, reserve=0, max_pending_amt_msat=0, active=True):
+    return ln.Channel(
+        chan_id=chan_id,
+        active=active,
+        local_balance=local_balance,
+        local_constraints=ln.ChannelConstraints(
+            chan_reserve_sat=reserve, max_pending_amt_msat=max_pending_amt_msat
+        ),
+    )
+
+
+def test_spendable_msat():
+    assert spendable_msat(channel(1, 1000, reserve=100)) == 900_000
+    assert spendable_msat(channel(1, 1000, max_pending_amt_msat=5000)) == 5000
+    assert spendable_msat(channel(1, 50, reserve=100)) == 0
+
+
+def test_from_channels_skips_inactive():
+    scheduler = ChannelScheduler.from_channels(
+        [channel(1, 1000), channel(2, 5000, active=False)]
+    )
+    assert scheduler.spendable == {1: 1_000_000}
+
+
+def test_assign_spreads_payments():
+    scheduler = ChannelScheduler({1: 1_000_000, 2: 800_000})
+    assert scheduler.assign(300_000) == 1
+    assert scheduler.assign(300_000) == 2
+    assert scheduler.assign(300_000) == 1
+    assert scheduler.spendable == {1: 400_000, 2: 500_000}
+
+
+def test_assign_without_enough_liquidity():
+    scheduler = ChannelScheduler({1: 1_000_000, 2: 800_000})
+    assert scheduler.assign(2_000_000) is None
+    assert scheduler.assign(900_000, exclude=[1]) is None
+    assert scheduler.spendable == {1: 1_000_000, 2: 800_000}
+
+
+def test_reserve_and_release():
+    scheduler = ChannelScheduler({1: 1_000_000})
+    scheduler.reserve(1, 600_000)
+    assert scheduler.assign(600_000) is None
+    scheduler.release(1, 600_000)
+    assert scheduler.assign(600_000) == 1
+    # Unknown channels are ignored.
+    scheduler.reserve(2, 1000)
+    scheduler.release(2, 1000)
+    assert scheduler.spendable == {1: 400_000}
+
+
+def test_total():
+    assert ChannelScheduler({1: 1_000_000, 2: 500_000, 3: -100}).total() == 1_500_000
+
+
+def test_fits():
+    scheduler = ChannelScheduler({1: 1_000_000, 2: 600_000})
+    assert scheduler.fits([700_000, 500_000, 300_000])
+    assert not scheduler.fits([700_000, 700_000])
+    assert scheduler.fits([700_000, 700_000], splittable=True)
+    assert not scheduler.fits([1_700_000], splittable=True)
+    assert not ChannelScheduler({}).fits([1])
+    # Checking reserves nothing.
+    assert scheduler.spendable == {1: 1_000_000, 2: 600_000}
@@ -1,4 +1,10 @@
-from src.cli.commands.boost import SATOSHISTREAM_PUBKEYS, shorten
+from unittest.mock import Mock
+
+from src.channel_scheduler import ChannelScheduler
+from src.cli.commands.boost import SATOSHISTREAM_PUBKEYS, affordable_amount, shorten
+from src.fee_policy import FeePolicy
+from src.models import PodcastValue, PodcastValueDestination
+from src.services.lightning_service import LightningService
 
 
 def test_shorten():
@@ -6,3 +12,38 @@ def test_shorten():
     assert shorten(pubkey) == "03c457fa ... 1a8ae1a4"
     assert shorten(pubkey, segment_length=6) == "03c457 ... 8ae1a4"
     assert shorten(pubkey, seperator="-") == "03c457fa-1a8ae1a4"
+
+
+def test_affordable_amount():
+    pv = PodcastValue(
+        destinations=[
+            PodcastValueDestination(split=50, address="aa" * 33),
+            PodcastValueDestination(split=50, address="bb" * 33),
+        ]
+    )
+    lightning_service = LightningService(provider=Mock(), fee_policy=FeePolicy())
+    channels = ChannelScheduler({1: 12_000_000, 2: 8_000_000})
+
+    # Each split needs its amount plus a 5% fee limit.
+    assert affordable_amount(lightning_service, channels, pv, 10_000) == 10_000
+    # Each split must fit in one channel, the smaller one limits the Boost.
+    assert affordable_amount(lightning_service, channels, pv, 50_000) == 15_238
+    assert (
+        affordable_amount(lightning_service, channels, pv, 50_000, splittable=True)
+        == 19_047
+    )
+    assert affordable_amount(lightning_service, ChannelScheduler({}), pv, 100) == 0
+
+
+def test_affordable_amount_tiny_splits():
+    pv = PodcastValue(
+        destinations=[
+            PodcastValueDestination(split=50, address="aa" * 33),
+            PodcastValueDestination(split=50, address="bb" * 33),
+        ]
+    )
+    lightning_service = LightningService(provider=Mock(), fee_policy=FeePolicy())
+    channels = ChannelScheduler({1: 4000, 2: 4000})
+
+    # 2 sat splits reserve a 2 sat fee limit, not the 3 sat floor.
+    assert affordable_amount(lightning_service, channels, pv, 4) == 4
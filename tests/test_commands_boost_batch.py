@@ -0,0 +1,64 @@
+import click
+import pytest
+
+from src.cli.commands.boost import APP_PUBKEY
+from src.cli.commands.boost_batch import BatchRow, format_from, read_rows, with_app_fee
+from src.models import PodcastValue, PodcastValueDestination
+
+
+def test_read_rows_csv():
+    lines = [
+        "search_term,amount,message,sender_name\n",
+        "920666,1000,Great show,\n",
+        "http://feed.nashownotes.com/rss.xml,500,,Ben\n",
+    ]
+    assert read_rows(lines, "csv") == [
+        BatchRow(search_term="920666", amount=1000, message="Great show"),
+        BatchRow(
+            search_term="http://feed.nashownotes.com/rss.xml",
+            amount=500,
+            sender_name="Ben",
+        ),
+    ]
+
+
+def test_read_rows_jsonl():
+    lines = [
+        '{"search_term": "920666", "amount": 1000, "message": "Great show"}\n',
+        "\n",
+        '{"search_term": 41504, "amount": "500"}\n',
+    ]
+    assert read_rows(lines, "jsonl") == [
+        BatchRow(search_term="920666", amount=1000, message="Great show"),
+        BatchRow(search_term="41504", amount=500),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        '{"amount": 1000}',
+        '{"search_term": "920666"}',
+        '{"search_term": "920666", "amount": "x"}',
+        '{"search_term": "920666", "amount": 0}',
+        '{"search_term": "920666", "amount": -5}',
+    ],
+)
+def test_read_rows_invalid(line):
+    with pytest.raises(click.BadParameter):
+        read_rows([line], "jsonl")
+
+
+def test_format_from():
+    assert format_from("weekly.jsonl") == "jsonl"
+    assert format_from("weekly.NDJSON") == "jsonl"
+    assert format_from("weekly.csv") == "csv"
+    assert format_from("<stdin>") == "csv"
+
+
+def test_with_app_fee():
+    pv = PodcastValue(destinations=[PodcastValueDestination(split=100, address="aa")])
+    pv_with_fee = with_app_fee(pv)
+    assert len(pv.destinations) == 1
+    assert [d.address for d in pv_with_fee.destinations] == ["aa", APP_PUBKEY]
+    assert pv_with_fee.destinations[-1].fee
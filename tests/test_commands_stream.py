@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+from src.cli.commands.stream import (
+    MAX_TICKS_IN_FLIGHT,
+    StreamAccount,
+    format_position,
+    parse_position,
+    pay_tick,
+    streamed,
+)
+from src.lnd import lightning_pb2 as ln
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.services.lightning_service import PaymentResult
+
+
+def test_streamed():
+    plan = BoostInvoice.create(
+        podcast_value=PodcastValue(
+            destinations=[
+                PodcastValueDestination(split=99, address="aa" * 33, name="Adam"),
+                PodcastValueDestination(split=1, address="bb" * 33, name="Dave"),
+                PodcastValueDestination(split=1, address="cc" * 33, fee=True),
+            ]
+        ),
+        amount=50,
+        message=None,
+        sender_name=None,
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+    invoice = streamed(plan, 90)
+
+    # Dave's 1% of 50 msats rounds down to nothing and is skipped.
+    assert [v.receiver_name for v in invoice.payments] == ["Adam"]
+    assert len(invoice.fees) == 0
+    assert not invoice.payments[0].boost
+    assert invoice.payments[0].timestamp == 90
+    assert plan.payments[0].boost
+    assert plan.payments[0].timestamp is None
+
+
+def test_positions():
+    assert parse_position("0") == 0
+    assert parse_position("12:30") == 750
+    assert parse_position("1:02:03") == 3723
+    assert format_position(3723) == "01:02:03"
+
+
+def test_pay_tick_reports_once_all_are_paid():
+    values = [f"value {i}" for i in range(5)]
+    reports = []
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pay_tick(
+            executor,
+            lambda value: PaymentResult(value=value, payment=None, attempts=0),
+            values,
+            reports.append,
+        )
+
+    assert len(reports) == 1
+    assert sorted(r.value for r in reports[0]) == values
+
+
+def test_pay_tick_records_errors():
+    reports = []
+
+    def pay_value(value):
+        if value == "broken":
+            raise ValueError(value)
+        return PaymentResult(value=value, payment=None, attempts=0)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        pay_tick(executor, pay_value, ["broken", "ok"], reports.append)
+
+    assert len(reports) == 1
+    results = {r.value: r for r in reports[0]}
+    assert results["broken"].attempts == 1
+    assert results["broken"].payment is None
+    assert results["ok"].attempts == 0
+
+
+def test_pay_tick_without_values():
+    reports = []
+    pay_tick(None, None, [], reports.append)
+    assert reports == [[]]
+
+
+def test_stream_account():
+    account = StreamAccount(title="Podcasting 2.0", plan=None)
+    for _ in range(MAX_TICKS_IN_FLIGHT):
+        assert account.start()
+    assert not account.start()
+    assert account.skipped == 1
+
+    paid = PaymentResult(
+        value=Mock(amount_msats=1000),
+        payment=ln.Payment(status=ln.Payment.SUCCEEDED, fee_msat=10),
+        attempts=1,
+    )
+    failed = PaymentResult(value=None, payment=None, attempts=0)
+    assert account.record([paid, failed]) == [paid]
+
+    assert account.in_flight == MAX_TICKS_IN_FLIGHT - 1
+    assert account.start()
+    assert account.ticks == 1
+    assert account.amount_msats == 1000
+    assert account.fee_msats == 10
+    assert account.failures == 1
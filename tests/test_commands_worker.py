@@ -0,0 +1,107 @@
+import hashlib
+from unittest.mock import Mock
+
+from click.testing import CliRunner
+from rich.console import Console
+
+import grpc
+import pytest
+
+from src.cli.commands.worker import recover_job, send_job, worker
+from src.lnd import lightning_pb2 as ln
+from src.models import ValueForValue
+from src.providers.job_queue_provider import JobQueueProvider
+from src.services.job_queue_service import (
+    JOB_FAILED,
+    JOB_PAID,
+    JOB_QUEUED,
+    JobQueueService,
+)
+from src.services.lightning_service import PaymentResult
+
+
+class AlreadyExists(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.ALREADY_EXISTS
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueueService(provider=JobQueueProvider.from_path(":memory:"))
+    queue.provider.insert(
+        [(ValueForValue(amount_msats=1000, receiver_address="aa" * 33), b"\1" * 32)],
+        created_at=0,
+    )
+    return queue
+
+
+def test_send_job_uses_its_preimage(queue):
+    lightning_service = Mock()
+    lightning_service.pay_value_with_retries.side_effect = (
+        lambda value, **kwargs: PaymentResult(
+            value, ln.Payment(status=ln.Payment.SUCCEEDED), 1
+        )
+    )
+    job = queue.claim()
+
+    assert send_job(lightning_service, queue, job) == JOB_PAID
+    _, kwargs = lightning_service.pay_value_with_retries.call_args
+    assert kwargs["preimage"] == b"\1" * 32
+
+
+def test_send_job_already_paid(queue):
+    lightning_service = Mock()
+    lightning_service.pay_value_with_retries.side_effect = AlreadyExists()
+    lightning_service.track_payment.return_value = ln.Payment(
+        status=ln.Payment.SUCCEEDED
+    )
+    job = queue.claim()
+
+    assert send_job(lightning_service, queue, job) == JOB_PAID
+    lightning_service.track_payment.assert_called_once_with(
+        hashlib.sha256(b"\1" * 32).digest()
+    )
+
+    lightning_service.track_payment.return_value = None
+    assert send_job(lightning_service, queue, job) == JOB_FAILED
+
+
+@pytest.mark.parametrize(
+    "payment, state",
+    [
+        (ln.Payment(status=ln.Payment.SUCCEEDED), JOB_PAID),
+        (ln.Payment(status=ln.Payment.FAILED), JOB_QUEUED),
+        (None, JOB_QUEUED),
+    ],
+)
+def test_recover_job(queue, payment, state):
+    lightning_service = Mock()
+    lightning_service.track_payment.return_value = payment
+    job = queue.claim()
+
+    assert recover_job(lightning_service, queue, job) == state
+    assert queue.count() == {state: 1}
+    lightning_service.pay_value_with_retries.assert_not_called()
+
+
+def test_worker_stops_every_thread_on_an_error(tmp_path):
+    lightning_service = Mock()
+    lightning_service.pay_value_with_retries.side_effect = RuntimeError("boom")
+    job_queue_file = str(tmp_path / "jobs.db")
+    JobQueueProvider.from_path(job_queue_file).insert(
+        [(ValueForValue(amount_msats=1000, receiver_address="aa" * 33), b"\1" * 32)],
+        created_at=0,
+    )
+
+    # The other threads watch the empty queue until they are stopped.
+    result = CliRunner().invoke(
+        worker,
+        ["--max-concurrent-payments", "3", "--watch", "--poll-interval", "1"],
+        obj={
+            "console": Console(),
+            "console_error": Console(stderr=True),
+            "lightning_service": lightning_service,
+            "job_queue_file": job_queue_file,
+        },
+    )
+    assert isinstance(result.exception, RuntimeError)
@@ -0,0 +1,76 @@
+from unittest.mock import Mock
+
+import pytest
+
+from src.custom_records import DECODERS, CustomRecords, register
+from src.lnd import lightning_pb2 as ln
+
+
+@pytest.fixture
+def raw():
+    return ln.InvoiceHTLC(
+        custom_records={
+            5482373484: bytes.fromhex("00ff"),
+            7629169: b'{"action": "boost", "value_msat_total": 1000}',
+            34349334: b"hello",
+            34349343: (1658000000).to_bytes(8, "big"),
+            133773310: b"{invalid",
+            42: b"unknown",
+        }
+    ).custom_records
+
+
+def test_custom_records(raw):
+    records = CustomRecords(raw)
+    assert records["keysend_preimage"] == "00ff"
+    assert records["podcastindex_records_v1"] == {
+        "action": "boost",
+        "value_msat_total": 1000,
+    }
+    assert records["whatsat_message"] == "hello"
+    assert records["whatsat_timestamp"] == 1658000000
+    assert records.get("podcastindex_id") is None
+    assert records.get("sphinx_records") is None
+    # sphinx_records fails to decode, so it is missing.
+    assert len(records) == 4
+    assert set(records) == {
+        "keysend_preimage",
+        "podcastindex_records_v1",
+        "whatsat_message",
+        "whatsat_timestamp",
+    }
+
+
+def test_custom_records_decodes_once(raw, monkeypatch):
+    decode = Mock(return_value={})
+    monkeypatch.setitem(DECODERS, 7629169, ("podcastindex_records_v1", decode))
+
+    records = CustomRecords(raw)
+    assert "podcastindex_records_v1" in records
+    assert "podcastindex_id" not in records
+    records["podcastindex_records_v1"]
+    records["podcastindex_records_v1"]
+    decode.assert_called_once_with(raw[7629169])
+
+
+def test_custom_records_undecodable_is_missing(raw):
+    records = CustomRecords(raw)
+    assert "sphinx_records" not in records
+    assert records.get("sphinx_records") is None
+    with pytest.raises(KeyError):
+        records["sphinx_records"]
+    # items() reads every record listed by iteration.
+    assert len(dict(records.items())) == len(records)
+
+
+def test_custom_records_is_read_only(raw):
+    records = CustomRecords(raw)
+    with pytest.raises(TypeError):
+        records["whatsat_message"] = "bye"
+
+
+def test_register(raw, monkeypatch):
+    monkeypatch.setattr("src.custom_records.DECODERS", dict(DECODERS))
+    monkeypatch.setattr("src.custom_records.TYPES", {})
+    register(42, "answer", bytes.decode)
+    assert CustomRecords(raw)["answer"] == "unknown"
@@ -0,0 +1,67 @@
+import pytest
+
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.providers.dust_provider import DustProvider
+from src.services.dust_service import DustService, recipient_key
+
+
+@pytest.fixture
+def dust():
+    return DustService(
+        provider=DustProvider.from_path(":memory:"), threshold_msats=10_000
+    )
+
+
+@pytest.fixture
+def invoice():
+    # 20 sats a minute, Adam gets 19 and Dave 1 sat.
+    return BoostInvoice.create(
+        podcast_value=PodcastValue(
+            destinations=[
+                PodcastValueDestination(split=95, address="aa" * 33, name="Adam"),
+                PodcastValueDestination(split=5, address="bb" * 33, name="Dave"),
+            ]
+        ),
+        amount=20_000,
+        message=None,
+        sender_name=None,
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+
+def test_aggregate_holds_dust_until_threshold(dust, invoice):
+    dave = invoice.payments[1]
+    for _ in range(9):
+        aggregated, taken = dust.aggregate(invoice)
+        assert [v.receiver_name for v in aggregated.payments] == ["Adam"]
+        assert taken == {}
+    assert dust.held_msats([dave]) == 9000
+
+    aggregated, taken = dust.aggregate(invoice)
+
+    assert [v.receiver_name for v in aggregated.payments] == ["Adam", "Dave"]
+    assert aggregated.payments[1].amount_msats == 10_000
+    assert aggregated.payments[1].amount_msats_total == 10 * 20_000
+    assert taken == {recipient_key(dave): (9000, 9 * 20_000)}
+    assert dust.held_msats([dave]) == 0
+    # The invoice given is untouched.
+    assert dave.amount_msats == 1000
+
+
+def test_restore_failed(dust, invoice):
+    dave = invoice.payments[1]
+    dust.provider.add(recipient_key(dave), 9000, 180_000)
+    aggregated, taken = dust.aggregate(invoice)
+
+    dust.restore([aggregated.payments[1]], taken)
+
+    assert dust.held_msats([dave]) == 9000
+    assert taken == {}
+
+
+def test_recipient_key_includes_wallet(invoice):
+    adam = invoice.payments[0]
+    assert recipient_key(adam) == "aa" * 33 + "::"
+    adam.custom_key, adam.custom_value = 696969, b"wallet"
+    assert recipient_key(adam) == "aa" * 33 + ":696969:" + b"wallet".hex()
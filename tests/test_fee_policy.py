@@ -0,0 +1,80 @@
+import pytest
+
+from src.fee_policy import (
+    FEE_ESCALATION,
+    FEE_HEADROOM,
+    HISTORY_SIZE,
+    FeePolicy,
+    fee_policy_from,
+)
+
+DEST = "aa" * 33
+
+
+@pytest.fixture
+def policy():
+    return FeePolicy(ratio=0.05, floor_msat=3000, ceiling_ratio=0.25)
+
+
+def test_fee_limit_from_ratio(policy):
+    assert policy.fee_limit(DEST, 1_000_000) == 50_000
+
+
+def test_fee_limit_floor(policy):
+    # A 10 sat stream payment still gets enough fees to be routed.
+    assert policy.fee_limit(DEST, 10_000) == 3000
+
+
+def test_fee_limit_floor_below_amount(policy):
+    # The floor never pays more in fees than the amount sent.
+    assert policy.fee_limit(DEST, 1000) == 1000
+    assert policy.fee_limit(DEST, 1000, route_fee_msat=100) == 1000
+    assert policy.fee_limit(DEST, 1000, route_fee_msat=5000) == 1000
+
+
+def test_fee_limit_ceiling(policy):
+    assert policy.fee_limit(DEST, 1_000_000, route_fee_msat=200_000) == 250_000
+    assert policy.ceiling(10_000) == 3000
+    assert policy.ceiling(1000) == 1000
+
+
+def test_fee_limit_from_route_fee(policy):
+    assert policy.fee_limit(DEST, 1_000_000, route_fee_msat=5000) == 5000 * FEE_HEADROOM
+    # The floor still applies to cheap routes.
+    assert policy.fee_limit(DEST, 1_000_000, route_fee_msat=1000) == 3000
+
+
+def test_fee_limit_escalation(policy):
+    limits = [
+        policy.fee_limit(DEST, 1_000_000, attempt=i, route_fee_msat=5000)
+        for i in range(len(FEE_ESCALATION) + 1)
+    ]
+    assert limits == [5000 * FEE_HEADROOM * m for m in FEE_ESCALATION] + [
+        5000 * FEE_HEADROOM * FEE_ESCALATION[-1]
+    ]
+
+
+def test_fee_limit_from_history(policy):
+    policy.record(DEST, 1_000_000, 2000)
+    policy.record(DEST, 1_000_000, 4000)
+    assert policy.fee_limit(DEST, 1_000_000) == 4000 * FEE_HEADROOM
+    # Fees paid on smaller amounts are scaled up.
+    assert policy.fee_limit(DEST, 2_000_000) == 8000 * FEE_HEADROOM
+    # Other recipients are unaffected.
+    assert policy.fee_limit("bb" * 33, 1_000_000) == 50_000
+
+
+def test_fee_history_is_persisted(tmp_path):
+    path = str(tmp_path / "routes" / "routes.sqlite3")
+    policy = fee_policy_from(path)
+    policy.record(DEST, 1_000_000, 2000)
+    for fee_msat in range(HISTORY_SIZE + 1):
+        policy.record("bb" * 33, 1_000_000, fee_msat)
+
+    # A later run, such as the next `boost`, starts from the fees paid.
+    policy = fee_policy_from(path)
+    assert policy.fee_limit(DEST, 1_000_000) == 2000 * FEE_HEADROOM
+    assert [fee for _, fee in policy.history["bb" * 33]] == list(
+        range(1, HISTORY_SIZE + 1)
+    )
+    assert len(policy.provider.select()) == HISTORY_SIZE + 1
@@ -0,0 +1,96 @@
+import pytest
+
+from src.lnd import lightning_pb2 as ln
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.providers.job_queue_provider import JobQueueProvider
+from src.services.job_queue_service import (
+    JOB_FAILED,
+    JOB_PAID,
+    JOB_QUEUED,
+    JOB_SENDING,
+    JobQueueService,
+    job_queue_from,
+)
+from src.services.lightning_service import PaymentResult
+
+
+@pytest.fixture
+def invoice():
+    return BoostInvoice.create(
+        podcast_value=PodcastValue(
+            destinations=[
+                PodcastValueDestination(split=50, address="aa" * 33, name="Adam"),
+                PodcastValueDestination(
+                    split=50,
+                    address="bb" * 33,
+                    name="Dave",
+                    custom_key=696969,
+                    custom_value=b"wallet",
+                ),
+            ],
+            podcast_title="Podcasting 2.0",
+        ),
+        amount=10000,
+        message="Boost!",
+        sender_name="Ben",
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+
+@pytest.fixture
+def queue():
+    return JobQueueService(provider=JobQueueProvider.from_path(":memory:"))
+
+
+def test_claim_in_order(queue, invoice):
+    ids = queue.enqueue([invoice])
+
+    jobs = [queue.claim(), queue.claim()]
+
+    assert [job.id for job in jobs] == ids
+    assert queue.claim() is None
+    assert all(job.state == JOB_SENDING for job in jobs)
+    assert jobs[0].value == invoice.payments[0]
+    assert jobs[1].value.custom_value == b"wallet"
+    assert len({job.preimage for job in jobs}) == 2
+    assert queue.count() == {JOB_SENDING: 2}
+
+
+def test_finish(queue, invoice):
+    queue.enqueue([invoice])
+    paid, failed = queue.claim(), queue.claim()
+
+    succeeded = ln.Payment(status=ln.Payment.SUCCEEDED, fee_msat=10)
+    assert queue.finish(paid, PaymentResult(paid.value, succeeded, 1)) == JOB_PAID
+    no_route = ln.Payment(
+        status=ln.Payment.FAILED, failure_reason=ln.FAILURE_REASON_NO_ROUTE
+    )
+    assert queue.finish(failed, PaymentResult(failed.value, no_route, 3)) == JOB_FAILED
+
+    assert queue.count() == {JOB_PAID: 1, JOB_FAILED: 1}
+    assert queue.interrupted() == []
+
+
+def test_out_of_time_is_queued_again(queue, invoice):
+    queue.enqueue([invoice])
+    job = queue.claim()
+
+    assert queue.finish(job, PaymentResult(job.value, None, 0)) == JOB_QUEUED
+    assert queue.claim().preimage == job.preimage
+
+
+def test_interrupted_jobs_survive_a_restart(tmp_path, invoice):
+    filepath = str(tmp_path / "queue" / "jobs.sqlite3")
+    queue = job_queue_from(filepath)
+    queue.enqueue([invoice])
+    job = queue.claim()
+
+    # The worker crashed while sending `job`.
+    queue = job_queue_from(filepath)
+
+    interrupted = queue.interrupted()
+    assert interrupted == [job]
+    queue.requeue(job)
+    assert queue.claim() == job
+    assert queue.claim().id != job.id
@@ -0,0 +1,33 @@
+import pytest
+
+from src import json_codec
+
+
+@pytest.fixture(params=sorted(json_codec.BACKENDS))
+def backend(request, monkeypatch):
+    monkeypatch.setattr(json_codec, "backend", json_codec.backend)
+    json_codec.use(request.param)
+    return request.param
+
+
+def test_dumps(backend):
+    value = {"action": "boost", "message": "⚡ thanks", "ts": 12}
+    assert json_codec.dumps(value) == (
+        '{"action":"boost","message":"⚡ thanks","ts":12}'.encode("utf8")
+    )
+
+
+def test_loads(backend):
+    assert json_codec.loads(b'{"value_msat_total": 1000}') == {"value_msat_total": 1000}
+    assert json_codec.loads('{"a": "\\u26a1"}') == {"a": "⚡"}
+
+
+@pytest.mark.parametrize("value", [b"{invalid", b"\xff\xfe", b""])
+def test_loads_invalid(backend, value):
+    with pytest.raises(ValueError):
+        json_codec.loads(value)
+
+
+def test_use_unknown_backend():
+    with pytest.raises(KeyError):
+        json_codec.use("simplejson")
@@ -0,0 +1,185 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from src.lnd import lightning_pb2 as ln
+from src.models import ValueForValue
+from src.providers.ledger_provider import LedgerProvider
+from src.services.ledger_service import LedgerService
+from src.services.lightning_service import LightningService
+
+
+def value_from(item):
+    return ValueForValue(
+        amount_msats=item.value_msat,
+        creation_date=datetime.fromtimestamp(item.creation_date),
+        message=f"message {item.value_msat}",
+    )
+
+
+@pytest.fixture
+def invoices():
+    return [
+        ln.Invoice(
+            add_index=1, settle_index=1, state=ln.Invoice.SETTLED, value_msat=1000
+        ),
+        ln.Invoice(add_index=2, state=ln.Invoice.OPEN, value_msat=2000),
+        ln.Invoice(
+            add_index=3, settle_index=2, state=ln.Invoice.SETTLED, value_msat=3000
+        ),
+    ]
+
+
+@pytest.fixture
+def payments():
+    return [
+        ln.Payment(payment_index=i, value_msat=i * 1000, status=ln.Payment.SUCCEEDED)
+        for i in (1, 2, 3)
+    ]
+
+
+@pytest.fixture
+def lightning_service_mock(invoices, payments):
+    service = Mock(spec=LightningService, set_spec=True)
+    service.invoices.side_effect = lambda index_offset, accending: [
+        i for i in invoices if i.add_index > index_offset
+    ]
+    service.payments.side_effect = lambda index_offset, accending, **kwargs: [
+        p for p in payments if p.payment_index > index_offset
+    ]
+    service.invoice_to_value.side_effect = value_from
+    service.payment_to_value.side_effect = value_from
+    return service
+
+
+@pytest.fixture
+def service(lightning_service_mock):
+    return LedgerService(
+        provider=LedgerProvider.from_path(":memory:"),
+        lightning_service=lightning_service_mock,
+    )
+
+
+def test_sync_received(service, invoices):
+    assert service.sync_received() == 2
+    assert service.provider.get_state("add_index") == 3
+    assert service.provider.get_state("settle_index") == 2
+    assert service.provider.get_state("pending_add_index") == 2
+
+    values = list(service.value_received(accending=True))
+    assert [v.amount_msats for v in values] == [1000, 3000]
+    assert values[0] == value_from(invoices[0])
+
+
+def test_sync_received_revisits_pending_invoices(
+    service, invoices, lightning_service_mock
+):
+    service.sync_received()
+
+    invoices[1].state = ln.Invoice.SETTLED
+    invoices[1].settle_index = 3
+    invoices.append(
+        ln.Invoice(
+            add_index=4, settle_index=4, state=ln.Invoice.SETTLED, value_msat=4000
+        )
+    )
+
+    assert service.sync_received() == 3
+    lightning_service_mock.invoices.assert_called_with(index_offset=1, accending=True)
+    assert service.provider.get_state("pending_add_index") == 0
+
+    values = service.value_received(accending=False)
+    assert [v.amount_msats for v in values] == [4000, 3000, 2000, 1000]
+
+
+def test_sync_sent_is_incremental(service, payments, lightning_service_mock):
+    assert service.sync_sent() == 3
+    assert service.sync_sent() == 0
+    lightning_service_mock.payments.assert_called_with(
+        index_offset=3, accending=True, include_incomplete=True
+    )
+
+    values = service.value_sent(index_offset=1, max_payments=1, accending=True)
+    assert [v.amount_msats for v in values] == [2000]
+
+
+def test_sync_sent_revisits_in_flight_payments(
+    service, payments, lightning_service_mock
+):
+    payments[1].status = ln.Payment.IN_FLIGHT
+    payments.append(
+        ln.Payment(payment_index=4, value_msat=4000, status=ln.Payment.FAILED)
+    )
+
+    assert service.sync_sent() == 2
+    assert service.provider.get_state("payment_index") == 4
+    assert service.provider.get_state("pending_payment_index") == 2
+
+    payments[1].status = ln.Payment.SUCCEEDED
+
+    assert service.sync_sent() == 2
+    lightning_service_mock.payments.assert_called_with(
+        index_offset=1, accending=True, include_incomplete=True
+    )
+    assert service.provider.get_state("pending_payment_index") == 0
+    values = service.value_sent(accending=True)
+    assert [v.amount_msats for v in values] == [1000, 2000, 3000]
+
+
+def test_sync_received_malformed_boosts(service, invoices, lightning_service_mock):
+    def boost(add_index, record):
+        return ln.Invoice(
+            add_index=add_index,
+            settle_index=add_index,
+            state=ln.Invoice.SETTLED,
+            settled=True,
+            is_keysend=True,
+            value_msat=1000,
+            htlcs=[ln.InvoiceHTLC(custom_records={7629169: record.encode("utf8")})],
+        )
+
+    invoices[:] = [
+        boost(1, '{"ts": "1:02", "message": "a"}'),
+        boost(2, '{"value_msat_total": "lots", "message": "b"}'),
+        boost(3, '{"message": "c"}'),
+    ]
+    decode = LightningService(provider=Mock()).invoice_to_value
+
+    def invoice_to_value(invoice):
+        if invoice.add_index == 3:
+            raise OverflowError("date value out of range")
+        return decode(invoice)
+
+    lightning_service_mock.invoice_to_value.side_effect = invoice_to_value
+
+    # The malformed fields are left out, a Boost failing to decode is skipped.
+    assert service.sync_received() == 2
+    assert service.provider.get_state("add_index") == 3
+    values = list(service.value_received(accending=True))
+    assert [(v.message, v.timestamp, v.amount_msats_total) for v in values] == [
+        ("a", None, None),
+        ("b", None, None),
+    ]
+
+
+def test_sync_sent_skips_payments_failing_to_decode(service, lightning_service_mock):
+    lightning_service_mock.payment_to_value.side_effect = [
+        value_from(ln.Payment(value_msat=1000)),
+        ValueError("invalid literal for int()"),
+        value_from(ln.Payment(value_msat=3000)),
+    ]
+
+    assert service.sync_sent() == 2
+    assert service.provider.get_state("payment_index") == 3
+
+
+def test_watched_settle_index(service):
+    assert service.watched_settle_index() == 0
+    service.sync_received()
+
+    service.set_watched_settle_index(7)
+
+    assert service.watched_settle_index() == 7
+    # Kept apart from the settle index of `sync`.
+    assert service.provider.get_state("settle_index") == 2
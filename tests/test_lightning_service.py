@@ -0,0 +1,1024 @@
+import dataclasses
+import hashlib
+import itertools
+from concurrent.futures import wait
+import threading
+import time
+from unittest.mock import Mock
+
+import grpc
+import pytest
+
+from src import json_codec
+from src.channel_scheduler import ChannelScheduler
+from src.fee_policy import FeePolicy
+from src.custom_records import DECODERS
+from src.lnd import lightning_pb2 as ln
+from src.lnd import router_pb2 as router
+from src.models import BoostInvoice, PodcastValue, PodcastValueDestination
+from src.providers.lightning_provider import LightningProvider
+from src.providers.route_cache_provider import RouteCacheProvider
+from src.services.lightning_service import (
+    LightningService,
+    is_retryable,
+    merge_partitions,
+    paginate,
+    partition_range,
+    payment_error,
+    route_key,
+    send_payment_request,
+    value_to_record,
+)
+from src.services.route_cache_service import RouteCacheService
+
+
+def list_from(items, response_type, field, num_max_field, index_field):
+    """Emulates LND's index_offset paging over `items` ordered by index."""
+
+    def list_(request):
+        num_max = getattr(request, num_max_field)
+        if request.reversed:
+            end = request.index_offset - 1 if request.index_offset else len(items)
+            start = max(end - num_max, 0)
+        else:
+            start = request.index_offset
+            end = start + num_max
+        page = items[start:end]
+        return response_type(
+            **{field: page},
+            first_index_offset=getattr(page[0], index_field) if page else 0,
+            last_index_offset=getattr(page[-1], index_field) if page else 0,
+        )
+
+    return list_
+
+
+def list_invoices_from(invoices):
+    return list_from(
+        invoices, ln.ListInvoiceResponse, "invoices", "num_max_invoices", "add_index"
+    )
+
+
+def list_payments_from(payments):
+    return list_from(
+        payments, ln.ListPaymentsResponse, "payments", "max_payments", "payment_index"
+    )
+
+
+def boost_invoice(add_index):
+    record = f'{{"action": "boost", "message": "{add_index}"}}'.encode("utf8")
+    return ln.Invoice(
+        add_index=add_index,
+        settled=True,
+        is_keysend=True,
+        htlcs=[ln.InvoiceHTLC(custom_records={7629169: record})],
+    )
+
+
+@pytest.fixture
+def invoices():
+    return [boost_invoice(i) for i in range(1, 26)]
+
+
+@pytest.fixture
+def payments():
+    return [ln.Payment(payment_index=i) for i in range(1, 26)]
+
+
+@pytest.fixture
+def lightning_stub(invoices, payments):
+    stub = Mock()
+    stub.ListInvoices.side_effect = list_invoices_from(invoices)
+    stub.ListPayments.side_effect = list_payments_from(payments)
+    return stub
+
+
+@pytest.fixture
+def router_stub():
+    return Mock()
+
+
+@pytest.fixture
+def service(lightning_stub, router_stub):
+    return LightningService(
+        provider=LightningProvider(
+            lightning_stub=lightning_stub, router_stub=router_stub
+        )
+    )
+
+
+def test_invoices_accending(service, lightning_stub):
+    invoices = service.invoices(accending=True, page_size=10)
+    assert [i.add_index for i in invoices] == list(range(1, 26))
+    assert lightning_stub.ListInvoices.call_count == 3
+
+
+def test_invoices_decending(service, lightning_stub):
+    invoices = service.invoices(accending=False, page_size=10)
+    assert [i.add_index for i in invoices] == list(range(25, 0, -1))
+    assert lightning_stub.ListInvoices.call_count == 3
+
+
+def test_invoices_index_offset(service):
+    invoices = service.invoices(index_offset=20, accending=True, page_size=10)
+    assert [i.add_index for i in invoices] == list(range(21, 26))
+
+    invoices = service.invoices(index_offset=6, accending=False, page_size=10)
+    assert [i.add_index for i in invoices] == list(range(5, 0, -1))
+
+
+def test_invoices_max_number_of_invoices(service, lightning_stub):
+    invoices = service.invoices(
+        accending=False, max_number_of_invoices=12, page_size=10
+    )
+    assert [i.add_index for i in invoices] == list(range(25, 13, -1))
+    assert [
+        c.args[0].num_max_invoices for c in lightning_stub.ListInvoices.mock_calls
+    ] == [10, 2]
+
+
+def test_invoices_is_lazy(service, lightning_stub):
+    invoices = service.invoices(page_size=10)
+    next(invoices)
+    assert lightning_stub.ListInvoices.call_count == 1
+
+
+def test_payments_decending(service, lightning_stub):
+    payments = service.payments(accending=False, page_size=10)
+    assert [p.payment_index for p in payments] == list(range(25, 0, -1))
+    for call in lightning_stub.ListPayments.mock_calls:
+        assert call.args[0].include_incomplete is False
+
+
+def test_payments_max_payments(service):
+    payments = service.payments(accending=True, max_payments=15, page_size=10)
+    assert [p.payment_index for p in payments] == list(range(1, 16))
+
+
+def test_payment_to_value_uses_succeeded_htlc(service):
+    record = b'{"action": "boost", "message": "hi"}'
+    hop = ln.Hop(custom_records={7629169: record})
+    payment = ln.Payment(
+        value_msat=1000,
+        creation_date=1,
+        htlcs=[
+            ln.HTLCAttempt(status=ln.HTLCAttempt.FAILED),
+            ln.HTLCAttempt(status=ln.HTLCAttempt.SUCCEEDED, route=ln.Route(hops=[hop])),
+        ],
+    )
+    value = service.payment_to_value(payment)
+    assert value.message == "hi"
+    assert value.amount_msats == 1000
+    assert value == service.payment_to_view(payment).materialize()
+
+
+def test_payment_to_value_without_htlcs(service):
+    assert service.payment_to_value(ln.Payment()) is None
+
+
+def test_paginate_stops_on_empty_page():
+    request = Mock(return_value=ln.ListInvoiceResponse())
+    assert list(paginate(request, "invoices", page_size=10)) == []
+    assert request.call_count == 1
+
+
+def test_partition_range():
+    assert partition_range(0, 10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert partition_range(5, 7, 4) == [(5, 6), (6, 7)]
+    assert partition_range(7, 7, 4) == []
+
+
+def test_merge_partitions_keeps_partition_order():
+    partitions = [lambda n=n: range(n * 10, n * 10 + 10) for n in range(4)]
+    assert list(merge_partitions(partitions, chunk_size=3)) == list(range(40))
+
+
+def test_merge_partitions_raises_partition_error():
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        list(merge_partitions([lambda: [1, 2], failing]))
+
+
+@pytest.mark.parametrize("partitions", [2, 3, 30])
+def test_value_received_partitioned(service, partitions):
+    values = service.value_received(accending=True, partitions=partitions)
+    assert [v.message for v in values] == [str(i) for i in range(1, 26)]
+
+    values = service.value_received(
+        index_offset=20, accending=False, partitions=partitions
+    )
+    assert [v.message for v in values] == [str(i) for i in range(19, 0, -1)]
+
+
+def test_value_received_partitioned_opens_channels(service, lightning_stub):
+    connect = Mock(return_value=LightningProvider(lightning_stub=lightning_stub))
+    service = LightningService(provider=service.provider, connect=connect)
+
+    values = service.value_received(
+        accending=False, partitions=3, max_number_of_invoices=5
+    )
+    assert [v.message for v in values] == [str(i) for i in range(25, 20, -1)]
+    assert connect.call_count == 2
+
+
+def test_value_sent_partitioned(service, lightning_stub):
+    payments = [
+        ln.Payment(
+            payment_index=i,
+            htlcs=[
+                ln.HTLCAttempt(
+                    status=ln.HTLCAttempt.SUCCEEDED,
+                    route=ln.Route(
+                        hops=[
+                            ln.Hop(
+                                custom_records={
+                                    7629169: f'{{"message": "{i}"}}'.encode("utf8")
+                                }
+                            )
+                        ]
+                    ),
+                )
+            ],
+        )
+        for i in range(1, 8)
+    ]
+    lightning_stub.ListPayments.side_effect = list_payments_from(payments)
+
+    values = service.value_sent(accending=True, partitions=3)
+    assert [v.message for v in values] == [str(i) for i in range(1, 8)]
+
+
+def test_invoice_to_value_skips_non_boosts(service, monkeypatch):
+    decode = Mock()
+    monkeypatch.setitem(DECODERS, 7629169, ("podcastindex_records_v1", decode))
+
+    regular = ln.Invoice(settled=True, htlcs=[ln.InvoiceHTLC()])
+    keysend = ln.Invoice(
+        settled=True,
+        is_keysend=True,
+        htlcs=[ln.InvoiceHTLC(custom_records={34349334: b"hello"})],
+    )
+    assert service.invoice_to_value(regular) is None
+    assert service.invoice_to_value(keysend) is None
+    assert service.invoice_to_value(ln.Invoice(settled=True, is_keysend=True)) is None
+    decode.assert_not_called()
+
+
+def test_invoice_to_value(service):
+    value = service.invoice_to_value(boost_invoice(7))
+    assert value.message == "7"
+    assert value.boost is True
+
+
+def test_invoice_to_value_is_eager(service, monkeypatch):
+    view = Mock()
+    monkeypatch.setattr("src.services.lightning_service.ValueForValueView", view)
+    assert service.invoice_to_value(boost_invoice(7)).message == "7"
+    view.assert_not_called()
+
+
+def test_invoice_to_value_invalid_record(service):
+    invoice = ln.Invoice(
+        settled=True,
+        is_keysend=True,
+        htlcs=[ln.InvoiceHTLC(custom_records={7629169: b"not json"})],
+    )
+    assert service.invoice_to_value(invoice) is None
+
+
+def test_value_received_lazy(service):
+    values = list(service.value_received(accending=True, lazy=True))
+    assert [v.message for v in values] == [str(i) for i in range(1, 26)]
+    assert values[0].materialize() == service.invoice_to_value(boost_invoice(1))
+
+
+def test_invoice_to_value_interns_metadata(service):
+    def invoice(message):
+        record = f'{{"podcast": "Podcasting 2.0", "message": "{message}"}}'
+        return ln.Invoice(
+            settled=True,
+            is_keysend=True,
+            htlcs=[ln.InvoiceHTLC(custom_records={7629169: record.encode("utf8")})],
+        )
+
+    first = service.invoice_to_value(invoice("a"))
+    second = service.invoice_to_value(invoice("b"))
+    assert first.podcast_title is second.podcast_title
+    assert first.message is not second.message
+    assert len(service.intern_table) == 1
+
+
+@pytest.fixture
+def boost_invoice_():
+    podcast_value = PodcastValue(
+        podcast_title="Podcasting 2.0",
+        destinations=[
+            PodcastValueDestination(split=40, address="aa" * 33, name="Adam"),
+            PodcastValueDestination(split=40, address="bb" * 33, name="Dave"),
+            PodcastValueDestination(split=20, address="cc" * 33, name="Guest"),
+            PodcastValueDestination(split=1, address="dd" * 33, name="App", fee=True),
+        ],
+    )
+    return BoostInvoice.create(
+        podcast_value=podcast_value,
+        amount=100000,
+        message="Hi",
+        sender_name="Ben",
+        sender_app_name="BoostCLI",
+        pubkey=None,
+    )
+
+
+def test_pay_boost_invoice(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = lambda request: iter(
+        [
+            ln.Payment(
+                payment_hash=request.payment_hash.hex(),
+                status=ln.Payment.IN_FLIGHT,
+            ),
+            ln.Payment(
+                payment_hash=request.payment_hash.hex(),
+                status=ln.Payment.SUCCEEDED,
+            ),
+        ]
+    )
+
+    payments = list(service.pay_boost_invoice(boost_invoice_, timeout_seconds=30))
+
+    assert sorted(value.receiver_name for value, _, _ in payments) == [
+        "Adam",
+        "App",
+        "Dave",
+        "Guest",
+    ]
+    for value, payment, attempts in payments:
+        assert attempts == 1
+        assert payment.status == ln.Payment.SUCCEEDED
+        request = next(
+            c.args[0]
+            for c in router_stub.SendPaymentV2.mock_calls
+            if c.args[0].payment_hash.hex() == payment.payment_hash
+        )
+        assert request.dest.hex() == value.receiver_address
+        assert request.amt_msat == value.amount_msats
+        assert request.timeout_seconds == 30
+        assert request.fee_limit_msat == FeePolicy().fee_limit(
+            value.receiver_address, value.amount_msats
+        )
+        assert not request.amp
+        preimage = request.dest_custom_records[5482373484]
+        assert hashlib.sha256(preimage).digest() == request.payment_hash
+        assert json_codec.loads(request.dest_custom_records[7629169]) == {
+            "action": "boost",
+            "app_name": "BoostCLI",
+            "podcast": "Podcasting 2.0",
+            "name": value.receiver_name,
+            "value_msat_total": 100000,
+            **({} if value.receiver_name == "App" else {"message": "Hi"}),
+            **({} if value.receiver_name == "App" else {"sender_name": "Ben"}),
+        }
+
+
+@pytest.mark.parametrize("max_concurrent_payments", [1, 2, 4])
+def test_pay_boost_invoice_concurrency(
+    service, router_stub, boost_invoice_, max_concurrent_payments
+):
+    condition = threading.Condition()
+    running = []
+    peak = []
+
+    def send_payment_v2(request):
+        with condition:
+            running.append(request)
+            peak.append(len(running))
+            condition.notify_all()
+            # Hold the first payments until the pool has been filled, so more
+            # than allowed would have started by then.
+            condition.wait_for(lambda: max(peak) >= max_concurrent_payments, timeout=1)
+        with condition:
+            running.remove(request)
+        yield ln.Payment(status=ln.Payment.SUCCEEDED)
+
+    router_stub.SendPaymentV2.side_effect = send_payment_v2
+
+    payments = service.pay_boost_invoice(
+        boost_invoice_, max_concurrent_payments=max_concurrent_payments
+    )
+    assert len(list(payments)) == 4
+    assert max(peak) == max_concurrent_payments
+
+
+def test_send_payment_request_amp(boost_invoice_):
+    value = boost_invoice_.payments[0]
+    request = send_payment_request(value, fee_limit=3000, max_parts=4)
+    assert request.amp
+    assert request.max_parts == 4
+    assert request.payment_hash == b""
+    assert 5482373484 not in request.dest_custom_records
+    assert 7629169 in request.dest_custom_records
+
+
+def test_pay_value_returns_final_status(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.return_value = iter(
+        [
+            ln.Payment(status=ln.Payment.IN_FLIGHT),
+            ln.Payment(
+                status=ln.Payment.FAILED,
+                failure_reason=ln.FAILURE_REASON_NO_ROUTE,
+            ),
+        ]
+    )
+    payment = service.pay_value(boost_invoice_.payments[0])
+    assert payment_error(payment) == "FAILURE_REASON_NO_ROUTE"
+    assert payment_error(ln.Payment(status=ln.Payment.SUCCEEDED)) == ""
+    assert payment_error(ln.Payment(status=ln.Payment.IN_FLIGHT)) == "IN_FLIGHT"
+
+
+def route_to(value, fee_msat=1000):
+    return ln.Route(
+        total_amt_msat=value.amount_msats + fee_msat,
+        total_fees_msat=fee_msat,
+        hops=[
+            ln.Hop(pub_key="cc" * 33, amt_to_forward_msat=value.amount_msats),
+            ln.Hop(
+                pub_key=value.receiver_address, amt_to_forward_msat=value.amount_msats
+            ),
+        ],
+    )
+
+
+def test_query_route(service, lightning_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    lightning_stub.QueryRoutes.return_value = ln.QueryRoutesResponse(
+        routes=[route_to(value)]
+    )
+
+    assert service.query_route(value) == route_to(value)
+
+    request = lightning_stub.QueryRoutes.call_args.args[0]
+    assert request.pub_key == value.receiver_address
+    assert request.amt_msat == value.amount_msats
+    assert request.fee_limit.fixed_msat == FeePolicy().ceiling(value.amount_msats)
+    assert set(request.dest_custom_records) == {7629169, 5482373484}
+
+
+def test_query_route_without_route(service, lightning_stub, boost_invoice_):
+    lightning_stub.QueryRoutes.side_effect = grpc.RpcError()
+    assert service.query_route(boost_invoice_.payments[0]) is None
+
+
+def test_probe_boost_invoice(service, lightning_stub, boost_invoice_):
+    lightning_stub.QueryRoutes.return_value = ln.QueryRoutesResponse()
+
+    routes = service.probe_boost_invoice(boost_invoice_)
+
+    values = boost_invoice_.payments + boost_invoice_.fees
+    assert set(routes) == {route_key(value) for value in values}
+    assert all(future.result() is None for future in routes.values())
+
+
+def test_pay_value_along_route(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    router_stub.SendToRouteV2.side_effect = lambda request: ln.HTLCAttempt(
+        status=ln.HTLCAttempt.SUCCEEDED, route=request.route
+    )
+
+    payment = service.pay_value(value, route=route_to(value))
+
+    assert payment.status == ln.Payment.SUCCEEDED
+    assert payment.fee_msat == 1000
+    assert not router_stub.SendPaymentV2.called
+    request = router_stub.SendToRouteV2.call_args.args[0]
+    custom_records = request.route.hops[-1].custom_records
+    assert hashlib.sha256(custom_records[5482373484]).digest() == request.payment_hash
+    assert request.payment_hash.hex() == payment.payment_hash
+    assert 7629169 in custom_records
+
+
+def test_pay_value_falls_back_to_pathfinding(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    router_stub.SendToRouteV2.return_value = ln.HTLCAttempt(
+        status=ln.HTLCAttempt.FAILED
+    )
+    router_stub.SendPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED)]
+    )
+
+    payment = service.pay_value(value, route=route_to(value))
+
+    assert payment.status == ln.Payment.SUCCEEDED
+    assert router_stub.SendToRouteV2.called
+    assert router_stub.SendPaymentV2.called
+
+
+def test_pay_value_along_route_tracks_errors(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    router_stub.SendToRouteV2.side_effect = grpc.RpcError()
+    router_stub.TrackPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED)]
+    )
+
+    payment = service.pay_value(value, route=route_to(value))
+
+    # The HTLC went out before the call failed, it is not sent again.
+    assert payment.status == ln.Payment.SUCCEEDED
+    assert not router_stub.SendPaymentV2.called
+    payment_hash = router_stub.SendToRouteV2.call_args.args[0].payment_hash
+    assert router_stub.TrackPaymentV2.call_args.args[0].payment_hash == payment_hash
+
+
+def test_pay_value_falls_back_with_the_same_preimage(
+    service, router_stub, boost_invoice_
+):
+    value = boost_invoice_.payments[0]
+    router_stub.SendToRouteV2.side_effect = grpc.RpcError()
+    router_stub.TrackPaymentV2.side_effect = NotFound()
+    router_stub.SendPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED)]
+    )
+
+    payment = service.pay_value(value, route=route_to(value))
+
+    assert payment.status == ln.Payment.SUCCEEDED
+    assert (
+        router_stub.SendPaymentV2.call_args.args[0].payment_hash
+        == router_stub.SendToRouteV2.call_args.args[0].payment_hash
+    )
+
+
+@pytest.fixture
+def route_cache():
+    return RouteCacheService(provider=RouteCacheProvider.from_path(":memory:"))
+
+
+def test_probe_boost_invoice_rebuilds_cached_route(
+    service, lightning_stub, router_stub, boost_invoice_, route_cache
+):
+    value = boost_invoice_.payments[0]
+    route_cache.put(value.receiver_address, route_to(value))
+    router_stub.BuildRoute.return_value = router.BuildRouteResponse(
+        route=route_to(value)
+    )
+    lightning_stub.QueryRoutes.return_value = ln.QueryRoutesResponse()
+
+    routes = service.probe_boost_invoice(boost_invoice_, route_cache=route_cache)
+
+    assert routes[route_key(value)].result() == route_to(value)
+    wait(routes.values())
+    request = router_stub.BuildRoute.call_args.args[0]
+    assert request.amt_msat == value.amount_msats
+    assert [p.hex() for p in request.hop_pubkeys] == ["cc" * 33, "aa" * 33]
+    # Recipients without a cached route are found by pathfinding.
+    assert lightning_stub.QueryRoutes.call_count == len(routes) - 1
+
+
+def test_probe_boost_invoice_cached_route_too_expensive(
+    service, lightning_stub, router_stub, boost_invoice_, route_cache
+):
+    value = boost_invoice_.payments[0]
+    route_cache.put(value.receiver_address, route_to(value))
+    router_stub.BuildRoute.return_value = router.BuildRouteResponse(
+        route=route_to(value, fee_msat=value.amount_msats)
+    )
+    lightning_stub.QueryRoutes.return_value = ln.QueryRoutesResponse()
+
+    routes = service.probe_boost_invoice(boost_invoice_, route_cache=route_cache)
+
+    assert routes[route_key(value)].result() is None
+
+
+def test_pay_boost_invoice_updates_route_cache(
+    service, router_stub, boost_invoice_, route_cache
+):
+    def send_payment_v2(request):
+        value = next(
+            v
+            for v in boost_invoice_.payments + boost_invoice_.fees
+            if v.receiver_address == request.dest.hex()
+        )
+        if value.receiver_name == "Adam":
+            yield ln.Payment(
+                status=ln.Payment.FAILED,
+                failure_reason=ln.FAILURE_REASON_INCORRECT_PAYMENT_DETAILS,
+            )
+        else:
+            yield ln.Payment(
+                status=ln.Payment.SUCCEEDED,
+                htlcs=[
+                    ln.HTLCAttempt(
+                        status=ln.HTLCAttempt.SUCCEEDED, route=route_to(value)
+                    )
+                ],
+            )
+
+    router_stub.SendPaymentV2.side_effect = send_payment_v2
+    adam = boost_invoice_.payments[0]
+    route_cache.put(adam.receiver_address, route_to(adam))
+
+    list(service.pay_boost_invoice(boost_invoice_, route_cache=route_cache))
+
+    for value in boost_invoice_.payments + boost_invoice_.fees:
+        hop_pubkeys = route_cache.get(value.receiver_address)
+        if value.receiver_name == "Adam":
+            assert hop_pubkeys is None
+        else:
+            assert hop_pubkeys == ["cc" * 33, value.receiver_address]
+
+
+def failing(*failure_reasons):
+    """SendPaymentV2 failing with `failure_reasons` then succeeding."""
+    attempts = iter(failure_reasons)
+
+    def send_payment_v2(request):
+        failure_reason = next(attempts, None)
+        if failure_reason is None:
+            yield ln.Payment(status=ln.Payment.SUCCEEDED)
+        else:
+            yield ln.Payment(status=ln.Payment.FAILED, failure_reason=failure_reason)
+
+    return send_payment_v2
+
+
+def test_pay_value_with_retries(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    router_stub.SendPaymentV2.side_effect = failing(
+        ln.FAILURE_REASON_NO_ROUTE, ln.FAILURE_REASON_TIMEOUT
+    )
+
+    result = service.pay_value_with_retries(
+        value, deadline=time.monotonic() + 60, max_attempts=3, retry_backoff=0
+    )
+
+    assert result.payment.status == ln.Payment.SUCCEEDED
+    assert result.attempts == 3
+    fee_limits = [
+        c.args[0].fee_limit_msat for c in router_stub.SendPaymentV2.mock_calls
+    ]
+    assert fee_limits == [
+        FeePolicy().fee_limit(value.receiver_address, value.amount_msats, attempt=i)
+        for i in range(3)
+    ]
+
+
+def test_pay_value_with_retries_max_attempts(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = failing(*[ln.FAILURE_REASON_NO_ROUTE] * 5)
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0],
+        deadline=time.monotonic() + 60,
+        max_attempts=2,
+        retry_backoff=0,
+    )
+
+    assert payment_error(result.payment) == "FAILURE_REASON_NO_ROUTE"
+    assert result.attempts == 2
+
+
+def test_pay_value_with_retries_final_failure(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = failing(
+        ln.FAILURE_REASON_INCORRECT_PAYMENT_DETAILS
+    )
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0], deadline=time.monotonic() + 60, retry_backoff=0
+    )
+
+    assert result.attempts == 1
+
+
+def test_pay_value_with_retries_tracks_in_flight(service, router_stub, boost_invoice_):
+    # The updates stop while the payment is still in flight.
+    router_stub.SendPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.IN_FLIGHT)]
+    )
+    router_stub.TrackPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED)]
+    )
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0], deadline=time.monotonic() + 60, retry_backoff=0
+    )
+
+    assert result.payment.status == ln.Payment.SUCCEEDED
+    assert result.attempts == 1
+    assert router_stub.SendPaymentV2.call_count == 1
+    assert (
+        router_stub.TrackPaymentV2.call_args.args[0].payment_hash
+        == router_stub.SendPaymentV2.call_args.args[0].payment_hash
+    )
+
+
+def test_in_flight_is_not_retryable():
+    assert not is_retryable(ln.Payment(status=ln.Payment.IN_FLIGHT))
+    assert not is_retryable(
+        ln.Payment(
+            status=ln.Payment.IN_FLIGHT, failure_reason=ln.FAILURE_REASON_TIMEOUT
+        )
+    )
+    assert is_retryable(
+        ln.Payment(status=ln.Payment.FAILED, failure_reason=ln.FAILURE_REASON_TIMEOUT)
+    )
+    assert is_retryable(None)
+
+
+def test_pay_value_with_retries_time_budget(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = failing(ln.FAILURE_REASON_NO_ROUTE)
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0], deadline=time.monotonic() + 5, retry_backoff=10
+    )
+    assert result.attempts == 1
+    assert router_stub.SendPaymentV2.call_args.args[0].timeout_seconds <= 5
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0], deadline=time.monotonic()
+    )
+    assert result.payment is None
+    assert result.attempts == 0
+
+
+def test_pay_boost_invoice_retries(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = failing(
+        ln.FAILURE_REASON_NO_ROUTE, ln.FAILURE_REASON_ERROR
+    )
+
+    results = list(service.pay_boost_invoice(boost_invoice_, retry_backoff=0))
+
+    assert len(results) == 4
+    assert all(r.payment.status == ln.Payment.SUCCEEDED for r in results)
+    assert sum(r.attempts for r in results) == 6
+
+
+def test_pay_value_with_retries_records_fee(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    router_stub.SendPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED, fee_msat=500)]
+    )
+
+    service.pay_value_with_retries(value, deadline=time.monotonic() + 60)
+
+    assert list(service.fee_policy.history[value.receiver_address]) == [
+        (value.amount_msats, 500)
+    ]
+
+
+def test_channel_scheduler(service, lightning_stub):
+    lightning_stub.ListChannels.return_value = ln.ListChannelsResponse(
+        channels=[ln.Channel(chan_id=1, active=True, local_balance=1000)]
+    )
+    assert service.channel_scheduler().spendable == {1: 1_000_000}
+    assert lightning_stub.ListChannels.call_args.args[0].active_only
+
+
+def test_pay_value_with_retries_spreads_channels(service, router_stub, boost_invoice_):
+    value = boost_invoice_.payments[0]
+    channels = ChannelScheduler({1: 10_000_000, 2: 5_000_000})
+    router_stub.SendPaymentV2.side_effect = failing(ln.FAILURE_REASON_NO_ROUTE)
+
+    result = service.pay_value_with_retries(
+        value, deadline=time.monotonic() + 60, retry_backoff=0, channels=channels
+    )
+
+    assert result.attempts == 2
+    outgoing_chan_ids = [
+        list(c.args[0].outgoing_chan_ids) for c in router_stub.SendPaymentV2.mock_calls
+    ]
+    # The channel that failed is not tried again.
+    assert outgoing_chan_ids == [[1], [2]]
+    # Only the amount and fees of the successful payment stay reserved.
+    assert channels.spendable == {1: 10_000_000, 2: 5_000_000 - value.amount_msats}
+
+
+def test_pay_value_with_retries_releases_channel_on_error(
+    service, router_stub, boost_invoice_
+):
+    channels = ChannelScheduler({1: 10_000_000})
+    router_stub.SendPaymentV2.side_effect = grpc.RpcError()
+
+    with pytest.raises(grpc.RpcError):
+        service.pay_value_with_retries(
+            boost_invoice_.payments[0],
+            deadline=time.monotonic() + 60,
+            channels=channels,
+        )
+
+    assert channels.spendable == {1: 10_000_000}
+
+
+def test_pay_value_with_retries_route_fallback_keeps_channel(
+    service, router_stub, boost_invoice_
+):
+    value = boost_invoice_.payments[0]
+    route = route_to(value)
+    route.hops[0].chan_id = 2
+    channels = ChannelScheduler({1: 10_000_000, 2: 5_000_000})
+    router_stub.SendToRouteV2.return_value = ln.HTLCAttempt(
+        status=ln.HTLCAttempt.FAILED
+    )
+    router_stub.SendPaymentV2.return_value = iter(
+        [ln.Payment(status=ln.Payment.SUCCEEDED)]
+    )
+
+    service.pay_value_with_retries(
+        value, deadline=time.monotonic() + 60, route=route, channels=channels
+    )
+
+    # The pathfinding fallback goes out through the channel reserved for it.
+    assert router_stub.SendPaymentV2.call_args.args[0].outgoing_chan_ids == [2]
+    assert channels.spendable == {1: 10_000_000, 2: 5_000_000 - value.amount_msats}
+
+
+def test_liquidity_needed(service, boost_invoice_):
+    values = boost_invoice_.payments + boost_invoice_.fees
+    assert service.liquidity_needed(boost_invoice_) == [
+        value.amount_msats
+        + FeePolicy().fee_limit(value.receiver_address, value.amount_msats)
+        for value in values
+    ]
+
+
+def test_pay_boost_invoices(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = failing()
+    invoices = [boost_invoice_, boost_invoice_, boost_invoice_]
+
+    results = list(service.pay_boost_invoices(invoices, max_concurrent_payments=3))
+
+    assert sorted(index for index, _ in results) == [0] * 4 + [1] * 4 + [2] * 4
+    assert all(r.payment.status == ln.Payment.SUCCEEDED for _, r in results)
+
+
+def test_pay_boost_invoices_keeps_paying_after_an_error(
+    service, router_stub, boost_invoice_
+):
+    dave = boost_invoice_.payments[1].receiver_address
+
+    def send_payment_v2(request):
+        if request.dest.hex() == dave:
+            raise grpc.RpcError()
+        return iter([ln.Payment(status=ln.Payment.SUCCEEDED)])
+
+    router_stub.SendPaymentV2.side_effect = send_payment_v2
+
+    results = [r for _, r in service.pay_boost_invoices([boost_invoice_])]
+
+    assert len(results) == 4
+    errors = {r.value.receiver_address: payment_error(r.payment) for r in results}
+    assert errors.pop(dave) == "FAILURE_REASON_ERROR"
+    assert set(errors.values()) == {""}
+
+
+def test_value_to_record_stream(boost_invoice_):
+    value = dataclasses.replace(boost_invoice_.payments[0], boost=False, timestamp=90)
+    record = json_codec.loads(value_to_record(value))
+    assert record["action"] == "stream"
+    assert record["ts"] == 90
+
+
+def test_pay_value_with_retries_reuses_preimage(service, router_stub, boost_invoice_):
+    router_stub.SendPaymentV2.side_effect = [
+        iter(
+            [
+                ln.Payment(
+                    status=ln.Payment.FAILED, failure_reason=ln.FAILURE_REASON_TIMEOUT
+                )
+            ]
+        ),
+        iter([ln.Payment(status=ln.Payment.SUCCEEDED)]),
+    ]
+    preimage = bytes(range(32))
+
+    result = service.pay_value_with_retries(
+        boost_invoice_.payments[0],
+        deadline=time.monotonic() + 60,
+        retry_backoff=0,
+        preimage=preimage,
+    )
+
+    assert result.attempts == 2
+    for call in router_stub.SendPaymentV2.call_args_list:
+        request = call.args[0]
+        assert request.payment_hash == hashlib.sha256(preimage).digest()
+        assert request.dest_custom_records[5482373484] == preimage
+
+
+class NotFound(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.NOT_FOUND
+
+
+def test_track_payment(service, router_stub):
+    router_stub.TrackPaymentV2.return_value = iter(
+        [
+            ln.Payment(status=ln.Payment.IN_FLIGHT),
+            ln.Payment(status=ln.Payment.SUCCEEDED, fee_msat=5),
+        ]
+    )
+    payment = service.track_payment(b"hash")
+    assert payment.status == ln.Payment.SUCCEEDED
+    assert router_stub.TrackPaymentV2.call_args.args[0].payment_hash == b"hash"
+
+    # LND never sent it.
+    router_stub.TrackPaymentV2.side_effect = NotFound()
+    assert service.track_payment(b"hash") is None
+
+
+class Unavailable(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+class Unauthenticated(grpc.RpcError):
+    def code(self):
+        return grpc.StatusCode.UNAUTHENTICATED
+
+
+def subscription(*items):
+    """A SubscribeInvoices stream of `items`, raising the exceptions."""
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def settled_invoice(add_index, settle_index):
+    invoice = boost_invoice(add_index)
+    invoice.settle_index = settle_index
+    return invoice
+
+
+def test_settled_invoices_resubscribes(service, lightning_stub):
+    lightning_stub.SubscribeInvoices.side_effect = [
+        subscription(Unavailable()),
+        subscription(
+            ln.Invoice(add_index=9),
+            settled_invoice(7, 1),
+            settled_invoice(8, 2),
+            Unavailable(),
+        ),
+        # LND replays the last invoice seen before the new one.
+        subscription(settled_invoice(8, 2), settled_invoice(9, 3)),
+        subscription(Unauthenticated()),
+    ]
+    sleeps = []
+
+    invoices = service.settled_invoices(settle_index=0, sleep=sleeps.append)
+
+    assert [invoice.add_index for invoice in itertools.islice(invoices, 3)] == [7, 8, 9]
+    with pytest.raises(Unauthenticated):
+        next(invoices)
+    requests = [
+        call.args[0].settle_index
+        for call in lightning_stub.SubscribeInvoices.call_args_list
+    ]
+    assert requests == [0, 0, 2, 3]
+    # The backoff starts over once the subscription delivers again.
+    assert sleeps == [1, 1, 1]
+
+
+def test_watch_value_received_drop_before_first_invoice(
+    service, lightning_stub, invoices
+):
+    for settle_index, invoice in enumerate(invoices[:5], 1):
+        invoice.settle_index = settle_index
+    lightning_stub.SubscribeInvoices.side_effect = [
+        subscription(Unavailable()),
+        # Settled while the subscription was renewed.
+        subscription(settled_invoice(26, 6), Unauthenticated()),
+    ]
+
+    values = service.watch_value_received(sleep=lambda seconds: None)
+
+    assert next(values).message == "26"
+    requests = [
+        call.args[0].settle_index
+        for call in lightning_stub.SubscribeInvoices.call_args_list
+    ]
+    assert requests == [5, 5]
+
+
+def test_watch_value_received_follow(service, lightning_stub, invoices):
+    for settle_index, invoice in enumerate(invoices, 1):
+        invoice.settle_index = settle_index
+    list_invoices = list_invoices_from(invoices)
+
+    def list_invoices_before_24_settled(request):
+        # The newest invoices are looked up before 24 and 25 settle, the
+        # history is read after.
+        if request.reversed:
+            return ln.ListInvoiceResponse(invoices=invoices[:23])
+        return list_invoices(request)
+
+    lightning_stub.ListInvoices.side_effect = list_invoices_before_24_settled
+    lightning_stub.SubscribeInvoices.side_effect = [
+        subscription(*invoices[23:], settled_invoice(26, 26), Unauthenticated()),
+    ]
+    checkpoints = []
+
+    values = service.watch_value_received(history=True, checkpoint=checkpoints.append)
+
+    messages = [value.message for value in itertools.islice(values, 26)]
+    assert messages == [str(i) for i in range(1, 27)]
+    assert lightning_stub.SubscribeInvoices.call_args.args[0].settle_index == 23
+    assert checkpoints == [24, 25]
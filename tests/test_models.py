@@ -0,0 +1,28 @@
+from dataclasses import asdict, replace
+
+import pytest
+
+from src.models import PodcastValue, PodcastValueDestination, ValueForValue
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        ValueForValue(amount_msats=1000),
+        PodcastValue(destinations=[]),
+        PodcastValueDestination(split=50, address="abc"),
+    ],
+)
+def test_models_are_slotted(value):
+    assert not hasattr(value, "__dict__")
+    with pytest.raises(AttributeError):
+        value.unknown = True
+
+
+def test_value_for_value_api():
+    value = ValueForValue(amount_msats=1000, message="Hi")
+    assert value.boost is True
+    assert value.podcast_title is None
+    assert replace(value, message="Bye").message == "Bye"
+    assert asdict(value)["message"] == "Hi"
+    assert value == ValueForValue(amount_msats=1000, message="Hi")
@@ -0,0 +1,60 @@
+import pytest
+
+from src.lnd import lightning_pb2 as ln
+from src.providers.route_cache_provider import RouteCacheProvider
+from src.services.route_cache_service import RouteCacheService
+
+DEST = "aa" * 33
+HOP = "cc" * 33
+
+
+class Clock:
+    def __init__(self, now=1000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def route_cache(clock):
+    return RouteCacheService(
+        provider=RouteCacheProvider.from_path(":memory:"),
+        ttl_seconds=60,
+        clock=clock,
+    )
+
+
+def route(*pub_keys):
+    return ln.Route(hops=[ln.Hop(pub_key=pub_key) for pub_key in pub_keys])
+
+
+def test_put_and_get(route_cache):
+    assert route_cache.get(DEST) is None
+    route_cache.put(DEST, route(HOP, DEST))
+    assert route_cache.get(DEST) == [HOP, DEST]
+
+
+def test_put_ignores_route_to_another_node(route_cache):
+    route_cache.put(DEST, route(DEST, HOP))
+    assert route_cache.get(DEST) is None
+
+
+def test_expires(route_cache, clock):
+    route_cache.put(DEST, route(HOP, DEST))
+    clock.now += 60
+    assert route_cache.get(DEST) == [HOP, DEST]
+    clock.now += 1
+    assert route_cache.get(DEST) is None
+    assert route_cache.provider.get(DEST) is None
+
+
+def test_invalidate(route_cache):
+    route_cache.put(DEST, route(HOP, DEST))
+    route_cache.invalidate(DEST)
+    assert route_cache.get(DEST) is None
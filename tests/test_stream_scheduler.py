@@ -0,0 +1,110 @@
+import pytest
+
+from src.stream_scheduler import StreamScheduler, ticks
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_ticks_keep_a_steady_schedule():
+    clock = Clock()
+    schedule = ticks(60, clock=clock, sleep=clock.sleep)
+
+    assert next(schedule) == 1
+    assert clock.now == 60
+    # Time spent between ticks is taken from the next wait.
+    clock.now += 15
+    assert next(schedule) == 2
+    assert clock.now == 120
+    # Late ticks are yielded right away to catch up.
+    clock.now += 100
+    assert next(schedule) == 3
+    assert next(schedule) == 4
+    assert clock.now == 240
+    assert clock.sleeps == [60, 45, 20]
+
+
+def test_streams_with_the_same_interval_are_spread():
+    scheduler = StreamScheduler(wheel_size=10)
+
+    delays = [scheduler.add(key, 8) for key in "abcd"]
+
+    # A lone stream is first due after a whole interval, the next ones take
+    # the middle of the largest gap between the others.
+    assert delays == [8, 4, 6, 2]
+    due = [scheduler.advance() for _ in range(16)]
+    # One stream every 2 slots, interval / 4.
+    assert [i + 1 for i, keys in enumerate(due) if keys] == list(range(2, 17, 2))
+    assert due[9:16:2] == [[("d", 2)], [("b", 2)], [("c", 2)], [("a", 2)]]
+
+
+def test_streams_are_spread_over_the_default_wheel():
+    scheduler = StreamScheduler()
+
+    delays = sorted(scheduler.add(key, 60) for key in range(4))
+
+    assert delays == [15, 30, 45, 60]
+
+
+def test_streams_share_slots_once_the_interval_is_full():
+    scheduler = StreamScheduler(wheel_size=10)
+
+    delays = [scheduler.add(key, 2) for key in "abcd"]
+
+    assert delays == [2, 1, 2, 1]
+
+
+def test_intervals_longer_than_the_wheel():
+    scheduler = StreamScheduler(wheel_size=4)
+    scheduler.add("a", 10)
+
+    due = [scheduler.advance() for _ in range(20)]
+
+    assert [i + 1 for i, keys in enumerate(due) if keys] == [10, 20]
+
+
+def test_remove():
+    scheduler = StreamScheduler(wheel_size=10)
+    scheduler.add("a", 2)
+    scheduler.add("b", 2)
+    with pytest.raises(ValueError):
+        scheduler.add("a", 2)
+
+    scheduler.remove("a")
+    scheduler.remove("a")
+
+    assert "a" not in scheduler
+    assert len(scheduler) == 1
+    # "b" keeps the slot it was given next to the one of "a".
+    assert [scheduler.advance() for _ in range(4)] == [[("b", 1)], [], [("b", 2)], []]
+
+
+def test_run_until_no_stream_is_left():
+    clock = Clock()
+    scheduler = StreamScheduler(resolution=0.5, wheel_size=10)
+    scheduler.add("a", 1)
+    scheduler.add("b", 1)
+
+    due = []
+    for keys in scheduler.run(clock=clock, sleep=clock.sleep):
+        due.append((clock.now, keys))
+        for key, tick in keys:
+            if tick == 2:
+                scheduler.remove(key)
+
+    assert due == [
+        (0.5, [("b", 1)]),
+        (1.0, [("a", 1)]),
+        (1.5, [("b", 2)]),
+        (2.0, [("a", 2)]),
+    ]
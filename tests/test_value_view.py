@@ -0,0 +1,109 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from src.lnd import lightning_pb2 as ln
+from src.models import ValueForValue
+from src.value_view import (
+    InternTable,
+    ValueForValueView,
+    record_to_amount_msats_total,
+    record_to_timestamp,
+)
+
+
+@pytest.fixture
+def record():
+    return {
+        "action": "boost",
+        "app_name": "Fountain",
+        "name": "Podcaster",
+        "podcast": "Podcasting 2.0",
+        "feedID": 920666,
+        "message": "Hi",
+        "time": "01:02:03",
+        "value_msat_total": "21000",
+    }
+
+
+@pytest.fixture
+def invoice():
+    return ln.Invoice(value_msat=1000, creation_date=1658000000)
+
+
+def test_view_fields(invoice, record):
+    view = ValueForValueView(invoice, record)
+    assert view.amount_msats == 1000
+    assert view.creation_date == datetime.fromtimestamp(1658000000)
+    assert view.boost is True
+    assert view.sender_app_name == "Fountain"
+    assert view.receiver_name == "Podcaster"
+    assert view.podcast_index_feed_id == 920666
+    assert view.amount_msats_total == 21000
+    assert view.timestamp == 3723
+    assert view.sender_name is None
+    assert view.uuid is None
+
+
+def test_view_computes_fields_once(invoice):
+    record = Mock(wraps={"message": "Hi"})
+    view = ValueForValueView(invoice, record)
+    assert view.message == "Hi"
+    assert view.message == "Hi"
+    record.get.assert_called_once_with("message")
+
+
+def test_view_is_read_only(invoice, record):
+    view = ValueForValueView(invoice, record)
+    with pytest.raises(AttributeError):
+        view.message = "Bye"
+    with pytest.raises(AttributeError):
+        view.unknown
+
+
+def test_materialize(invoice, record):
+    value = ValueForValueView(invoice, record).materialize()
+    assert value == ValueForValue(
+        amount_msats=1000,
+        creation_date=datetime.fromtimestamp(1658000000),
+        boost=True,
+        sender_app_name="Fountain",
+        receiver_name="Podcaster",
+        podcast_title="Podcasting 2.0",
+        podcast_index_feed_id=920666,
+        message="Hi",
+        timestamp=3723,
+        amount_msats_total=21000,
+    )
+
+
+def test_intern_table():
+    table = InternTable()
+    a = "".join(["Podcasting", " 2.0"])
+    b = "".join(["Podcasting ", "2.0"])
+    assert a is not b
+    assert table.intern(a) is a
+    assert table.intern(b) is a
+    assert table.intern(None) is None
+    assert table.intern(920666) == 920666
+    assert table.code(b) == 0
+    assert table.code("No Agenda") == 1
+    assert len(table) == 2
+
+
+def test_view_interns_repeated_fields(invoice):
+    table = InternTable()
+    first = ValueForValueView(invoice, {"podcast": "".join(["No ", "Agenda"])}, table)
+    second = ValueForValueView(invoice, {"podcast": "".join(["No", " Agenda"])}, table)
+    assert first.podcast_title is second.podcast_title
+    assert first.materialize().podcast_title is second.podcast_title
+
+
+@pytest.mark.parametrize(
+    "record",
+    [{"ts": "1:02", "value_msat_total": "lots"}, {"time": "noon"}, {}],
+)
+def test_malformed_fields_are_missing(record):
+    assert record_to_timestamp(record) is None
+    assert record_to_amount_msats_total(record) is None